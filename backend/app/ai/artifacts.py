@@ -0,0 +1,217 @@
+import argparse
+import bisect
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Iterable, Sequence
+from typing import overload
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OEZTBL1\n"
+# Сигнатура, SHA-256 исходного CSV, число полей в строке, число строк
+HEADER = struct.Struct("<8s32sII")
+OFFSET = struct.Struct("<I")
+
+ARTIFACT_DIR = os.path.dirname(__file__)
+
+
+def file_sha256(path: str) -> bytes:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def artifact_path(name: str) -> str:
+    return os.path.join(ARTIFACT_DIR, f"{name}.tbl")
+
+
+class _Column(Sequence[str]):
+    """
+    Столбец таблицы как последовательность строк: подходит для bisect.
+    """
+
+    def __init__(self, table: "StringTable", field: int) -> None:
+        self.table = table
+        self.field = field
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]: ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return [self.table.field(i, self.field) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return self.table.field(index, self.field)
+
+
+class StringTable:
+    """
+    Таблица строк, отображённая в память только для чтения.
+
+    Формат: заголовок, массив смещений uint32 (строк * полей + 1) и блоб
+    UTF-8. Строки отсортированы по первому полю, поэтому поиск — bisect
+    без разбора файла. Страницы файла общие для всех процессов-воркеров.
+    """
+
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.source_sha256, self.fields, self.rows = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compiled table")
+        self._offsets = HEADER.size
+        self._blob = self._offsets + OFFSET.size * (self.rows * self.fields + 1)
+        self.path = path
+
+    def __len__(self) -> int:
+        return int(self.rows)
+
+    def _offset(self, slot: int) -> int:
+        offset: int = OFFSET.unpack_from(self._mmap, self._offsets + OFFSET.size * slot)[0]
+        return offset
+
+    def field(self, row: int, field: int) -> str:
+        slot = row * self.fields + field
+        start, end = self._offset(slot), self._offset(slot + 1)
+        return self._mmap[self._blob + start : self._blob + end].decode("utf-8")
+
+    def row(self, row: int) -> tuple[str, ...]:
+        return tuple(self.field(row, field) for field in range(self.fields))
+
+    def column(self, field: int) -> _Column:
+        return _Column(self, field)
+
+    def find(self, key: str) -> int | None:
+        keys = self.column(0)
+        i = bisect.bisect_left(keys, key)
+        return i if i < len(keys) and keys[i] == key else None
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def write_table(
+    path: str, rows: Iterable[Sequence[str]], fields: int, source_sha256: bytes
+) -> int:
+    """
+    Записывает таблицу, сортируя строки по первому полю.
+
+    Порядок байтов UTF-8 совпадает с порядком кодовых точек, поэтому
+    сортировка в Python и bisect по декодированным строкам согласованы.
+    """
+    ordered = sorted(rows, key=lambda r: r[0])
+    offsets = [0]
+    blob = bytearray()
+    for row in ordered:
+        if len(row) != fields:
+            raise ValueError(f"Expected {fields} fields, got {len(row)}")
+        for value in row:
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, source_sha256, fields, len(ordered)))
+        file.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        file.write(blob)
+    os.replace(tmp_path, path)
+    return len(ordered)
+
+
+def open_table(name: str, source_path: str) -> StringTable | None:
+    """
+    Скомпилированная таблица, если она есть и собрана из текущей версии CSV.
+    Иначе None, и вызывающий код читает CSV сам.
+    """
+    path = artifact_path(name)
+    if not os.path.exists(path):
+        return None
+    try:
+        table = StringTable(path)
+    except (OSError, ValueError, struct.error):
+        logger.warning("%s is unreadable, falling back to %s", path, source_path)
+        return None
+    if table.source_sha256 != file_sha256(source_path):
+        logger.warning("%s is stale, falling back to %s", path, source_path)
+        table.close()
+        return None
+    return table
+
+
+def compiled_tables() -> dict[str, tuple[str, list[tuple[str, ...]], int]]:
+    """
+    Имя таблицы: исходный CSV, строки и число полей.
+    """
+    from app.ai import mkb, recommendations
+
+    index = mkb.MkbIndex.from_rows(mkb.read_mkb_csv())
+    gpt_rows = recommendations.read_gpt_csv()
+    return {
+        **{name: (mkb.MKB_PATH, rows, fields) for name, (rows, fields) in index.tables().items()},
+        "gpt": (recommendations.GPT_PATH, [(label, data) for label, data in gpt_rows], 2),
+    }
+
+
+def build() -> None:
+    for name, (source, rows, fields) in compiled_tables().items():
+        count = write_table(artifact_path(name), rows, fields, file_sha256(source))
+        logger.info("Compiled %s: %d rows from %s", artifact_path(name), count, source)
+
+
+def check() -> bool:
+    """
+    Сверяет артефакты с исходными CSV: контрольная сумма и содержимое.
+    """
+    ok = True
+    for name, (source, rows, fields) in compiled_tables().items():
+        path = artifact_path(name)
+        if not os.path.exists(path):
+            logger.error("%s is missing", path)
+            ok = False
+            continue
+        table = StringTable(path)
+        if table.source_sha256 != file_sha256(source):
+            logger.error("%s was built from a different %s", path, source)
+            ok = False
+        elif table.fields != fields or [table.row(i) for i in range(len(table))] != sorted(
+            (tuple(row) for row in rows), key=lambda r: r[0]
+        ):
+            logger.error("%s does not match %s", path, source)
+            ok = False
+        else:
+            logger.info("%s is up to date", path)
+        table.close()
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compile mkb.csv and gpt.csv into memory-mappable tables"
+    )
+    parser.add_argument("command", choices=["build", "check"])
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "build":
+        build()
+    if not check():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+import logging
+import os
+from collections.abc import Callable
+from typing import Protocol
+
+import torch
+
+from app.ai.precision import apply_precision
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Backend(Protocol):
+    name: str
+
+    def __call__(self, inputs: dict[str, torch.Tensor]) -> torch.Tensor: ...
+
+
+class LogitsOnly(torch.nn.Module):
+    """
+    Обёртка над классификатором Hugging Face, возвращающая только логиты:
+    так её можно экспортировать в ONNX и вызывать так же, как ансамбль.
+    """
+
+    def __init__(self, model: torch.nn.Module) -> None:
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        logits: torch.Tensor = self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+        return logits
+
+
+class MeanPooling(torch.nn.Module):
+    """
+    Эмбеддинг текста: среднее скрытых состояний энкодера по токенам
+    без паддинга, нормированное по длине (косинус = скалярное произведение).
+    """
+
+    def __init__(self, encoder: torch.nn.Module) -> None:
+        super().__init__()
+        self.encoder = encoder
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        hidden = self.encoder(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+        mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return torch.nn.functional.normalize(pooled, dim=-1)
+
+
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, module: torch.nn.Module, device: torch.device | None = None) -> None:
+        self.module = module
+        self.device = device or torch.device("cpu")
+
+    def __call__(self, inputs: dict[str, torch.Tensor]) -> torch.Tensor:
+        with torch.no_grad():
+            logits: torch.Tensor = self.module(
+                **{k: v.to(self.device) for k, v in inputs.items()}
+            )
+        return logits.float().cpu()
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, path: str, intra_op_threads: int = 0, parallel: bool = False) -> None:
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = intra_op_threads
+        if parallel:
+            # Независимые ветки графа (энкодеры ансамбля) выполняются одновременно
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+            options.inter_op_num_threads = 2
+        self.path = path
+        self.session = ort.InferenceSession(
+            path, options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def __call__(self, inputs: dict[str, torch.Tensor]) -> torch.Tensor:
+        feed = {k: v.cpu().numpy() for k, v in inputs.items() if k in self.input_names}
+        (logits,) = self.session.run(["logits"], feed)
+        return torch.from_numpy(logits)
+
+
+def onnx_path(base_path: str, precision: str) -> str:
+    """
+    Путь к ONNX-модели с учётом точности: для int8 берётся
+    квантованный вариант, если он был экспортирован.
+    """
+    quantized = base_path.replace(".onnx", ".int8.onnx")
+    if precision == "int8" and os.path.exists(quantized):
+        return quantized
+    return base_path
+
+
+def load_backend(
+    build_torch_module: Callable[[], torch.nn.Module],
+    onnx_base_path: str,
+    *,
+    device: torch.device | None = None,
+    parallel: bool = False,
+    backend: str | None = None,
+    precision: str | None = None,
+) -> Backend:
+    """
+    Бэкенд выполнения модели: ONNX Runtime, если он выбран в настройках и
+    файлы экспортированы (python -m app.ai.onnx_export), иначе PyTorch.
+    """
+    precision = precision or settings.MODEL_PRECISION
+    if (backend or settings.INFERENCE_BACKEND) == "onnx":
+        path = onnx_path(onnx_base_path, precision)
+        try:
+            if os.path.exists(path):
+                return OnnxBackend(
+                    path,
+                    intra_op_threads=settings.ONNX_INTRA_OP_THREADS,
+                    parallel=parallel,
+                )
+            logger.warning("%s not found, falling back to torch", path)
+        except ImportError:
+            logger.warning("onnxruntime is not installed, falling back to torch")
+
+    module = build_torch_module()
+    module.eval()
+    module = apply_precision(module, precision)
+    return TorchBackend(module, device)
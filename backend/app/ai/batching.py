@@ -0,0 +1,89 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Generic, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Собирает одновременные запросы к одной модели в пачки.
+
+    Пачка отправляется в модель, как только набралось `max_batch_size`
+    элементов или первый элемент прождал `max_wait_ms` миллисекунд, поэтому
+    задержка ограничена сверху, а пропускная способность растёт с нагрузкой.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[list[T]], list[R]],
+        *,
+        max_batch_size: int,
+        max_wait_ms: float,
+        name: str = "batcher",
+    ) -> None:
+        self.fn = fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self.name = name
+        self._queue: queue.Queue[tuple[T, Future[R]]] = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    def submit(self, item: T) -> Future[R]:
+        future: Future[R] = Future()
+        self._ensure_started()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item: T) -> R:
+        return self.submit(item).result()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=f"{self.name}-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self) -> list[tuple[T, Future[R]]]:
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = [
+                (item, future)
+                for item, future in self._collect()
+                if future.set_running_or_notify_cancel()
+            ]
+            if not batch:
+                continue
+            try:
+                results = self.fn([item for item, _ in batch])
+            except Exception as e:
+                logger.exception("Batch of %d failed in %s", len(batch), self.name)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
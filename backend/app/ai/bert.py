@@ -1,23 +1,117 @@
 import os
+from dataclasses import dataclass
+from typing import Any
+
 import joblib
 import torch
-from transformers import AutoTokenizer, RobertaForSequenceClassification
+from transformers import (
+    AutoTokenizer,
+    PreTrainedTokenizerBase,
+    RobertaForSequenceClassification,
+)
+
+from app.ai.backends import Backend, LogitsOnly, MeanPooling, TorchBackend, load_backend
+from app.ai.mkb import get_true_label
+from app.ai.registry import registry
+from app.ai.suggestions import Suggestion, top_k_suggestions
+from app.ai.tokenization import encode_ids, pad, run_bucketed
+from app.core.config import settings
 
 bert_weights = os.path.join(os.path.dirname(__file__), './bert')
-tokenizer = AutoTokenizer.from_pretrained(bert_weights)
-
-label_encoder = joblib.load(os.path.join(bert_weights, 'label_encoder_new.pkl'))
-model = RobertaForSequenceClassification.from_pretrained(bert_weights)
-model.eval()
-
-def get_bert_result(text):
-    text = text.lower()
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-  
-    with torch.no_grad(): 
-        outputs = model(**inputs)
-        logits = outputs.logits 
-    
-    predicted_class = torch.argmax(logits, dim=1).item() 
-    predicted_label = label_encoder.inverse_transform([predicted_class])  
-    return predicted_label[0]
+bert_onnx = os.path.join(bert_weights, 'model.onnx')
+
+
+@dataclass
+class BertBundle:
+    tokenizer: PreTrainedTokenizerBase
+    backend: Backend
+    label_encoder: Any
+
+
+def build_bert_module() -> torch.nn.Module:
+    return LogitsOnly(RobertaForSequenceClassification.from_pretrained(bert_weights))
+
+
+def load_bert(precision: str | None = None, backend: str | None = None) -> BertBundle:
+    tokenizer = AutoTokenizer.from_pretrained(bert_weights)
+    label_encoder = joblib.load(os.path.join(bert_weights, 'label_encoder_new.pkl'))
+    return BertBundle(
+        tokenizer=tokenizer,
+        backend=load_backend(build_bert_module, bert_onnx, backend=backend, precision=precision),
+        label_encoder=label_encoder,
+    )
+
+
+registry.register("bert", load_bert)
+
+
+def bert_encoder(bundle: BertBundle) -> Backend:
+    """
+    Энкодер загруженного классификатора с усреднением по токенам: веса общие
+    с моделью диагнозов, вторая копия RoBERTa не загружается.
+    """
+    backend = bundle.backend
+    if not isinstance(backend, TorchBackend):
+        raise ValueError("Эмбеддинги bert доступны только при INFERENCE_BACKEND=torch")
+    return TorchBackend(MeanPooling(backend.module.model.roberta), backend.device)
+
+
+def get_bert_logits(texts: list[str], bundle: BertBundle | None = None) -> torch.Tensor:
+    bundle = bundle or registry.get("bert")
+    max_length = settings.BERT_MAX_LENGTH
+    texts = [text.lower() for text in texts]
+    ids = encode_ids(bundle.tokenizer, texts, max_length, histogram="bert")
+
+    def run(indices: list[int], length: int) -> torch.Tensor:
+        input_ids, attention_mask = pad([ids[i] for i in indices], bundle.tokenizer.pad_token_id, length)
+        return bundle.backend({"input_ids": input_ids, "attention_mask": attention_mask})
+
+    return run_bucketed(run, [len(x) for x in ids], max_length)
+
+
+def get_bert_results(texts: list[str], bundle: BertBundle | None = None) -> list[str]:
+    """
+    Классификация пачки текстов за один прямой проход модели.
+    """
+    bundle = bundle or registry.get("bert")
+    logits = get_bert_logits(texts, bundle)
+
+    predicted_classes = torch.argmax(logits, dim=1).tolist()
+    predicted_labels = bundle.label_encoder.inverse_transform(predicted_classes)
+    return list(predicted_labels)
+
+
+def get_bert_suggestions(texts: list[str], bundle: BertBundle | None = None) -> list[list[Suggestion]]:
+    """
+    INFERENCE_TOP_K вероятных диагнозов для каждого текста за один прямой проход.
+    """
+    bundle = bundle or registry.get("bert")
+    logits = get_bert_logits(texts, bundle)
+    return top_k_suggestions(
+        logits,
+        bundle.label_encoder,
+        get_true_label,
+        settings.INFERENCE_TOP_K,
+        settings.BERT_TEMPERATURE,
+    )
+
+
+def get_bert_embeddings(texts: list[str], bundle: BertBundle | None = None) -> list[list[float]]:
+    """
+    Нормированные эмбеддинги текстов для поиска похожих случаев.
+    """
+    bundle = bundle or registry.get("bert")
+    encoder = bert_encoder(bundle)
+    max_length = settings.BERT_MAX_LENGTH
+    ids = encode_ids(bundle.tokenizer, [text.lower() for text in texts], max_length)
+
+    def run(indices: list[int], length: int) -> torch.Tensor:
+        input_ids, attention_mask = pad([ids[i] for i in indices], bundle.tokenizer.pad_token_id, length)
+        return encoder({"input_ids": input_ids, "attention_mask": attention_mask})
+
+    embeddings: list[list[float]] = run_bucketed(run, [len(x) for x in ids], max_length).tolist()
+    return embeddings
+
+
+def get_bert_result(text: str) -> str:
+    return get_bert_results([text])[0]
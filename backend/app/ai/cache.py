@@ -0,0 +1,201 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.config import settings
+
+# Число записей ведут триггеры, чтобы вставка не считала строки таблицы
+_SCHEMA = """
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_entries_accessed_at ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO counters (name, value) VALUES ('hits', 0), ('misses', 0);
+INSERT OR IGNORE INTO counters (name, value) SELECT 'entries', count(*) FROM entries;
+CREATE TRIGGER IF NOT EXISTS entries_inserted AFTER INSERT ON entries BEGIN
+    UPDATE counters SET value = value + 1 WHERE name = 'entries';
+END;
+CREATE TRIGGER IF NOT EXISTS entries_deleted AFTER DELETE ON entries BEGIN
+    UPDATE counters SET value = value - 1 WHERE name = 'entries';
+END;
+COMMIT;
+"""
+
+
+logger = logging.getLogger(__name__)
+
+# Счётчики попаданий копятся в памяти процесса и пишутся в базу пачкой
+COUNTERS_FLUSH_EVERY = 100
+COUNTERS_FLUSH_SECONDS = 5.0
+
+
+def normalize_prompt(prompt: str) -> str:
+    return re.sub(r"\s+", " ", prompt.lower()).strip()
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    entries: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class InferenceCache:
+    """
+    Кэш результатов моделей с вытеснением по LRU и TTL.
+
+    Хранится в локальной SQLite-базе, поэтому общий для всех воркеров API
+    в контейнере. Ключ — модель, хэш версии весов и нормализованный текст.
+    Когда записей становится больше `max_entries`, давно не читанные
+    удаляются пачкой в десятую часть лимита, а не по одной на каждую вставку.
+    Счётчики попаданий и промахов пишутся в базу не на каждое чтение, а раз
+    в COUNTERS_FLUSH_EVERY обращений или COUNTERS_FLUSH_SECONDS секунд.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._counts_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._flushed_at = time.monotonic()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn: sqlite3.Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def make_key(model: str, version: str, prompt: str) -> str:
+        raw = "\0".join((model, version, normalize_prompt(prompt)))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key: str) -> Any | None:
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute(
+            "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None and now - row[1] > self.ttl_seconds:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            row = None
+        if row is None:
+            self._count(conn, hit=False)
+            return None
+        conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        self._count(conn, hit=True)
+        return json.loads(row[0])
+
+    def _count(self, conn: sqlite3.Connection, hit: bool) -> None:
+        with self._counts_lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+            due = (
+                self._hits + self._misses >= COUNTERS_FLUSH_EVERY
+                or time.monotonic() - self._flushed_at >= COUNTERS_FLUSH_SECONDS
+            )
+        if due:
+            self._flush(conn)
+
+    def _flush(self, conn: sqlite3.Connection) -> None:
+        with self._counts_lock:
+            hits, misses = self._hits, self._misses
+            self._hits = self._misses = 0
+            self._flushed_at = time.monotonic()
+        if not hits and not misses:
+            return
+        try:
+            conn.execute(
+                "UPDATE counters SET value = value + "
+                "CASE name WHEN 'hits' THEN ? ELSE ? END WHERE name IN ('hits', 'misses')",
+                (hits, misses),
+            )
+        except sqlite3.Error as e:
+            # Не записанное сейчас попадёт в следующую пачку
+            logger.warning("Failed to flush cache counters: %s", e)
+            with self._counts_lock:
+                self._hits += hits
+                self._misses += misses
+
+    def set(self, key: str, value: Any) -> None:
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT INTO entries (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, "
+            "created_at = excluded.created_at, accessed_at = excluded.accessed_at",
+            (key, json.dumps(value, ensure_ascii=False), now, now),
+        )
+        (entries,) = conn.execute(
+            "SELECT value FROM counters WHERE name = 'entries'"
+        ).fetchone()
+        if entries > self.max_entries:
+            excess = entries - self.max_entries + self.max_entries // 10
+            conn.execute(
+                "DELETE FROM entries WHERE key IN "
+                "(SELECT key FROM entries ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+
+    def stats(self) -> CacheStats:
+        conn = self._connection()
+        self._flush(conn)
+        counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        return CacheStats(
+            hits=counters.get("hits", 0),
+            misses=counters.get("misses", 0),
+            entries=counters.get("entries", 0),
+        )
+
+    def clear(self) -> None:
+        conn = self._connection()
+        conn.execute("DELETE FROM entries")
+        conn.execute("UPDATE counters SET value = 0")
+        with self._counts_lock:
+            self._hits = self._misses = 0
+
+
+_cache: InferenceCache | None = None
+
+
+def get_cache() -> InferenceCache | None:
+    global _cache
+    if settings.INFERENCE_CACHE_MAX_ENTRIES <= 0:
+        return None
+    if _cache is None:
+        _cache = InferenceCache(
+            settings.INFERENCE_CACHE_PATH,
+            max_entries=settings.INFERENCE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.INFERENCE_CACHE_TTL_SECONDS,
+        )
+    return _cache
@@ -0,0 +1,102 @@
+import argparse
+import logging
+from collections.abc import Callable
+from typing import Any
+
+import torch
+
+from app.ai.precision import diagnosis_class, diagnosis_classes, sample_from_csv, sample_from_db
+
+logger = logging.getLogger(__name__)
+
+
+def fit_temperature(logits: torch.Tensor, targets: torch.Tensor, max_iter: int = 100) -> float:
+    """
+    Температура, минимизирующая log loss на отложенной выборке (temperature scaling).
+    """
+    log_temperature = torch.zeros(1, requires_grad=True)
+    optimizer = torch.optim.LBFGS([log_temperature], lr=0.1, max_iter=max_iter)
+
+    def closure() -> torch.Tensor:
+        optimizer.zero_grad()
+        loss = torch.nn.functional.cross_entropy(logits / log_temperature.exp(), targets)
+        loss.backward()
+        return loss
+
+    optimizer.step(closure)
+    return float(log_temperature.exp())
+
+
+def expected_calibration_error(probabilities: torch.Tensor, targets: torch.Tensor, bins: int = 10) -> float:
+    confidence, predicted = probabilities.max(dim=1)
+    correct = (predicted == targets).float()
+    error = torch.zeros(1)
+    edges = torch.linspace(0, 1, bins + 1)
+    for low, high in zip(edges[:-1], edges[1:]):
+        in_bin = (confidence > low) & (confidence <= high)
+        if in_bin.any():
+            gap = (confidence[in_bin].mean() - correct[in_bin].mean()).abs()
+            error += gap * in_bin.float().mean()
+    return float(error)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Fit the softmax temperature of a model on a held-out sample"
+    )
+    parser.add_argument("--model", choices=["bert", "ensemble", "student"], default="bert")
+    parser.add_argument("--data", help="CSV with 'text$diagnosis' rows instead of the DB")
+    parser.add_argument("--sample", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=16)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    logits_fn: Callable[..., torch.Tensor]
+    bundle: Any
+    if args.model == "bert":
+        from app.ai import bert
+
+        bundle = bert.load_bert()
+        logits_fn = bert.get_bert_logits
+    elif args.model == "student":
+        from app.ai import student
+
+        bundle = student.load_student()
+        logits_fn = student.get_student_logits
+    else:
+        from app.ai import ensemble
+
+        bundle = ensemble.load_ensemble()
+        logits_fn = ensemble.get_ensemble_logits
+
+    classes = diagnosis_classes(bundle.label_encoder.classes_)
+
+    sample = (
+        sample_from_csv(args.data)[: args.sample]
+        if args.data
+        else sample_from_db(args.model, args.sample, args.seed)
+    )
+    matched = [(text, diagnosis_class(classes, label)) for text, label in sample]
+    pairs = [(text, target) for text, target in matched if target is not None]
+    if not pairs:
+        raise SystemExit("No held-out texts with diagnoses known to the model")
+
+    texts = [text for text, _ in pairs]
+    targets = torch.tensor([target for _, target in pairs])
+    logits = torch.cat(
+        [
+            logits_fn(texts[start : start + args.batch_size], bundle)
+            for start in range(0, len(texts), args.batch_size)
+        ]
+    )
+
+    temperature = fit_temperature(logits, targets)
+    before = expected_calibration_error(logits.softmax(dim=1), targets)
+    after = expected_calibration_error((logits / temperature).softmax(dim=1), targets)
+    print(f"{len(texts)} texts, ECE {before:.3f} -> {after:.3f}")
+    print(f"{args.model.upper()}_TEMPERATURE={temperature:.3f}")
+
+
+if __name__ == "__main__":
+    main()
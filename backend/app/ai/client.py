@@ -0,0 +1,83 @@
+import threading
+from multiprocessing.connection import Client, Connection
+from typing import Any
+
+from app.core.config import settings
+
+
+class InferenceError(RuntimeError):
+    pass
+
+
+# Таймаут клиента по умолчанию (INFERENCE_TIMEOUT_SECONDS для get_client)
+DEFAULT_TIMEOUT: Any = object()
+
+
+class InferenceClient:
+    """
+    Клиент сервера инференса (app.ai.server) поверх Unix-сокета.
+
+    У каждого потока своё соединение, поэтому параллельные запросы
+    не ждут друг друга и собираются в пачки уже на стороне сервера.
+    Если сервер не ответил за `timeout` секунд, соединение закрывается,
+    чтобы поток не остался заблокированным, а поздний ответ не достался
+    следующему вызову.
+    """
+
+    def __init__(self, address: str, authkey: bytes, timeout: float | None = None) -> None:
+        self.address = address
+        self.authkey = authkey
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> Connection:
+        conn: Connection | None = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _reset(self) -> None:
+        conn: Connection | None = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def call(self, op: str, *args: Any, timeout: float | None = DEFAULT_TIMEOUT) -> Any:
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.timeout
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send((op, args))
+                if timeout is not None and not conn.poll(timeout):
+                    self._reset()
+                    raise InferenceError(f"Сервер инференса не ответил за {timeout:g} с")
+                status, payload = conn.recv()
+                break
+            except (OSError, EOFError) as e:
+                # Сервер мог перезапуститься — переподключаемся один раз
+                self._reset()
+                if attempt:
+                    raise InferenceError(f"Сервер инференса недоступен: {e}")
+        if status == "ok":
+            return payload
+        error_type, message = payload
+        if error_type == "ValueError":
+            raise ValueError(message)
+        raise InferenceError(message)
+
+
+_client: InferenceClient | None = None
+
+
+def get_client() -> InferenceClient:
+    global _client
+    if _client is None:
+        assert settings.INFERENCE_SOCKET_PATH
+        _client = InferenceClient(
+            settings.INFERENCE_SOCKET_PATH,
+            settings.SECRET_KEY.encode(),
+            timeout=settings.INFERENCE_TIMEOUT_SECONDS,
+        )
+    return _client
@@ -0,0 +1,221 @@
+import argparse
+import copy
+import csv
+import json
+import logging
+import os
+import statistics
+import time
+from collections.abc import Callable
+
+import joblib
+import torch
+
+from app.ai.precision import diagnosis_class, diagnosis_classes, sample_from_csv, sample_from_db
+from app.ai.tokenization import encode_ids, pad
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def distillation_loss(
+    student_logits: torch.Tensor, teacher_logits: torch.Tensor, temperature: float
+) -> torch.Tensor:
+    """
+    KL-дивергенция между смягчёнными распределениями ученика и учителя,
+    умноженная на T², чтобы масштаб градиентов не зависел от температуры.
+    """
+    return torch.nn.functional.kl_div(
+        torch.log_softmax(student_logits / temperature, dim=1),
+        torch.softmax(teacher_logits / temperature, dim=1),
+        reduction="batchmean",
+    ) * temperature**2
+
+
+def shrink_encoder(model: torch.nn.Module, layers: int) -> torch.nn.Module:
+    """
+    Копия RoBERTa-классификатора, в которой из N слоёв энкодера оставлены
+    `layers`, равномерно по глубине (первый и последний сохраняются).
+    """
+    student = copy.deepcopy(model)
+    encoder = student.roberta.encoder
+    total = len(encoder.layer)
+    if not 0 < layers <= total:
+        raise ValueError(f"Expected 1..{total} layers, got {layers}")
+    keep = torch.linspace(0, total - 1, layers).round().long().tolist()
+    encoder.layer = torch.nn.ModuleList(encoder.layer[i] for i in keep)
+    student.config.num_hidden_layers = layers
+    return student
+
+
+def batched_logits(
+    fn: Callable[[list[str]], torch.Tensor], texts: list[str], batch_size: int
+) -> torch.Tensor:
+    with torch.no_grad():
+        return torch.cat(
+            [fn(texts[start : start + batch_size]) for start in range(0, len(texts), batch_size)]
+        )
+
+
+def latency_ms(fn: Callable[[list[str]], torch.Tensor], texts: list[str]) -> list[float]:
+    timings = []
+    with torch.no_grad():
+        for text in texts:
+            started = time.perf_counter()
+            fn([text])
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Distill the ensemble into a small single-encoder student model"
+    )
+    parser.add_argument(
+        "--data", help="CSV with 'text$diagnosis' rows instead of the DB; diagnosis may be empty"
+    )
+    parser.add_argument("--dump", help="Write the sampled rows to this CSV for offline reruns")
+    parser.add_argument("--sample", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--held-out", type=float, default=0.1)
+    parser.add_argument("--layers", type=int, default=6)
+    parser.add_argument("--epochs", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--lr", type=float, default=5e-5)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--latency-texts", type=int, default=100)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from transformers import AlbertTokenizer, RobertaTokenizer, get_linear_schedule_with_warmup
+
+    from app.ai import ensemble, student
+    from app.ai.backends import LogitsOnly, TorchBackend
+
+    torch.manual_seed(args.seed)
+    generator = torch.Generator().manual_seed(args.seed)
+
+    sample = (
+        sample_from_csv(args.data)[: args.sample]
+        if args.data
+        # Ученик учится на логитах учителя, поэтому метки не нужны: берутся все
+        # приёмы с текстом, а диагнозы врачей — только для оценки точности
+        else sample_from_db("ensemble", args.sample, args.seed, labeled=False)
+    )
+    if len(sample) < 2:
+        raise SystemExit("Not enough appointments to distill on")
+    if args.dump:
+        with open(args.dump, "w", encoding="utf-8", newline="") as file:
+            csv.writer(file, delimiter="$").writerows(sample)
+
+    texts = [text for text, _ in sample]
+    order = torch.randperm(len(texts), generator=generator).tolist()
+    held_out_size = max(1, int(len(texts) * args.held_out))
+    test_idx, train_idx = order[:held_out_size], order[held_out_size:]
+
+    # Учитель — ансамбль в fp32 на torch, как при обучении
+    teacher_module = ensemble.build_ensemble_module().cpu().eval()
+    teacher = ensemble.EnsembleBundle(
+        tokenizer_1=RobertaTokenizer.from_pretrained(ensemble.model_name_1),
+        tokenizer_2=AlbertTokenizer.from_pretrained(ensemble.model_name_2),
+        backend=TorchBackend(teacher_module),
+        label_encoder=joblib.load(os.path.join(ensemble.weights, 'label_encoder.pkl')),
+    )
+
+    def teacher_fn(batch: list[str]) -> torch.Tensor:
+        return ensemble.get_ensemble_logits(batch, teacher)
+
+    started = time.perf_counter()
+    teacher_logits = batched_logits(teacher_fn, texts, args.batch_size)
+    logger.info("Teacher logits for %d texts in %.0fs", len(texts), time.perf_counter() - started)
+
+    # Ученик начинается с дообученной ветки RoBERTa из ансамбля
+    model = shrink_encoder(teacher_module.bert_model_1, args.layers)
+    tokenizer = teacher.tokenizer_1
+    max_length = settings.STUDENT_MAX_LENGTH
+    ids = encode_ids(tokenizer, texts, max_length)
+
+    steps = args.epochs * -(-len(train_idx) // args.batch_size)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=args.lr)
+    scheduler = get_linear_schedule_with_warmup(optimizer, steps // 10, steps)
+    model.train()
+    for epoch in range(args.epochs):
+        permutation = torch.randperm(len(train_idx), generator=generator).tolist()
+        total = 0.0
+        for start in range(0, len(permutation), args.batch_size):
+            batch = [train_idx[i] for i in permutation[start : start + args.batch_size]]
+            input_ids, attention_mask = pad(
+                [ids[i] for i in batch], tokenizer.pad_token_id, max(len(ids[i]) for i in batch)
+            )
+            logits = model(input_ids=input_ids, attention_mask=attention_mask).logits
+            loss = distillation_loss(logits, teacher_logits[batch], args.temperature)
+            loss.backward()
+            optimizer.step()
+            scheduler.step()
+            optimizer.zero_grad()
+            total += loss.item() * len(batch)
+        logger.info("Epoch %d: distillation loss %.4f", epoch + 1, total / len(train_idx))
+    model.eval()
+
+    bundle = student.StudentBundle(
+        tokenizer=tokenizer,
+        backend=TorchBackend(LogitsOnly(model)),
+        label_encoder=teacher.label_encoder,
+    )
+
+    def student_fn(batch: list[str]) -> torch.Tensor:
+        return student.get_student_logits(batch, bundle)
+
+    test_texts = [texts[i] for i in test_idx]
+    teacher_test = teacher_logits[test_idx].argmax(dim=1)
+    student_test = batched_logits(student_fn, test_texts, args.batch_size).argmax(dim=1)
+
+    classes = diagnosis_classes(teacher.label_encoder.classes_)
+    targets = [
+        diagnosis_class(classes, sample[i][1]) if sample[i][1] else None for i in test_idx
+    ]
+    labelled = [i for i, target in enumerate(targets) if target is not None]
+
+    def accuracy(predicted: torch.Tensor) -> float | None:
+        if not labelled:
+            return None
+        return sum(int(predicted[i]) == targets[i] for i in labelled) / len(labelled)
+
+    latency_sample = test_texts[: args.latency_texts]
+    teacher_ms = latency_ms(teacher_fn, latency_sample)
+    student_ms = latency_ms(student_fn, latency_sample)
+    report = {
+        "texts": len(texts),
+        "held_out": len(test_texts),
+        "held_out_labelled": len(labelled),
+        "layers": args.layers,
+        "agreement": float((teacher_test == student_test).float().mean()),
+        "teacher_accuracy": accuracy(teacher_test),
+        "student_accuracy": accuracy(student_test),
+        "teacher_p50_ms": statistics.median(teacher_ms),
+        "student_p50_ms": statistics.median(student_ms),
+        "speedup": statistics.median(teacher_ms) / statistics.median(student_ms),
+        "torch_threads": torch.get_num_threads(),
+    }
+
+    os.makedirs(student.student_weights, exist_ok=True)
+    model.save_pretrained(student.student_weights)
+    tokenizer.save_pretrained(student.student_weights)
+    joblib.dump(teacher.label_encoder, os.path.join(student.student_weights, 'label_encoder.pkl'))
+    with open(os.path.join(student.student_weights, 'report.json'), "w") as file:
+        json.dump(report, file, indent=2)
+
+    print(f"{len(test_texts)} held-out texts, {args.layers} layers")
+    print(f"agreement:      {report['agreement']:.3f}")
+    for name in ("teacher", "student"):
+        acc = report[f"{name}_accuracy"]
+        print(
+            f"{name + ':':<15} accuracy {'n/a' if acc is None else f'{acc:.3f}'}, "
+            f"p50 {report[f'{name}_p50_ms']:.1f} ms/text"
+        )
+    print(f"speedup:        {report['speedup']:.2f}x")
+    print(f"Saved {student.student_weights}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,35 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
 import torch
 from transformers import RobertaTokenizer, RobertaForSequenceClassification, AlbertTokenizer, AlbertForSequenceClassification
 import joblib
 
-import csv
+from app.ai.backends import Backend, load_backend
+from app.ai.mkb import get_true_label
+from app.ai.registry import registry
+from app.ai.suggestions import Suggestion, top_k_suggestions
+from app.ai.tokenization import encode_ids, pad, run_bucketed
+from app.core.config import settings
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
 
-mkb = {}
-with open(os.path.join(os.path.dirname(__file__), './mkb.csv'), 'r', encoding='utf-8') as file:
-    reader = csv.reader(file, delimiter='$')
-    for row in reader:
-        if len(row) == 2:
-            mkb[row[0]] = row[1]
+def get_pool() -> ThreadPoolExecutor:
+    """
+    Пул из двух потоков для параллельной работы двух веток ансамбля.
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ensemble")
+    return _pool
 
-def get_true_label(text):
-    return mkb.get(text, text)  
 
 class CNNModel(torch.nn.Module):
     def __init__(self, input_dim, output_dim):
@@ -33,48 +49,142 @@ class EnsembleModel(torch.nn.Module):
         self.cnn_model = cnn_model
 
     def forward(self, input_ids_1, attention_mask_1, input_ids_2, attention_mask_2):
-        outputs_1 = self.bert_model_1(input_ids=input_ids_1, attention_mask=attention_mask_1).logits
-        outputs_2 = self.bert_model_2(input_ids=input_ids_2, attention_mask=attention_mask_2).logits
+        if settings.ENSEMBLE_PARALLEL and not torch.jit.is_tracing():
+            # Энкодеры независимы, поэтому считаются одновременно;
+            # torch отпускает GIL внутри операций
+            pool = get_pool()
+            future_1 = pool.submit(self._encode, self.bert_model_1, input_ids_1, attention_mask_1)
+            future_2 = pool.submit(self._encode, self.bert_model_2, input_ids_2, attention_mask_2)
+            outputs_1, outputs_2 = future_1.result(), future_2.result()
+        else:
+            outputs_1 = self.bert_model_1(input_ids=input_ids_1, attention_mask=attention_mask_1).logits
+            outputs_2 = self.bert_model_2(input_ids=input_ids_2, attention_mask=attention_mask_2).logits
         combined_outputs = torch.cat((outputs_1, outputs_2), dim=1)
         logits = self.cnn_model(combined_outputs)
         return logits
 
+    @staticmethod
+    def _encode(model, input_ids, attention_mask):
+        # no_grad действует только в своём потоке
+        with torch.no_grad():
+            return model(input_ids=input_ids, attention_mask=attention_mask).logits
+
 model_name_1 = os.path.join(os.path.dirname(__file__), 'RuBioRoBERTa')
 model_name_2 = os.path.join(os.path.dirname(__file__), 'albert-base-v2')
-
-tokenizer_1 = RobertaTokenizer.from_pretrained(model_name_1)
-model_bert_1 = RobertaForSequenceClassification.from_pretrained(model_name_1, num_labels=250)
-
-tokenizer_2 = AlbertTokenizer.from_pretrained(model_name_2)
-model_bert_2 = AlbertForSequenceClassification.from_pretrained(model_name_2, num_labels=250)
-
-cnn_model = CNNModel(input_dim=500, output_dim=250)
-ensemble_model = EnsembleModel(model_bert_1, model_bert_2, cnn_model)
-
 weights = os.path.join(os.path.dirname(__file__), 'ensemble')
-ensemble_model.load_state_dict(torch.load(os.path.join(weights, './ensemble_model.pth'), map_location=torch.device('cpu')))
+ensemble_onnx = os.path.join(weights, 'ensemble_model.onnx')
 
-label_encoder = joblib.load(os.path.join(weights, './label_encoder.pkl'))
+device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
 
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-ensemble_model.to(device)
-
-
-def get_ensemble_result(input_texts):
-    ensemble_model.eval()
-    with torch.no_grad():
-        inputs1 = tokenizer_1((input_texts), return_tensors='pt', truncation=True, padding=True, max_length=512)
-        inputs2 = tokenizer_2((input_texts), return_tensors='pt', truncation=True, padding=True, max_length=512)
-        inputs1 = {k: v.to(device) for k, v in inputs1.items()}
-        inputs2 = {k: v.to(device) for k, v in inputs2.items()}
-        logits = ensemble_model(
-            input_ids_1=inputs1['input_ids'],
-            attention_mask_1=inputs1['attention_mask'],
-            input_ids_2=inputs2['input_ids'],
-            attention_mask_2=inputs2['attention_mask']
-        )
-        probabilities = torch.nn.functional.softmax(logits, dim=1)
-        _, predicted_labels = torch.max(probabilities, dim=1)
-        predicted_classes = label_encoder.inverse_transform(predicted_labels.cpu().numpy())
-        return get_true_label(predicted_classes[0])
+@dataclass
+class EnsembleBundle:
+    tokenizer_1: RobertaTokenizer
+    tokenizer_2: AlbertTokenizer
+    backend: Backend
+    label_encoder: Any
+
+
+def build_ensemble_module() -> torch.nn.Module:
+    model_bert_1 = RobertaForSequenceClassification.from_pretrained(model_name_1, num_labels=250)
+    model_bert_2 = AlbertForSequenceClassification.from_pretrained(model_name_2, num_labels=250)
+
+    cnn_model = CNNModel(input_dim=500, output_dim=250)
+    ensemble_model = EnsembleModel(model_bert_1, model_bert_2, cnn_model)
+    ensemble_model.load_state_dict(torch.load(os.path.join(weights, './ensemble_model.pth'), map_location=torch.device('cpu')))
+    ensemble_model.to(device)
+    return ensemble_model
+
+
+def load_ensemble(precision: str | None = None, backend: str | None = None) -> EnsembleBundle:
+    tokenizer_1 = RobertaTokenizer.from_pretrained(model_name_1)
+    tokenizer_2 = AlbertTokenizer.from_pretrained(model_name_2)
+    label_encoder = joblib.load(os.path.join(weights, './label_encoder.pkl'))
+    return EnsembleBundle(
+        tokenizer_1=tokenizer_1,
+        tokenizer_2=tokenizer_2,
+        backend=load_backend(
+            build_ensemble_module,
+            ensemble_onnx,
+            device=device,
+            parallel=settings.ENSEMBLE_PARALLEL,
+            backend=backend,
+            precision=precision,
+        ),
+        label_encoder=label_encoder,
+    )
+
+
+registry.register("ensemble", load_ensemble)
+
+
+def encode_ensemble_ids(input_texts: list[str], bundle: EnsembleBundle) -> tuple[list[list[int]], list[list[int]]]:
+    max_length = settings.ENSEMBLE_MAX_LENGTH
+    if settings.ENSEMBLE_PARALLEL:
+        future = get_pool().submit(encode_ids, bundle.tokenizer_2, input_texts, max_length, histogram="ensemble")
+        ids_1 = encode_ids(bundle.tokenizer_1, input_texts, max_length)
+        ids_2 = future.result()
+    else:
+        ids_1 = encode_ids(bundle.tokenizer_1, input_texts, max_length)
+        ids_2 = encode_ids(bundle.tokenizer_2, input_texts, max_length, histogram="ensemble")
+    return ids_1, ids_2
+
+
+def pad_ensemble_inputs(ids_1: list[list[int]], ids_2: list[list[int]], bundle: EnsembleBundle, length: int) -> dict[str, torch.Tensor]:
+    input_ids_1, attention_mask_1 = pad(ids_1, bundle.tokenizer_1.pad_token_id, length)
+    input_ids_2, attention_mask_2 = pad(ids_2, bundle.tokenizer_2.pad_token_id, length)
+    return {
+        'input_ids_1': input_ids_1,
+        'attention_mask_1': attention_mask_1,
+        'input_ids_2': input_ids_2,
+        'attention_mask_2': attention_mask_2,
+    }
+
+
+def encode_ensemble_inputs(input_texts: list[str], bundle: EnsembleBundle) -> dict[str, torch.Tensor]:
+    ids_1, ids_2 = encode_ensemble_ids(input_texts, bundle)
+    length = max(len(ids) for ids in ids_1 + ids_2)
+    return pad_ensemble_inputs(ids_1, ids_2, bundle, length)
+
+
+def get_ensemble_logits(input_texts: list[str], bundle: EnsembleBundle | None = None) -> torch.Tensor:
+    bundle = bundle or registry.get("ensemble")
+    ids_1, ids_2 = encode_ensemble_ids(input_texts, bundle)
+
+    def run(indices: list[int], length: int) -> torch.Tensor:
+        inputs = pad_ensemble_inputs([ids_1[i] for i in indices], [ids_2[i] for i in indices], bundle, length)
+        return bundle.backend(inputs)
+
+    lengths = [max(len(a), len(b)) for a, b in zip(ids_1, ids_2)]
+    return run_bucketed(run, lengths, settings.ENSEMBLE_MAX_LENGTH)
+
+
+def get_ensemble_results(input_texts: list[str], bundle: EnsembleBundle | None = None) -> list[str]:
+    """
+    Классификация пачки текстов ансамблем за один прямой проход.
+    """
+    bundle = bundle or registry.get("ensemble")
+    logits = get_ensemble_logits(input_texts, bundle)
+    probabilities = torch.nn.functional.softmax(logits, dim=1)
+    _, predicted_labels = torch.max(probabilities, dim=1)
+    predicted_classes = bundle.label_encoder.inverse_transform(predicted_labels.numpy())
+    return [get_true_label(label) for label in predicted_classes]
+
+
+def get_ensemble_suggestions(input_texts: list[str], bundle: EnsembleBundle | None = None) -> list[list[Suggestion]]:
+    """
+    INFERENCE_TOP_K вероятных диагнозов для каждого текста за один прямой проход.
+    """
+    bundle = bundle or registry.get("ensemble")
+    logits = get_ensemble_logits(input_texts, bundle)
+    return top_k_suggestions(
+        logits,
+        bundle.label_encoder,
+        get_true_label,
+        settings.INFERENCE_TOP_K,
+        settings.ENSEMBLE_TEMPERATURE,
+    )
+
+
+def get_ensemble_result(input_texts: str) -> str:
+    return get_ensemble_results([input_texts])[0]
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import ParamSpec, TypeVar
+
+from app.core.config import settings
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class InferenceQueueFull(Exception):
+    pass
+
+
+class InferenceTimeout(Exception):
+    pass
+
+
+class InferenceExecutor:
+    """
+    Отдельный пул потоков для инференса с ограниченной очередью.
+
+    Тяжёлые вызовы моделей не занимают общий пул Starlette, а при
+    переполнении очереди запрос сразу отклоняется вместо бесконечного
+    роста задержки.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="inference"
+        )
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+
+    async def run(
+        self, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+    ) -> T:
+        return await self.run_with_timeout(
+            settings.INFERENCE_TIMEOUT_SECONDS, fn, *args, **kwargs
+        )
+
+    async def run_with_timeout(
+        self, timeout: float, fn: Callable[P, T], *args: P.args, **kwargs: P.kwargs
+    ) -> T:
+        if not self._slots.acquire(blocking=False):
+            raise InferenceQueueFull()
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            # Ещё не начатая задача снимается с очереди; начатая доработает,
+            # но её результат уже никто не ждёт
+            future.cancel()
+            raise InferenceTimeout()
+
+
+_executor: InferenceExecutor | None = None
+
+
+def get_executor() -> InferenceExecutor:
+    global _executor
+    if _executor is None:
+        _executor = InferenceExecutor(
+            max_workers=settings.INFERENCE_WORKERS,
+            max_queue=settings.INFERENCE_QUEUE_SIZE,
+        )
+    return _executor
@@ -0,0 +1,239 @@
+import argparse
+import functools
+import logging
+import os
+import random
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from typing import Any
+
+import joblib
+import numpy as np
+
+from app.ai.mkb import get_true_label
+from app.ai.registry import registry
+from app.ai.suggestions import Suggestion
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+AI_DIR = os.path.dirname(__file__)
+FAST_DIR = os.path.join(AI_DIR, "fast")
+
+# Быстрая модель учится на тех же классах, что и трансформер, перед которым стоит
+LABEL_ENCODERS: dict[str, str] = {
+    "bert": os.path.join(AI_DIR, "bert", "label_encoder_new.pkl"),
+    "ensemble": os.path.join(AI_DIR, "ensemble", "label_encoder.pkl"),
+    "student": os.path.join(AI_DIR, "student", "label_encoder.pkl"),
+}
+
+
+def fast_path(model: str) -> str:
+    return os.path.join(FAST_DIR, f"{model}.joblib")
+
+
+def load_fast(model: str) -> Any:
+    return joblib.load(fast_path(model))
+
+
+for _model in LABEL_ENCODERS:
+    registry.register(f"fast_{_model}", functools.partial(load_fast, _model))
+
+
+def get_fast_suggestions(
+    model: str, texts: list[str], bundle: Any = None
+) -> list[list[Suggestion]]:
+    """
+    INFERENCE_TOP_K вероятных диагнозов по TF-IDF и логистической регрессии.
+    """
+    pipeline = bundle if bundle is not None else registry.get(f"fast_{model}")
+    probabilities = pipeline.predict_proba(texts)
+    k = min(settings.INFERENCE_TOP_K, probabilities.shape[1])
+    top = np.argsort(-probabilities, axis=1)[:, :k]
+    result = []
+    for row, indices in zip(probabilities, top):
+        labels = [str(pipeline.classes_[i]) for i in indices]
+        result.append(
+            [
+                Suggestion(label=label, title=get_true_label(label), probability=float(row[i]))
+                for label, i in zip(labels, indices)
+            ]
+        )
+    return result
+
+
+@dataclass
+class TierStats:
+    model: str
+    requests: int = 0
+    fast_hits: int = 0
+    escalations: int = 0
+    # Эскалированные запросы, где трансформер выбрал тот же диагноз
+    escalation_agreements: int = 0
+    # Ответы быстрой модели, перепроверенные трансформером в фоне
+    shadow_checks: int = 0
+    shadow_agreements: int = 0
+    fast_seconds: float = 0.0
+    escalation_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.fast_hits / self.requests if self.requests else 0.0
+
+    @property
+    def agreement(self) -> float | None:
+        return self.shadow_agreements / self.shadow_checks if self.shadow_checks else None
+
+    @property
+    def escalation_agreement(self) -> float | None:
+        return self.escalation_agreements / self.escalations if self.escalations else None
+
+
+def _same_top(a: list[Suggestion], b: list[Suggestion]) -> bool:
+    return bool(a and b) and a[0]["label"] == b[0]["label"]
+
+
+class FastTier:
+    """
+    Быстрый ярус перед трансформером.
+
+    Сначала отвечает TF-IDF + логистическая регрессия; если вероятность
+    лучшего диагноза ниже `threshold`, запрос уходит в трансформер. Доля
+    `shadow_rate` уверенных ответов перепроверяется трансформером в фоне,
+    чтобы видеть, насколько быстрый ярус с ним согласен.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        *,
+        threshold: float,
+        shadow_rate: float = 0.0,
+        bundle: Any = None,
+    ) -> None:
+        self.model = model
+        self.threshold = threshold
+        self.shadow_rate = shadow_rate
+        self.bundle = bundle
+        self._stats = TierStats(model=model)
+        self._lock = threading.Lock()
+
+    def predict(
+        self,
+        text: str,
+        escalate: Callable[[str], list[Suggestion]],
+        shadow: Callable[[str], Future[list[Suggestion]]] | None = None,
+    ) -> list[Suggestion]:
+        started = time.perf_counter()
+        (fast,) = get_fast_suggestions(self.model, [text], self.bundle)
+        fast_seconds = time.perf_counter() - started
+
+        if fast and fast[0]["probability"] >= self.threshold:
+            with self._lock:
+                self._stats.requests += 1
+                self._stats.fast_hits += 1
+                self._stats.fast_seconds += fast_seconds
+            if shadow is not None and random.random() < self.shadow_rate:
+                shadow(text).add_done_callback(lambda f: self._record_shadow(fast, f))
+            return fast
+
+        started = time.perf_counter()
+        result = escalate(text)
+        with self._lock:
+            self._stats.requests += 1
+            self._stats.escalations += 1
+            self._stats.escalation_agreements += _same_top(fast, result)
+            self._stats.fast_seconds += fast_seconds
+            self._stats.escalation_seconds += time.perf_counter() - started
+        return result
+
+    def _record_shadow(self, fast: list[Suggestion], future: Future[list[Suggestion]]) -> None:
+        if future.cancelled() or future.exception() is not None:
+            return
+        with self._lock:
+            self._stats.shadow_checks += 1
+            self._stats.shadow_agreements += _same_top(fast, future.result())
+
+    def stats(self) -> TierStats:
+        with self._lock:
+            return replace(self._stats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Train the TF-IDF fast tier on the classes of a transformer model"
+    )
+    parser.add_argument("--model", choices=list(LABEL_ENCODERS), default="bert")
+    parser.add_argument("--data", help="CSV with 'text$diagnosis' rows instead of the DB")
+    parser.add_argument("--sample", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--test-size", type=float, default=0.1)
+    parser.add_argument(
+        "--min-accuracy",
+        type=float,
+        default=0.95,
+        help="Suggest the lowest threshold whose accepted answers are at least this accurate",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import make_pipeline
+
+    from app.ai.precision import diagnosis_class, diagnosis_classes, sample_from_csv, sample_from_db
+
+    label_encoder = joblib.load(LABEL_ENCODERS[args.model])
+    classes = diagnosis_classes(label_encoder.classes_)
+
+    sample = (
+        sample_from_csv(args.data)[: args.sample]
+        if args.data
+        else sample_from_db(args.model, args.sample, args.seed)
+    )
+    matched = [(text, diagnosis_class(classes, label)) for text, label in sample]
+    pairs = [
+        (text, str(label_encoder.classes_[target]))
+        for text, target in matched
+        if target is not None
+    ]
+    if len(pairs) < 2:
+        raise SystemExit("No texts with diagnoses known to the model")
+
+    texts, labels = zip(*pairs)
+    train_texts, test_texts, train_labels, test_labels = train_test_split(
+        list(texts), list(labels), test_size=args.test_size, random_state=args.seed
+    )
+    pipeline = make_pipeline(
+        TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 5), sublinear_tf=True, min_df=2),
+        LogisticRegression(max_iter=1000),
+    )
+    started = time.perf_counter()
+    pipeline.fit(train_texts, train_labels)
+    logger.info("Trained on %d texts in %.1fs", len(train_texts), time.perf_counter() - started)
+
+    probabilities = pipeline.predict_proba(test_texts)
+    confidence = probabilities.max(axis=1)
+    correct = pipeline.classes_[probabilities.argmax(axis=1)] == np.array(test_labels)
+    print(f"{len(test_texts)} held-out texts, accuracy {correct.mean():.3f}")
+    suggested = None
+    for threshold in np.arange(0.5, 1.0, 0.05):
+        accepted = confidence >= threshold
+        accuracy = correct[accepted].mean() if accepted.any() else 0.0
+        print(f"threshold {threshold:.2f}: answers {accepted.mean():.1%}, accuracy {accuracy:.3f}")
+        if suggested is None and accepted.any() and accuracy >= args.min_accuracy:
+            suggested = threshold
+
+    os.makedirs(FAST_DIR, exist_ok=True)
+    joblib.dump(pipeline, fast_path(args.model))
+    print(f"Saved {fast_path(args.model)}")
+    if suggested is not None:
+        print(f"FAST_TIER_THRESHOLD={suggested:.2f}")
+
+
+if __name__ == "__main__":
+    main()
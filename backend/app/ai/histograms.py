@@ -0,0 +1,37 @@
+import bisect
+import threading
+
+HISTOGRAM_EDGES = (32, 64, 128, 256, 384, 512, 1024)
+
+
+class TokenLengthHistogram:
+    """
+    Распределение длин текстов в токенах до обрезки — по нему подбираются
+    максимальные длины и границы корзин.
+    """
+
+    def __init__(self, edges: tuple[int, ...] = HISTOGRAM_EDGES) -> None:
+        self.edges = edges
+        self.counts = [0] * (len(edges) + 1)
+        self.truncated = 0
+        self._lock = threading.Lock()
+
+    def record(self, lengths: list[int], max_length: int) -> None:
+        with self._lock:
+            for length in lengths:
+                self.counts[bisect.bisect_left(self.edges, length)] += 1
+                self.truncated += length > max_length
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            labels = [f"<={edge}" for edge in self.edges] + [f">{self.edges[-1]}"]
+            result = dict(zip(labels, self.counts))
+            result["truncated"] = self.truncated
+            return result
+
+
+histograms: dict[str, TokenLengthHistogram] = {}
+
+
+def get_histogram(name: str) -> TokenLengthHistogram:
+    return histograms.setdefault(name, TokenLengthHistogram())
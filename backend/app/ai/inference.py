@@ -0,0 +1,306 @@
+import functools
+import hashlib
+import importlib
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import Callable
+from typing import Any, Literal
+
+from app.ai.batching import MicroBatcher
+from app.ai.cache import get_cache
+from app.ai.fast import FastTier, TierStats, fast_path
+from app.ai.histograms import histograms
+from app.ai.registry import ModelStats, registry
+from app.ai.suggestions import Suggestion
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Модели импортируются при первом обращении, чтобы процессы API,
+# работающие через отдельный сервер инференса, не загружали torch
+MODELS: dict[str, str] = {
+    "bert": "app.ai.bert:get_bert_suggestions",
+    "ensemble": "app.ai.ensemble:get_ensemble_suggestions",
+    "student": "app.ai.student:get_student_suggestions",
+}
+
+ModelFn = Callable[[list[str]], list[list[Suggestion]]]
+
+# Что модель отдаёт в поле result, как её get_*_result: bert — метку
+# классификатора как есть, остальные — название диагноза по МКБ
+RESULT_FIELDS: dict[str, Literal["label", "title"]] = {
+    "bert": "label",
+    "ensemble": "title",
+    "student": "title",
+}
+
+# Эмбеддинги для поиска похожих случаев
+EMBEDDERS: dict[str, str] = {
+    "bert": "app.ai.bert:get_bert_embeddings",
+}
+
+AI_DIR = os.path.dirname(__file__)
+
+# Каталоги с весами; по ним считается версия модели для ключа кэша
+MODEL_PATHS: dict[str, list[str]] = {
+    "bert": [os.path.join(AI_DIR, "bert"), os.path.join(AI_DIR, "fast")],
+    "ensemble": [
+        os.path.join(AI_DIR, "fast"),
+        os.path.join(AI_DIR, "ensemble"),
+        os.path.join(AI_DIR, "RuBioRoBERTa"),
+        os.path.join(AI_DIR, "albert-base-v2"),
+    ],
+    "student": [os.path.join(AI_DIR, "student"), os.path.join(AI_DIR, "fast")],
+}
+
+_batchers: dict[str, MicroBatcher[str, list[Suggestion]]] = {}
+_tiers: dict[str, FastTier | None] = {}
+_lock = threading.Lock()
+
+
+def _import(path: str) -> Callable[..., Any]:
+    module_name, fn_name = path.split(":")
+    fn: Callable[..., Any] = getattr(importlib.import_module(module_name), fn_name)
+    return fn
+
+
+def _model_fn(model: str) -> ModelFn:
+    return _import(MODELS[model])
+
+
+def top_result(model: str, suggestions: list[Suggestion]) -> str:
+    return suggestions[0][RESULT_FIELDS[model]]
+
+
+@functools.cache
+def model_version(model: str) -> str:
+    """
+    Хэш настроек модели, имён, размеров и времени изменения файлов весов модели.
+    """
+    digest = hashlib.sha256(
+        f"{model}:{settings.MODEL_PRECISION}:{settings.INFERENCE_BACKEND}:"
+        f"{settings.TRUNCATION_STRATEGY}:{settings.BERT_MAX_LENGTH}:{settings.ENSEMBLE_MAX_LENGTH}:"
+        f"{settings.STUDENT_MAX_LENGTH}:{settings.INFERENCE_TOP_K}:{settings.BERT_TEMPERATURE}:"
+        f"{settings.ENSEMBLE_TEMPERATURE}:{settings.STUDENT_TEMPERATURE}:"
+        f"{settings.FAST_TIER_ENABLED}:{settings.FAST_TIER_THRESHOLD}".encode()
+    )
+    for path in MODEL_PATHS[model]:
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                stat = os.stat(os.path.join(root, name))
+                digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+def get_batcher(model: str) -> MicroBatcher[str, list[Suggestion]]:
+    batcher = _batchers.get(model)
+    if batcher is not None:
+        return batcher
+    with _lock:
+        if model not in _batchers:
+            _batchers[model] = MicroBatcher(
+                _model_fn(model),
+                max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+                max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+                name=model,
+            )
+        return _batchers[model]
+
+
+def get_tier(model: str) -> FastTier | None:
+    """
+    Быстрый ярус модели, если он включён и обучен (python -m app.ai.fast).
+    """
+    if not settings.FAST_TIER_ENABLED:
+        return None
+    if model in _tiers:
+        return _tiers[model]
+    with _lock:
+        if model not in _tiers:
+            tier = None
+            if os.path.exists(fast_path(model)):
+                tier = FastTier(
+                    model,
+                    threshold=settings.FAST_TIER_THRESHOLD,
+                    shadow_rate=settings.FAST_TIER_SHADOW_RATE,
+                )
+            else:
+                logger.warning("Fast tier for %s is not trained, using the transformer only", model)
+            _tiers[model] = tier
+        return _tiers[model]
+
+
+def preload(models: list[str]) -> None:
+    """
+    Фоновая загрузка моделей, чтобы первый запрос не ждал холодного старта.
+    """
+    for model in models:
+        if model not in MODELS:
+            raise ValueError(f"Модель '{model}' не поддерживается")
+        # Импорт модуля модели тоже занимает время, поэтому он идёт в фоне
+        threading.Thread(
+            target=_load, args=(model,), name=f"preload-{model}", daemon=True
+        ).start()
+
+
+def thread_budget() -> int | None:
+    """
+    Потоков torch на один прямой проход: TORCH_NUM_THREADS, а если он не задан
+    и ветки ансамбля считаются одновременно — половина ядер, чтобы две ветки
+    вместе занимали процессор, а не вдвое его перегружали.
+    """
+    if settings.TORCH_NUM_THREADS:
+        return settings.TORCH_NUM_THREADS
+    if settings.ENSEMBLE_PARALLEL:
+        return max(1, (os.cpu_count() or 2) // 2)
+    return None
+
+
+def set_thread_budget() -> None:
+    """
+    torch.set_num_threads действует на весь процесс, поэтому вызывается
+    один раз при старте процесса, в котором работают модели.
+    """
+    threads = thread_budget()
+    if threads:
+        import torch
+
+        torch.set_num_threads(threads)
+
+
+def _load(model: str) -> None:
+    get_batcher(model)
+    registry.get(model)
+
+
+def model_stats_local() -> list[ModelStats]:
+    stats = {item.name: item for item in registry.stats()}
+    result = []
+    for model in MODELS:
+        item = stats.get(model, ModelStats(name=model))
+        if model in histograms:
+            item.token_lengths = histograms[model].snapshot()
+        result.append(item)
+    return result
+
+
+def tier_stats_local() -> list[TierStats]:
+    return [tier.stats() for tier in _tiers.values() if tier is not None]
+
+
+def tier_stats() -> list[TierStats]:
+    if settings.INFERENCE_SOCKET_PATH:
+        from app.ai.client import get_client
+
+        result: list[TierStats] = get_client().call("tier_stats")
+        return result
+    return tier_stats_local()
+
+
+def model_stats() -> list[ModelStats]:
+    if settings.INFERENCE_SOCKET_PATH:
+        from app.ai.client import get_client
+
+        result: list[ModelStats] = get_client().call("stats")
+        return result
+    return model_stats_local()
+
+
+def predict_local(model: str, text: str) -> list[Suggestion]:
+    """
+    Предсказание в текущем процессе; одновременные запросы объединяются в пачки.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Модель '{model}' не поддерживается")
+    batcher = get_batcher(model)
+    tier = get_tier(model)
+    if tier is not None:
+        return tier.predict(text, batcher, shadow=batcher.submit)
+    return batcher(text)
+
+
+def predict_batch_local(
+    model: str, texts: list[str], batch_size: int
+) -> list[list[Suggestion]]:
+    """
+    Пакетное предсказание в обход планировщика: тексты уже собраны в пачки.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Модель '{model}' не поддерживается")
+    fn = _model_fn(model)
+    results: list[list[Suggestion]] = []
+    for start in range(0, len(texts), batch_size):
+        results.extend(fn(texts[start : start + batch_size]))
+    return results
+
+
+def predict_batch(
+    model: str, texts: list[str], batch_size: int
+) -> list[list[Suggestion]]:
+    if settings.INFERENCE_SOCKET_PATH:
+        from app.ai.client import get_client
+
+        # Пакетный пересчёт идёт в своём потоке, а не в пуле запросов,
+        # и порция может считаться дольше таймаута одного запроса
+        result: list[list[Suggestion]] = get_client().call(
+            "predict_batch", model, texts, batch_size, timeout=None
+        )
+        return result
+    return predict_batch_local(model, texts, batch_size)
+
+
+def predict(model: str, text: str, top_k: int = 1) -> list[Suggestion]:
+    """
+    Наиболее вероятные диагнозы: сначала из кэша, затем через сервер
+    инференса, если он настроен, иначе локально.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Модель '{model}' не поддерживается")
+
+    cache = get_cache()
+    key = cache.make_key(model, model_version(model), text) if cache else ""
+    if cache:
+        try:
+            cached: list[Suggestion] | None = cache.get(key)
+        except sqlite3.Error as e:
+            # Занятый другим воркером файл кэша не должен ронять запрос
+            logger.warning("Inference cache read failed: %s", e)
+            cached = None
+        if cached is not None:
+            return cached[:top_k]
+
+    if settings.INFERENCE_SOCKET_PATH:
+        from app.ai.client import get_client
+
+        result: list[Suggestion] = get_client().call("predict", model, text)
+    else:
+        result = predict_local(model, text)
+
+    if cache:
+        try:
+            cache.set(key, result)
+        except sqlite3.Error as e:
+            logger.warning("Inference cache write failed: %s", e)
+    return result[:top_k]
+
+
+def embed_local(model: str, texts: list[str]) -> list[list[float]]:
+    if model not in EMBEDDERS:
+        raise ValueError(f"Эмбеддинги модели '{model}' не поддерживаются")
+    embeddings: list[list[float]] = _import(EMBEDDERS[model])(texts)
+    return embeddings
+
+
+def embed(model: str, texts: list[str]) -> list[list[float]]:
+    """
+    Эмбеддинги текстов через сервер инференса, если он настроен, иначе локально.
+    """
+    if settings.INFERENCE_SOCKET_PATH:
+        from app.ai.client import get_client
+
+        result: list[list[float]] = get_client().call("embed", model, texts)
+        return result
+    return embed_local(model, texts)
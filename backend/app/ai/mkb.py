@@ -0,0 +1,278 @@
+import bisect
+import csv
+import os
+import re
+import threading
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from app.ai.artifacts import StringTable, open_table
+
+MKB_PATH = os.path.join(os.path.dirname(__file__), 'mkb.csv')
+
+_WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class MkbCode:
+    code: str
+    title: str
+
+
+def normalize_code(code: str) -> str:
+    # Знаки † (+) и * у кодов двойного кодирования не влияют на иерархию
+    return code.strip().upper().rstrip("+*")
+
+
+def read_mkb_csv(path: str = MKB_PATH) -> list[tuple[str, str]]:
+    """
+    Строки справочника «код$название». Строки с запятыми в названии
+    целиком взяты в кавычки, поэтому разделитель ищется и внутри них.
+    """
+    rows = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for row in csv.reader(file, delimiter='$'):
+            if len(row) == 1 and '$' in row[0]:
+                row = row[0].split('$', 1)
+            if len(row) == 2 and row[0].strip():
+                rows.append((row[0].strip(), row[1].strip()))
+    return rows
+
+
+class MkbIndex:
+    """
+    Отсортированный индекс МКБ-10: точный поиск, поиск по префиксу кода,
+    диапазоны вида A00-B99 с вложенностью и поиск по словам названия.
+
+    Все данные — столбцы строк, отсортированные по нормализованному коду:
+    списки при сборке из CSV или столбцы скомпилированной таблицы в mmap.
+    Родитель и дети хранятся как позиции строк.
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[str],
+        codes: Sequence[str],
+        titles: Sequence[str],
+        parents: Sequence[str],
+        children: Sequence[str],
+        words: Sequence[str],
+        word_positions: Sequence[str],
+    ) -> None:
+        self.keys = keys
+        self.codes = codes
+        self.titles = titles
+        self.parents = parents
+        self.children = children
+        self.words = words
+        self.word_positions = word_positions
+        self._roots: list[int] | None = None
+
+    @classmethod
+    def from_rows(cls, rows: list[tuple[str, str]]) -> "MkbIndex":
+        entries = sorted({normalize_code(code): (code, title) for code, title in rows}.items())
+        keys = [key for key, _ in entries]
+
+        # Диапазоны (начало, конец, позиция): по началу, при равном начале
+        # сначала более широкие, чтобы вложенные шли после охватывающих
+        ranges = [(*key.split('-', 1), i) for i, key in enumerate(keys) if '-' in key]
+        ranges.sort(key=lambda r: r[1], reverse=True)
+        ranges.sort(key=lambda r: r[0])
+
+        def find_parent(key: str) -> int | None:
+            if '.' in key:
+                i = bisect.bisect_left(keys, key.split('.')[0])
+                if i < len(keys) and keys[i] == key.split('.')[0]:
+                    return i
+            start, _, end = key.partition('-')
+            end = end or start
+            containing = [
+                i for low, high, i in ranges
+                if low <= start[:3] and end[:3] <= high and keys[i] != key
+            ]
+            return containing[-1] if containing else None
+
+        parents = [find_parent(key) for key in keys]
+        children: dict[int, list[int]] = {}
+        for i, parent in enumerate(parents):
+            if parent is not None:
+                children.setdefault(parent, []).append(i)
+
+        words = sorted(
+            {
+                (word, i)
+                for i, (_, (_, title)) in enumerate(entries)
+                for word in _WORD.findall(title.lower())
+            }
+        )
+        return cls(
+            keys=keys,
+            codes=[code for _, (code, _) in entries],
+            titles=[title for _, (_, title) in entries],
+            parents=['' if parent is None else str(parent) for parent in parents],
+            children=[' '.join(map(str, children.get(i, []))) for i in range(len(keys))],
+            words=[word for word, _ in words],
+            word_positions=[str(i) for _, i in words],
+        )
+
+    @classmethod
+    def from_tables(cls, codes: StringTable, words: StringTable) -> "MkbIndex":
+        return cls(
+            keys=codes.column(0),
+            codes=codes.column(1),
+            titles=codes.column(2),
+            parents=codes.column(3),
+            children=codes.column(4),
+            words=words.column(0),
+            word_positions=words.column(1),
+        )
+
+    def tables(self) -> dict[str, tuple[list[tuple[str, ...]], int]]:
+        """
+        Строки для компиляции: таблица кодов и таблица слов названий.
+        """
+        codes: list[tuple[str, ...]] = list(zip(self.keys, self.codes, self.titles, self.parents, self.children))
+        words: list[tuple[str, ...]] = list(zip(self.words, self.word_positions))
+        return {"mkb": (codes, 5), "mkb_words": (words, 2)}
+
+    def _parent(self, i: int) -> int | None:
+        parent = self.parents[i]
+        return int(parent) if parent else None
+
+    def _children(self, i: int | None) -> list[int]:
+        if i is None:
+            if self._roots is None:
+                self._roots = [j for j in range(len(self.keys)) if not self.parents[j]]
+            return self._roots
+        return [int(child) for child in self.children[i].split()]
+
+    def _position(self, code: str) -> int | None:
+        key = normalize_code(code)
+        i = bisect.bisect_left(self.keys, key)
+        return i if i < len(self.keys) and self.keys[i] == key else None
+
+    def _entry(self, i: int) -> MkbCode:
+        return MkbCode(code=self.codes[i], title=self.titles[i])
+
+    def get(self, code: str) -> MkbCode | None:
+        i = self._position(code)
+        return self._entry(i) if i is not None else None
+
+    def title(self, code: str, default: str | None = None) -> str | None:
+        i = self._position(code)
+        return self.titles[i] if i is not None else default
+
+    def prefix(self, prefix: str, limit: int = 20) -> list[MkbCode]:
+        key = normalize_code(prefix)
+        result = []
+        for i in range(bisect.bisect_left(self.keys, key), len(self.keys)):
+            if not self.keys[i].startswith(key) or len(result) >= limit:
+                break
+            result.append(self._entry(i))
+        return result
+
+    def containing(self, code: str) -> list[MkbCode]:
+        """
+        Диапазоны, в которые входит код, от широкого к узкому.
+        """
+        key = normalize_code(code)
+        i = self._position(key)
+        if i is None:
+            # Кода нет в справочнике — ищем диапазоны его рубрики
+            i = self._position(key[:3])
+        if i is None:
+            return []
+        return [entry for entry in self.path(self.keys[i]) if '-' in entry.code]
+
+    def path(self, code: str) -> list[MkbCode]:
+        """
+        Цепочка предков от корня до непосредственного родителя.
+        """
+        i = self._position(code)
+        chain = []
+        parent = self._parent(i) if i is not None else None
+        while parent is not None:
+            chain.append(self._entry(parent))
+            parent = self._parent(parent)
+        return chain[::-1]
+
+    def parent(self, code: str) -> MkbCode | None:
+        i = self._position(code)
+        parent = self._parent(i) if i is not None else None
+        return self._entry(parent) if parent is not None else None
+
+    def children_of(self, code: str | None) -> list[MkbCode]:
+        i = self._position(code) if code is not None else None
+        if code is not None and i is None:
+            return []
+        return [self._entry(child) for child in self._children(i)]
+
+    def search_titles(self, query: str, limit: int = 20) -> list[MkbCode]:
+        """
+        Коды, в названии которых есть слова, начинающиеся с каждого слова запроса.
+
+        Кандидаты берутся по самому редкому слову запроса (его диапазон
+        в таблице слов находится двумя bisect), остальные слова проверяются
+        по названиям кандидатов.
+        """
+        tokens = _WORD.findall(query.lower())
+        if not tokens:
+            return []
+        spans = {
+            token: (
+                bisect.bisect_left(self.words, token),
+                bisect.bisect_left(self.words, token + '\uffff'),
+            )
+            for token in tokens
+        }
+        rarest = min(tokens, key=lambda token: spans[token][1] - spans[token][0])
+        start, end = spans[rarest]
+        others = [token for token in tokens if token != rarest]
+
+        matches = []
+        for i in sorted({int(self.word_positions[j]) for j in range(start, end)}):
+            if others:
+                words = _WORD.findall(self.titles[i].lower())
+                if not all(any(w.startswith(t) for w in words) for t in others):
+                    continue
+            matches.append(self._entry(i))
+            if len(matches) >= limit:
+                break
+        return matches
+
+    def search(self, query: str, limit: int = 20) -> list[MkbCode]:
+        """
+        Подсказки для формы диагноза: сначала совпадения по коду, затем по названию.
+        """
+        query = query.strip()
+        result = self.prefix(query, limit) if re.match(r"^[A-Za-z]\d", query) else []
+        seen = {entry.code for entry in result}
+        for entry in self.search_titles(query, limit):
+            if len(result) >= limit:
+                break
+            if entry.code not in seen:
+                result.append(entry)
+        return result
+
+
+_index: MkbIndex | None = None
+_lock = threading.Lock()
+
+
+def get_index() -> MkbIndex:
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                codes = open_table("mkb", MKB_PATH)
+                words = open_table("mkb_words", MKB_PATH)
+                if codes is not None and words is not None:
+                    _index = MkbIndex.from_tables(codes, words)
+                else:
+                    _index = MkbIndex.from_rows(read_mkb_csv())
+    return _index
+
+
+def get_true_label(text: str) -> str:
+    title = get_index().title(text)
+    return title if title is not None else text
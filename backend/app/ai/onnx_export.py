@@ -0,0 +1,127 @@
+import argparse
+import logging
+import os
+
+import torch
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SAMPLE_TEXT = "мужчина, 40 лет, головная боль и повышенное давление в течение недели"
+
+
+def export(
+    module: torch.nn.Module,
+    inputs: dict[str, torch.Tensor],
+    path: str,
+    *,
+    quantize: bool = False,
+    opset: int = 14,
+) -> None:
+    """
+    Экспорт модели в ONNX с динамическими осями батча и длины
+    и оптимизацией графа средствами ONNX Runtime.
+    """
+    import onnxruntime as ort
+
+    module.eval()
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in inputs}
+    dynamic_axes["logits"] = {0: "batch"}
+    raw_path = path.replace(".onnx", ".raw.onnx")
+    with torch.no_grad():
+        # Словарь последним элементом args передаётся как именованные аргументы
+        torch.onnx.export(
+            module,
+            (inputs,),
+            raw_path,
+            input_names=list(inputs),
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+        )
+
+    # Расширенные оптимизации не привязаны к конкретному процессору,
+    # поэтому оптимизированный граф можно сохранять и переносить
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+    options.optimized_model_filepath = path
+    ort.InferenceSession(raw_path, options, providers=["CPUExecutionProvider"])
+    os.remove(raw_path)
+    logger.info("Exported %s", path)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = path.replace(".onnx", ".int8.onnx")
+        quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+        logger.info("Exported %s", quantized_path)
+
+
+def export_bert(quantize: bool) -> None:
+    from transformers import AutoTokenizer
+
+    from app.ai import bert
+
+    tokenizer = AutoTokenizer.from_pretrained(bert.bert_weights)
+    encoded = tokenizer([SAMPLE_TEXT, SAMPLE_TEXT[:20]], return_tensors="pt", padding=True)
+    inputs = {
+        "input_ids": encoded["input_ids"],
+        "attention_mask": encoded["attention_mask"],
+    }
+    export(bert.build_bert_module(), inputs, bert.bert_onnx, quantize=quantize)
+
+
+def export_student(quantize: bool) -> None:
+    from transformers import AutoTokenizer
+
+    from app.ai import student
+
+    tokenizer = AutoTokenizer.from_pretrained(student.student_weights)
+    encoded = tokenizer([SAMPLE_TEXT, SAMPLE_TEXT[:20]], return_tensors="pt", padding=True)
+    inputs = {
+        "input_ids": encoded["input_ids"],
+        "attention_mask": encoded["attention_mask"],
+    }
+    export(student.build_student_module(), inputs, student.student_onnx, quantize=quantize)
+
+
+def export_ensemble(quantize: bool) -> None:
+    from transformers import AlbertTokenizer, RobertaTokenizer
+
+    from app.ai import ensemble
+    from app.ai.backends import TorchBackend
+
+    module = ensemble.build_ensemble_module().cpu()
+    bundle = ensemble.EnsembleBundle(
+        tokenizer_1=RobertaTokenizer.from_pretrained(ensemble.model_name_1),
+        tokenizer_2=AlbertTokenizer.from_pretrained(ensemble.model_name_2),
+        backend=TorchBackend(module),
+        label_encoder=None,
+    )
+    inputs = ensemble.encode_ensemble_inputs([SAMPLE_TEXT, SAMPLE_TEXT[:20]], bundle)
+    export(module, inputs, ensemble.ensemble_onnx, quantize=quantize)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export the models to ONNX")
+    parser.add_argument(
+        "models",
+        nargs="*",
+        choices=["bert", "ensemble", "student"],
+        default=["bert", "ensemble"],
+    )
+    parser.add_argument(
+        "--int8", action="store_true", help="Also write a dynamically quantized copy"
+    )
+    args = parser.parse_args()
+
+    if "bert" in args.models:
+        export_bert(args.int8)
+    if "ensemble" in args.models:
+        export_ensemble(args.int8)
+    if "student" in args.models:
+        export_student(args.int8)
+
+
+if __name__ == "__main__":
+    main()
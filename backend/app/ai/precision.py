@@ -0,0 +1,226 @@
+import argparse
+import csv
+import logging
+import sys
+import time
+from collections.abc import Callable, Iterable
+from typing import Any
+
+import torch
+
+from app.ai.mkb import get_true_label
+
+logger = logging.getLogger(__name__)
+
+PRECISIONS = ("fp32", "int8", "bf16")
+
+
+def bf16_supported() -> bool:
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def apply_precision(model: torch.nn.Module, precision: str) -> torch.nn.Module:
+    """
+    Переводит модель в нужную точность при загрузке.
+
+    int8 — динамическая квантизация линейных слоёв (веса int8, активации
+    квантуются на лету), bf16 — только если процессор его поддерживает.
+    """
+    if precision == "int8":
+        return torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    if precision == "bf16":
+        if bf16_supported():
+            return model.to(torch.bfloat16)
+        logger.warning("bf16 is not supported on this CPU, keeping fp32")
+    elif precision != "fp32":
+        raise ValueError(f"Unknown precision '{precision}'")
+    return model
+
+
+def sample_from_csv(path: str) -> list[tuple[str, str]]:
+    with open(path, encoding="utf-8") as file:
+        return [
+            (row[0], row[1]) for row in csv.reader(file, delimiter="$") if len(row) == 2
+        ]
+
+
+def sample_from_db(
+    model: str, size: int, seed: int, *, labeled: bool = True
+) -> list[tuple[str, str]]:
+    """
+    Случайная выборка приёмов: текст для модели и диагноз врача. С
+    labeled=False берутся все приёмы с текстом, диагноз у части — пустой.
+    """
+    from sqlalchemy import String, cast, or_
+    from sqlmodel import Session, col, func, select
+
+    from app.ai.prompts import build_prompt
+    from app.core.db import engine
+    from app.models import Appointment, Patient
+
+    # Порядок по md5(id || seed) даёт воспроизводимую случайную выборку
+    statement = (
+        select(
+            Appointment.complaints,
+            Appointment.anamnesis,
+            Appointment.objective_status,
+            Appointment.doctor_diagnosis,
+            Patient.gender,
+            Patient.birth_date,
+        )
+        .join(Patient, col(Appointment.patient_id) == Patient.id, isouter=True)
+        .order_by(func.md5(func.concat(cast(Appointment.id, String), str(seed))))
+        .limit(size)
+    )
+    if labeled:
+        statement = statement.where(col(Appointment.doctor_diagnosis).is_not(None))
+    else:
+        statement = statement.where(
+            or_(
+                col(Appointment.complaints).is_not(None),
+                col(Appointment.anamnesis).is_not(None),
+                col(Appointment.objective_status).is_not(None),
+            )
+        )
+    with Session(engine) as session:
+        rows = session.exec(statement).all()
+    return [
+        (
+            build_prompt(
+                model,
+                complaints=row.complaints,
+                anamnesis=row.anamnesis,
+                objective_status=row.objective_status,
+                gender=row.gender,
+                birth_date=row.birth_date,
+            ),
+            row.doctor_diagnosis or "",
+        )
+        for row in rows
+    ]
+
+
+def _diagnosis_key(text: str) -> str:
+    return text.strip().lower()
+
+
+def diagnosis_classes(labels: Iterable[Any]) -> dict[str, int]:
+    """
+    Индексы классов модели по коду и по названию МКБ: по ним диагноз врача
+    из выборки сопоставляется с классом модели (см. diagnosis_class).
+    """
+    classes: dict[str, int] = {}
+    for index, label in enumerate(labels):
+        classes[_diagnosis_key(str(label))] = index
+        classes[_diagnosis_key(get_true_label(str(label)))] = index
+    return classes
+
+
+def diagnosis_class(classes: dict[str, int], diagnosis: str) -> int | None:
+    return classes.get(_diagnosis_key(diagnosis))
+
+
+def _predict(
+    fn: Callable[..., list[str]], bundle: Any, texts: list[str], batch_size: int
+) -> tuple[list[str], float]:
+    predictions: list[str] = []
+    started = time.perf_counter()
+    for start in range(0, len(texts), batch_size):
+        predictions.extend(fn(texts[start : start + batch_size], bundle=bundle))
+    return predictions, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compare a reduced-precision model against fp32 on a held-out sample"
+    )
+    parser.add_argument("--model", choices=["bert", "ensemble", "student"], default="bert")
+    parser.add_argument("--precision", choices=PRECISIONS[1:], default="int8")
+    parser.add_argument("--data", help="CSV with 'text$diagnosis' rows instead of the DB")
+    parser.add_argument("--sample", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument(
+        "--max-drop",
+        type=float,
+        default=0.02,
+        help="Fail when accuracy (or agreement, without labels) drops more than this",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from app.ai.registry import ModelRegistry
+
+    fn: Callable[..., list[str]]
+    loader: Callable[[str, str], Any]
+    if args.model == "bert":
+        from app.ai import bert
+
+        fn, loader = bert.get_bert_results, bert.load_bert
+    elif args.model == "student":
+        from app.ai import student
+
+        fn, loader = student.get_student_results, student.load_student
+    else:
+        from app.ai import ensemble
+
+        fn, loader = ensemble.get_ensemble_results, ensemble.load_ensemble
+
+    sample = (
+        sample_from_csv(args.data)[: args.sample]
+        if args.data
+        else sample_from_db(args.model, args.sample, args.seed)
+    )
+    if not sample:
+        raise SystemExit("Held-out sample is empty")
+    texts = [text for text, _ in sample]
+    labels = [label.strip().lower() for _, label in sample]
+
+    registry = ModelRegistry()
+    registry.register("fp32", lambda: loader("fp32", "torch"))
+    registry.register(args.precision, lambda: loader(args.precision, "torch"))
+
+    reference, reference_seconds = _predict(fn, registry.get("fp32"), texts, args.batch_size)
+    candidate, candidate_seconds = _predict(
+        fn, registry.get(args.precision), texts, args.batch_size
+    )
+    stats = {item.name: item for item in registry.stats()}
+
+    def accuracy(predictions: list[str]) -> float:
+        hits = sum(p.strip().lower() == label for p, label in zip(predictions, labels))
+        return hits / len(labels)
+
+    agreement = sum(a == b for a, b in zip(reference, candidate)) / len(texts)
+    reference_accuracy = accuracy(reference)
+    candidate_accuracy = accuracy(candidate)
+    drop = (
+        reference_accuracy - candidate_accuracy
+        if any(labels)
+        else 1.0 - agreement
+    )
+
+    print(f"model:          {args.model}, {len(texts)} texts")
+    for name, seconds, acc in (
+        ("fp32", reference_seconds, reference_accuracy),
+        (args.precision, candidate_seconds, candidate_accuracy),
+    ):
+        memory = (stats[name].memory_bytes or 0) / 2**20
+        print(
+            f"{name + ':':<15} accuracy {acc:.3f}, {seconds / len(texts) * 1000:.1f} ms/text, "
+            f"~{memory:.0f} MB"
+        )
+    print(f"agreement:      {agreement:.3f}")
+    print(f"speedup:        {reference_seconds / candidate_seconds:.2f}x")
+
+    if drop > args.max_drop:
+        print(f"FAIL: drop {drop:.3f} exceeds {args.max_drop:.3f}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+from datetime import date, datetime
+
+
+def calculate_age(birthdate: date | datetime) -> int:
+    """
+    Функция для вычисления возраста пациента по дате рождения.
+    """
+    today = datetime.today()
+    age = today.year - birthdate.year
+    if today.month < birthdate.month or (today.month == birthdate.month and today.day < birthdate.day):
+        age -= 1
+    return age
+
+
+def build_prompt(
+    model: str,
+    *,
+    complaints: str | None,
+    anamnesis: str | None,
+    objective_status: str | None,
+    gender: str | None = None,
+    birth_date: date | None = None,
+) -> str:
+    """
+    Текст, который подаётся на вход модели. Для bert к жалобам добавляются
+    пол и возраст пациента (по умолчанию — мужчина, 20 лет).
+    """
+    prompt = f"{complaints} {anamnesis} {objective_status}"
+    if model == "bert":
+        patient_age = calculate_age(birth_date) if birth_date else 20
+        patient_gender = "Мужчина" if (gender or "male") == "male" else "Женщина"
+        prompt = f"{patient_gender}, {patient_age} лет, {prompt}"
+    return prompt.lower().strip()
@@ -0,0 +1,145 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, select
+
+from app.ai.artifacts import file_sha256, open_table
+from app.core.config import settings
+from app.models import DataImport, Recommendations
+
+logger = logging.getLogger(__name__)
+
+GPT_PATH = os.path.join(os.path.dirname(__file__), 'gpt.csv')
+
+
+def read_gpt_csv(path: str = GPT_PATH) -> list[tuple[str, str]]:
+    """
+    Строки «диагноз$рекомендация»; переводы строк в рекомендации записаны как \\n.
+    """
+    rows = []
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if '$' in line:
+                label, data = line.split('$', 1)
+                rows.append((label.replace('"', ''), data.replace("\\n", "\n")))
+    return rows
+
+
+def read_gpt_rows() -> list[tuple[str, str]]:
+    """
+    Рекомендации из скомпилированной таблицы, если она актуальна, иначе из CSV.
+    """
+    table = open_table("gpt", GPT_PATH)
+    if table is None:
+        return read_gpt_csv()
+    try:
+        return [(table.field(i, 0), table.field(i, 1)) for i in range(len(table))]
+    finally:
+        table.close()
+
+
+def load_recommendations(session: Session, *, force: bool = False) -> int | None:
+    """
+    Загружает рекомендации из gpt.csv одной транзакцией.
+
+    Если хеш файла совпадает с последней загрузкой, ничего не делает и
+    возвращает None. Иначе вставляет все строки одним INSERT ... ON CONFLICT
+    по label, обновляя только изменившиеся рекомендации.
+    """
+    started = time.perf_counter()
+    digest = file_sha256(GPT_PATH).hex()
+    previous = session.get(DataImport, "gpt")
+    if previous is not None and previous.sha256 == digest and not force:
+        logger.info("Recommendations are up to date (%s)", digest[:12])
+        return None
+
+    # Одна строка INSERT не может обновить одну и ту же запись дважды,
+    # поэтому повторяющиеся диагнозы схлопываются: побеждает первый
+    data: dict[str, str] = {}
+    for label, text in read_gpt_rows():
+        data.setdefault(label, text)
+
+    if data:
+        statement = insert(Recommendations).values(
+            [{"id": uuid.uuid4(), "label": label, "data": text} for label, text in data.items()]
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[Recommendations.label],
+            set_={"data": statement.excluded.data},
+            where=Recommendations.data != statement.excluded.data,
+        )
+        session.execute(statement)
+
+    record = previous or DataImport(name="gpt", sha256=digest, rows=0)
+    record.sha256 = digest
+    record.rows = len(data)
+    record.loaded_at = datetime.now(timezone.utc)
+    session.add(record)
+    session.commit()
+    recommendations.invalidate()
+    logger.info(
+        "Loaded %d recommendations in %.2f s", len(data), time.perf_counter() - started
+    )
+    return len(data)
+
+
+class RecommendationStore:
+    """
+    Рекомендации по диагнозам в памяти процесса: загружаются из БД целиком,
+    после чего поиск по диагнозу — обращение к словарю.
+
+    Загрузка в этом процессе сбрасывает кеш сразу, а загрузки из других
+    процессов (init_db при деплое) замечаются по хешу последнего импорта,
+    который проверяется не чаще раза в `revalidate_seconds`.
+    """
+
+    def __init__(self, revalidate_seconds: float = 60) -> None:
+        self.revalidate_seconds = revalidate_seconds
+        self._data: dict[str, str] = {}
+        self._version: str | None = None
+        self._loaded = False
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, session: Session) -> None:
+        record = session.get(DataImport, "gpt")
+        rows = session.exec(select(Recommendations.label, Recommendations.data)).all()
+        with self._lock:
+            self._data = {label: data for label, data in rows}
+            self._version = record.sha256 if record else None
+            self._loaded = True
+            self._checked_at = time.monotonic()
+        logger.info("Loaded %d recommendations", len(self._data))
+
+    def invalidate(self) -> None:
+        self._loaded = False
+
+    @property
+    def stale(self) -> bool:
+        return (
+            not self._loaded
+            or time.monotonic() - self._checked_at > self.revalidate_seconds
+        )
+
+    def ensure_loaded(self, session: Session) -> None:
+        if not self._loaded:
+            self.load(session)
+        elif self.stale:
+            record = session.get(DataImport, "gpt")
+            self._checked_at = time.monotonic()
+            if (record.sha256 if record else None) != self._version:
+                self.load(session)
+
+    def get(self, label: str) -> str | None:
+        return self._data.get(label)
+
+
+recommendations = RecommendationStore(
+    revalidate_seconds=settings.RECOMMENDATIONS_REVALIDATE_SECONDS
+)
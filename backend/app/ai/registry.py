@@ -0,0 +1,132 @@
+import gc
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+@dataclass
+class ModelStats:
+    name: str
+    loaded: bool = False
+    loads: int = 0
+    load_seconds: float | None = None
+    memory_bytes: int | None = None
+    idle_seconds: float | None = None
+    token_lengths: dict[str, int] = field(default_factory=dict)
+
+
+class _Entry:
+    def __init__(self, name: str, loader: Callable[[], Any]) -> None:
+        self.loader = loader
+        self.lock = threading.Lock()
+        self.value: Any = None
+        self.last_used: float | None = None
+        self.stats = ModelStats(name=name)
+
+
+class ModelRegistry:
+    """
+    Реестр моделей: загрузка при первом обращении, фоновая предзагрузка
+    и выгрузка моделей, простаивающих дольше `idle_ttl` секунд.
+    """
+
+    def __init__(self, idle_ttl: float = 0) -> None:
+        self.idle_ttl = idle_ttl
+        self._entries: dict[str, _Entry] = {}
+        self._evictor: threading.Thread | None = None
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        self._entries[name] = _Entry(name, loader)
+
+    def get(self, name: str) -> Any:
+        entry = self._entries[name]
+        entry.last_used = time.monotonic()
+        if entry.value is not None:
+            return entry.value
+        with entry.lock:
+            if entry.value is None:
+                logger.info("Loading model %s", name)
+                rss_before = _rss_bytes()
+                started = time.perf_counter()
+                entry.value = entry.loader()
+                entry.stats.load_seconds = time.perf_counter() - started
+                entry.stats.memory_bytes = max(0, _rss_bytes() - rss_before)
+                entry.stats.loads += 1
+                entry.stats.loaded = True
+                logger.info(
+                    "Model %s loaded in %.1fs", name, entry.stats.load_seconds
+                )
+                self._ensure_evictor()
+            return entry.value
+
+    def preload(self, name: str) -> threading.Thread:
+        thread = threading.Thread(
+            target=self.get, args=(name,), name=f"preload-{name}", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def unload(self, name: str) -> None:
+        entry = self._entries[name]
+        with entry.lock:
+            if entry.value is None:
+                return
+            entry.value = None
+            entry.stats.loaded = False
+        gc.collect()
+        logger.info("Model %s unloaded", name)
+
+    def evict_idle(self) -> list[str]:
+        if self.idle_ttl <= 0:
+            return []
+        now = time.monotonic()
+        evicted = []
+        for name, entry in self._entries.items():
+            last_used = entry.last_used
+            if entry.value is not None and last_used and now - last_used > self.idle_ttl:
+                self.unload(name)
+                evicted.append(name)
+        return evicted
+
+    def stats(self) -> list[ModelStats]:
+        now = time.monotonic()
+        return [
+            replace(
+                entry.stats,
+                idle_seconds=now - entry.last_used if entry.last_used else None,
+            )
+            for entry in self._entries.values()
+        ]
+
+    def _ensure_evictor(self) -> None:
+        if self.idle_ttl <= 0 or self._evictor is not None:
+            return
+        self._evictor = threading.Thread(
+            target=self._evict_loop, name="model-evictor", daemon=True
+        )
+        self._evictor.start()
+
+    def _evict_loop(self) -> None:
+        interval = min(60.0, max(1.0, self.idle_ttl / 2))
+        while True:
+            time.sleep(interval)
+            self.evict_idle()
+
+
+registry = ModelRegistry(idle_ttl=settings.MODEL_IDLE_TTL_SECONDS)
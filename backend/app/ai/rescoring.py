@@ -0,0 +1,213 @@
+import logging
+import threading
+import time
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import func, update
+from sqlmodel import Session, col, select
+
+from app.ai import inference
+from app.ai.prompts import build_prompt
+from app.models import Appointment, Patient, RescoreJob
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock Postgres: во всех процессах API пересчёт идёт по одному
+RESCORE_LOCK_KEY = 0x7265_7363_6F72
+
+
+@dataclass
+class RescoreStats:
+    rows: int = 0
+    seconds: float = 0.0
+    rows_per_second: float = 0.0
+
+
+def _update_rate(stats: RescoreStats, started: float) -> None:
+    stats.seconds = time.perf_counter() - started
+    stats.rows_per_second = stats.rows / stats.seconds if stats.seconds else 0.0
+
+
+def rescore_appointments(
+    session: Session,
+    model: str,
+    *,
+    only_missing: bool = False,
+    limit: int | None = None,
+    chunk_size: int = 1000,
+    batch_size: int = 32,
+    stats: RescoreStats | None = None,
+    on_progress: Callable[[RescoreStats], None] | None = None,
+) -> RescoreStats:
+    """
+    Пересчитывает nlp_diagnosis для сохранённых приёмов.
+
+    Приёмы читаются порциями по `chunk_size` с пагинацией по id, прогоняются
+    через модель пачками по `batch_size`, а результаты записываются одним
+    массовым UPDATE на порцию. Счётчики пишутся в `stats` и передаются
+    в `on_progress` после каждой порции.
+    """
+    stats = stats if stats is not None else RescoreStats()
+    started = time.perf_counter()
+    last_id: uuid.UUID | None = None
+
+    while limit is None or stats.rows < limit:
+        size = chunk_size if limit is None else min(chunk_size, limit - stats.rows)
+        statement = (
+            select(
+                Appointment.id,
+                Appointment.complaints,
+                Appointment.anamnesis,
+                Appointment.objective_status,
+                Patient.gender,
+                Patient.birth_date,
+            )
+            .join(Patient, col(Appointment.patient_id) == Patient.id, isouter=True)
+            .order_by(col(Appointment.id))
+            .limit(size)
+        )
+        if last_id is not None:
+            statement = statement.where(col(Appointment.id) > last_id)
+        if only_missing:
+            statement = statement.where(col(Appointment.nlp_diagnosis).is_(None))
+
+        rows = session.exec(statement).all()
+        if not rows:
+            break
+
+        prompts = [
+            build_prompt(
+                model,
+                complaints=row.complaints,
+                anamnesis=row.anamnesis,
+                objective_status=row.objective_status,
+                gender=row.gender,
+                birth_date=row.birth_date,
+            )
+            for row in rows
+        ]
+        suggestions = inference.predict_batch(model, prompts, batch_size)
+        session.execute(
+            update(Appointment),
+            [
+                {"id": row.id, "nlp_diagnosis": inference.top_result(model, top)}
+                for row, top in zip(rows, suggestions)
+            ],
+        )
+        session.commit()
+
+        last_id = rows[-1].id
+        stats.rows += len(rows)
+        _update_rate(stats, started)
+        logger.info(
+            "Rescored %d appointments with %s (%.1f rows/s)",
+            stats.rows,
+            model,
+            stats.rows_per_second,
+        )
+        if on_progress is not None:
+            on_progress(stats)
+
+    _update_rate(stats, started)
+    return stats
+
+
+_pool: ThreadPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadPoolExecutor:
+    # Свой поток, чтобы долгий пересчёт не занимал пул запросов
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rescore")
+        return _pool
+
+
+def _finish(session: Session, job: RescoreJob, status: str, error: str | None = None) -> None:
+    job.status = status
+    job.error = error
+    job.finished_at = datetime.now(timezone.utc)
+    session.add(job)
+    session.commit()
+
+
+def _run_job(job_id: uuid.UUID, **kwargs: Any) -> None:
+    from app.core.db import engine
+
+    with engine.connect() as lock_conn, Session(engine) as session:
+        # Ждёт, пока закончится пересчёт, начатый этим или другим процессом API
+        lock_conn.execute(select(func.pg_advisory_lock(RESCORE_LOCK_KEY)))
+        # Замок уровня сессии переживает commit, а транзакция не висит весь пересчёт
+        lock_conn.commit()
+        try:
+            job = session.get(RescoreJob, job_id)
+            if job is None:
+                return
+            # Под замком других пересчётов нет: «running» остались от упавших процессов
+            session.execute(
+                update(RescoreJob)
+                .where(col(RescoreJob.status) == "running")
+                .values(
+                    status="failed",
+                    error="Процесс пересчёта был прерван",
+                    finished_at=datetime.now(timezone.utc),
+                )
+            )
+            job.status = "running"
+            session.add(job)
+            session.commit()
+
+            def save_progress(stats: RescoreStats) -> None:
+                with engine.begin() as conn:
+                    conn.execute(
+                        update(RescoreJob)
+                        .where(col(RescoreJob.id) == job_id)
+                        .values(
+                            rows=stats.rows,
+                            seconds=stats.seconds,
+                            rows_per_second=stats.rows_per_second,
+                        )
+                    )
+
+            try:
+                stats = rescore_appointments(
+                    session, job.model, on_progress=save_progress, **kwargs
+                )
+            except Exception as e:
+                logger.exception("Rescore job %s failed", job_id)
+                session.rollback()
+                session.refresh(job)
+                _finish(session, job, "failed", str(e))
+                return
+            session.refresh(job)
+            job.rows, job.seconds, job.rows_per_second = (
+                stats.rows,
+                stats.seconds,
+                stats.rows_per_second,
+            )
+            _finish(session, job, "done")
+        finally:
+            lock_conn.execute(select(func.pg_advisory_unlock(RESCORE_LOCK_KEY)))
+            lock_conn.commit()
+
+
+def start_rescore(session: Session, model: str, **kwargs: Any) -> RescoreJob:
+    """
+    Записывает задачу пересчёта в БД и ставит её в очередь фонового потока.
+
+    Состояние задачи видно из любого процесса API, а advisory lock не даёт
+    двум процессам пересчитывать одни и те же приёмы одновременно.
+    """
+    job = RescoreJob(model=model)
+    session.add(job)
+    session.commit()
+    session.refresh(job)
+    _get_pool().submit(_run_job, job.id, **kwargs)
+    return job
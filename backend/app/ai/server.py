@@ -0,0 +1,72 @@
+import logging
+import os
+import threading
+from collections.abc import Callable
+from multiprocessing.connection import Connection, Listener
+from typing import Any
+
+from app.ai import inference, similarity
+from app.core.config import settings
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+OPERATIONS: dict[str, Callable[..., Any]] = {
+    "predict": inference.predict_local,
+    "predict_batch": inference.predict_batch_local,
+    "stats": inference.model_stats_local,
+    "tier_stats": inference.tier_stats_local,
+    "embed": inference.embed_local,
+    "similar": similarity.similar_local,
+}
+
+
+def handle(conn: Connection) -> None:
+    with conn:
+        while True:
+            try:
+                op, args = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                result = OPERATIONS[op](*args)
+            except Exception as e:
+                if not isinstance(e, ValueError):
+                    logger.exception("Inference request %s failed", op)
+                response: tuple[str, Any] = ("error", (type(e).__name__, str(e)))
+            else:
+                response = ("ok", result)
+            try:
+                conn.send(response)
+            except OSError:
+                # Клиент не дождался ответа и закрыл соединение
+                return
+
+
+def serve(address: str) -> None:
+    if os.path.exists(address):
+        os.unlink(address)
+    os.makedirs(os.path.dirname(address) or ".", exist_ok=True)
+
+    with Listener(address, family="AF_UNIX", authkey=settings.SECRET_KEY.encode()) as listener:
+        logger.info("Inference server listening on %s", address)
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # Неверный ключ или оборванное рукопожатие не должны ронять сервер
+                logger.warning("Rejected connection: %s", e)
+                continue
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+def main() -> None:
+    if not settings.INFERENCE_SOCKET_PATH:
+        raise SystemExit("INFERENCE_SOCKET_PATH is not set")
+    inference.set_thread_budget()
+    inference.preload(settings.MODEL_PRELOAD)
+    serve(settings.INFERENCE_SOCKET_PATH)
+
+
+if __name__ == "__main__":
+    main()
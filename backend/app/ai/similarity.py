@@ -0,0 +1,427 @@
+import argparse
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable, Sequence
+from datetime import datetime, timezone
+from typing import Any
+
+import numpy as np
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col, select
+
+from app.ai import inference
+from app.core.config import settings
+from app.models import Appointment, AppointmentEmbedding
+
+logger = logging.getLogger(__name__)
+
+SAVE_INTERVAL_SECONDS = 60
+
+
+def hnswlib_available() -> bool:
+    try:
+        import hnswlib  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class SimilarityIndex:
+    """
+    Индекс эмбеддингов приёмов для поиска похожих случаев по косинусной близости.
+
+    Если установлен hnswlib, векторы хранятся только в графе HNSW (.hnsw) и
+    поиск идёт по нему; иначе — в матрице numpy (.npz) с точным перебором,
+    которого хватает на сотни тысяч приёмов. Индекс догоняет таблицу
+    appointmentembedding по номеру транзакции записи (xact_id). Держит его
+    один процесс — сервер инференса, если он настроен; воркеры API
+    обращаются к нему через similar().
+    """
+
+    def __init__(
+        self,
+        path: str | None = None,
+        *,
+        m: int = 16,
+        ef: int = 64,
+        use_hnsw: bool | None = None,
+    ) -> None:
+        self.path = path
+        self.m = m
+        self.ef = ef
+        self.use_hnsw = hnswlib_available() if use_hnsw is None else use_hnsw
+        self.ids: list[uuid.UUID] = []
+        self.rows: dict[uuid.UUID, int] = {}
+        # Все транзакции с меньшим номером уже прочитаны
+        self.synced_xid: int | None = None
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._hnsw: Any = None
+        self._saved_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[: len(self.ids)]
+
+    @property
+    def dim(self) -> int:
+        return int(self._hnsw.dim) if self._hnsw is not None else self._vectors.shape[1]
+
+    def _reserve(self, size: int, dim: int) -> None:
+        if self.ids and self.dim != dim:
+            raise ValueError(f"Expected {self.dim}-dim vectors, got {dim}")
+        if self.use_hnsw:
+            import hnswlib
+
+            if self._hnsw is None or self._hnsw.dim != dim:
+                self._hnsw = hnswlib.Index(space="ip", dim=dim)
+                self._hnsw.init_index(max_elements=max(size, 1024), ef_construction=200, M=self.m)
+                self._hnsw.set_ef(self.ef)
+            elif size > self._hnsw.get_max_elements():
+                self._hnsw.resize_index(max(size, 2 * self._hnsw.get_max_elements()))
+            return
+        if self._vectors.shape[1] != dim:
+            self._vectors = np.zeros((0, dim), dtype=np.float32)
+        if size > len(self._vectors):
+            capacity = max(size, 2 * len(self._vectors), 1024)
+            grown = np.zeros((capacity, dim), dtype=np.float32)
+            grown[: len(self.ids)] = self.vectors
+            self._vectors = grown
+
+    def add(self, ids: Sequence[uuid.UUID], vectors: np.ndarray) -> None:
+        """
+        Добавляет векторы; вектор уже известного приёма заменяется.
+        """
+        if not len(ids):
+            return
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            new = [id_ for id_ in dict.fromkeys(ids) if id_ not in self.rows]
+            self._reserve(len(self.ids) + len(new), vectors.shape[1])
+            for id_ in new:
+                self.rows[id_] = len(self.ids)
+                self.ids.append(id_)
+            labels = np.array([self.rows[id_] for id_ in ids])
+            if self._hnsw is not None:
+                self._hnsw.add_items(vectors, labels)
+            else:
+                self._vectors[labels] = vectors
+
+    def vector(self, id_: uuid.UUID) -> np.ndarray | None:
+        row = self.rows.get(id_)
+        if row is None:
+            return None
+        if self._hnsw is not None:
+            with self._lock:
+                return np.asarray(self._hnsw.get_items([row])[0], dtype=np.float32)
+        return self._vectors[row]
+
+    def query(
+        self, vector: np.ndarray, k: int, exclude: uuid.UUID | None = None
+    ) -> list[tuple[uuid.UUID, float]]:
+        """
+        k ближайших приёмов и их косинусная близость, без `exclude`.
+        """
+        with self._lock:
+            size = len(self.ids)
+            if not size:
+                return []
+            wanted = min(k + (exclude is not None), size)
+            if self._hnsw is not None:
+                labels, distances = self._hnsw.knn_query(vector, k=wanted)
+                # Для пространства "ip" расстояние равно 1 - скалярное произведение
+                hits = zip(labels[0].tolist(), (1 - distances[0]).tolist())
+            else:
+                scores = self.vectors @ np.asarray(vector, dtype=np.float32)
+                top = np.argpartition(-scores, wanted - 1)[:wanted]
+                top = top[np.argsort(-scores[top])]
+                hits = zip(top.tolist(), scores[top].tolist())
+            result = [(self.ids[label], float(score)) for label, score in hits]
+        return [(id_, score) for id_, score in result if id_ != exclude][:k]
+
+    def sync(self, session: Session, model: str | None = None) -> int:
+        """
+        Подгружает векторы, записанные или изменённые с прошлой синхронизации.
+
+        Метка — самая старая транзакция, ещё не завершённая к началу чтения:
+        всё, что записано до неё, уже видно, а строки более поздних транзакций
+        перечитываются в следующий раз, даже если те закоммитились с опозданием.
+        """
+        horizon = session.execute(
+            text("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+        ).scalar_one()
+        statement = select(AppointmentEmbedding).where(
+            AppointmentEmbedding.model == (model or settings.SIMILARITY_MODEL)
+        )
+        if self.synced_xid is not None:
+            # Повторно прочитанная строка просто заменит свой вектор
+            statement = statement.where(AppointmentEmbedding.xact_id >= self.synced_xid)
+        rows = session.exec(statement.order_by(col(AppointmentEmbedding.xact_id))).all()
+        if rows:
+            self.add(
+                [row.appointment_id for row in rows],
+                np.stack([np.frombuffer(row.vector, dtype=np.float32) for row in rows]),
+            )
+        self.synced_xid = horizon
+        if rows and self.path and time.monotonic() - self._saved_at > SAVE_INTERVAL_SECONDS:
+            self.save()
+        return len(rows)
+
+    def save(self, path: str | None = None) -> None:
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            tmp = f"{path}.{os.getpid()}.tmp"
+            if self._hnsw is not None:
+                self._hnsw.save_index(tmp)
+                os.replace(tmp, f"{path}.hnsw")
+            with open(tmp, "wb") as file:
+                np.savez(
+                    file,
+                    ids=np.array([id_.bytes for id_ in self.ids], dtype="S16"),
+                    dim=np.array(self.dim),
+                    # Рядом с графом HNSW векторы не дублируются
+                    vectors=self.vectors if self._hnsw is None else np.zeros((0, 0)),
+                    synced_xid=np.array(-1 if self.synced_xid is None else self.synced_xid),
+                )
+            os.replace(tmp, f"{path}.npz")
+            self._saved_at = time.monotonic()
+
+    @classmethod
+    def load(cls, path: str, **kwargs: Any) -> "SimilarityIndex":
+        """
+        Индекс с диска; если файлы от другой версии или другого режима,
+        возвращается пустой индекс, и sync() строит его из базы заново.
+        """
+        index = cls(path, **kwargs)
+        if not os.path.exists(f"{path}.npz"):
+            return index
+        with np.load(f"{path}.npz") as data:
+            if "synced_xid" not in data:
+                return index
+            ids = [uuid.UUID(bytes=raw) for raw in data["ids"].tolist()]
+            dim = int(data["dim"])
+            vectors = data["vectors"]
+            synced_xid = int(data["synced_xid"])
+        if not ids:
+            return index
+
+        if index.use_hnsw:
+            graph = f"{path}.hnsw"
+            if not os.path.exists(graph):
+                return index
+            import hnswlib
+
+            hnsw = hnswlib.Index(space="ip", dim=dim)
+            hnsw.load_index(graph, max_elements=len(ids))
+            if hnsw.get_current_count() != len(ids):
+                # Граф от другой версии векторов
+                return index
+            hnsw.set_ef(index.ef)
+            index._hnsw = hnsw
+            index.ids = ids
+            index.rows = {id_: row for row, id_ in enumerate(ids)}
+        elif vectors.shape == (len(ids), dim):
+            index.add(ids, vectors)
+        else:
+            return index
+        index.synced_xid = synced_xid if synced_xid >= 0 else None
+        return index
+
+
+_index: SimilarityIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_index() -> SimilarityIndex:
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SimilarityIndex.load(
+                    settings.SIMILARITY_INDEX_PATH,
+                    m=settings.SIMILARITY_HNSW_M,
+                    ef=settings.SIMILARITY_HNSW_EF,
+                )
+    return _index
+
+
+def appointment_text(appointment: Appointment) -> str:
+    """
+    Клиническая картина приёма без диагноза: по ней и ищутся похожие случаи.
+    """
+    parts = [appointment.complaints, appointment.anamnesis, appointment.objective_status]
+    return " ".join(part.strip() for part in parts if part and part.strip()).lower()
+
+
+def embed_appointments(
+    session: Session,
+    appointments: Sequence[Appointment],
+    embed: Callable[[str, list[str]], list[list[float]]] | None = None,
+) -> int:
+    """
+    Считает и сохраняет эмбеддинги приёмов; приёмы без текста пропускаются.
+
+    xact_id каждой записи — номер её транзакции, по нему индекс догоняет таблицу.
+    """
+    pending = [(a, appointment_text(a)) for a in appointments]
+    pending = [(a, text) for a, text in pending if text]
+    if not pending:
+        return 0
+    model = settings.SIMILARITY_MODEL
+    vectors = (embed or inference.embed)(model, [text for _, text in pending])
+    now = datetime.now(timezone.utc)
+    statement = insert(AppointmentEmbedding).values(
+        [
+            {
+                "appointment_id": appointment.id,
+                "model": model,
+                "vector": np.asarray(vector, dtype=np.float32).tobytes(),
+                "updated_at": now,
+            }
+            for (appointment, _), vector in zip(pending, vectors)
+        ]
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[AppointmentEmbedding.appointment_id],
+        set_={
+            "model": statement.excluded.model,
+            "vector": statement.excluded.vector,
+            "updated_at": statement.excluded.updated_at,
+            "xact_id": func.txid_current(),
+        },
+    )
+    session.execute(statement)
+    session.commit()
+    return len(pending)
+
+
+def store_embedding(appointment_id: uuid.UUID) -> None:
+    """
+    Фоновая задача после создания или изменения приёма.
+    """
+    from app.core.db import engine
+
+    with Session(engine) as session:
+        appointment = session.get(Appointment, appointment_id)
+        if appointment is None:
+            return
+        try:
+            embed_appointments(session, [appointment])
+        except Exception:
+            logger.exception("Failed to embed appointment %s", appointment_id)
+
+
+def similar_local(appointment_id: uuid.UUID, limit: int) -> list[tuple[uuid.UUID, float]]:
+    from app.core.db import engine
+
+    index = get_index()
+    with Session(engine) as session:
+        index.sync(session)
+        vector = index.vector(appointment_id)
+        if vector is None:
+            # Эмбеддинг ещё не посчитан фоновой задачей
+            appointment = session.get(Appointment, appointment_id)
+            if appointment is None or not embed_appointments(
+                session, [appointment], inference.embed_local
+            ):
+                return []
+            index.sync(session)
+            vector = index.vector(appointment_id)
+            if vector is None:
+                return []
+    return index.query(vector, limit, exclude=appointment_id)
+
+
+def similar(appointment_id: uuid.UUID, limit: int) -> list[tuple[uuid.UUID, float]]:
+    """
+    Id похожих приёмов и их близость. Индекс держит сервер инференса, если он
+    настроен, чтобы воркеры API не хранили каждый свою копию.
+    """
+    if settings.INFERENCE_SOCKET_PATH:
+        from app.ai.client import get_client
+
+        result: list[tuple[uuid.UUID, float]] = get_client().call(
+            "similar", appointment_id, limit
+        )
+        return result
+    return similar_local(appointment_id, limit)
+
+
+def find_similar(
+    session: Session, appointment: Appointment, limit: int
+) -> list[tuple[Appointment, float]]:
+    """
+    Похожие приёмы, ближайшие первыми. ValueError, если модель эмбеддингов
+    недоступна (например, при INFERENCE_BACKEND=onnx).
+    """
+    hits = similar(appointment.id, limit)
+    if not hits:
+        return []
+    found = {
+        row.id: row
+        for row in session.exec(
+            select(Appointment).where(col(Appointment.id).in_([id_ for id_, _ in hits]))
+        ).all()
+    }
+    # Удалённые приёмы остаются в индексе до перестроения; они просто пропускаются
+    return [(found[id_], score) for id_, score in hits if id_ in found]
+
+
+def backfill(session: Session, chunk_size: int = 256) -> int:
+    """
+    Эмбеддинги для приёмов, у которых их ещё нет, пачками по id.
+    """
+    total = 0
+    last_id: uuid.UUID | None = None
+    while True:
+        statement = (
+            select(Appointment)
+            .join(
+                AppointmentEmbedding,
+                col(AppointmentEmbedding.appointment_id) == Appointment.id,
+                isouter=True,
+            )
+            .where(col(AppointmentEmbedding.appointment_id).is_(None))
+            .order_by(col(Appointment.id))
+            .limit(chunk_size)
+        )
+        if last_id is not None:
+            statement = statement.where(col(Appointment.id) > last_id)
+        chunk = session.exec(statement).all()
+        if not chunk:
+            return total
+        last_id = chunk[-1].id
+        total += embed_appointments(session, chunk)
+        logger.info("Embedded %d appointments", total)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Embed appointments for similar-case search")
+    parser.add_argument("--chunk-size", type=int, default=256)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from app.core.db import engine
+
+    with Session(engine) as session:
+        backfill(session, args.chunk_size)
+        if settings.INFERENCE_SOCKET_PATH:
+            # Индекс держит сервер инференса и догонит таблицу при следующем запросе
+            return
+        index = get_index()
+        index.sync(session)
+        index.save()
+    logger.info("Similarity index has %d vectors", len(index))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+import os
+from dataclasses import dataclass
+from typing import Any
+
+import joblib
+import torch
+from transformers import (
+    AutoTokenizer,
+    PreTrainedTokenizerBase,
+    RobertaForSequenceClassification,
+)
+
+from app.ai.backends import Backend, LogitsOnly, load_backend
+from app.ai.mkb import get_true_label
+from app.ai.registry import registry
+from app.ai.suggestions import Suggestion, top_k_suggestions
+from app.ai.tokenization import encode_ids, pad, run_bucketed
+from app.core.config import settings
+
+# Малая модель, дистиллированная из ансамбля (python -m app.ai.distill)
+student_weights = os.path.join(os.path.dirname(__file__), 'student')
+student_onnx = os.path.join(student_weights, 'model.onnx')
+
+
+@dataclass
+class StudentBundle:
+    tokenizer: PreTrainedTokenizerBase
+    backend: Backend
+    label_encoder: Any
+
+
+def build_student_module() -> torch.nn.Module:
+    return LogitsOnly(RobertaForSequenceClassification.from_pretrained(student_weights))
+
+
+def load_student(precision: str | None = None, backend: str | None = None) -> StudentBundle:
+    return StudentBundle(
+        tokenizer=AutoTokenizer.from_pretrained(student_weights),
+        backend=load_backend(build_student_module, student_onnx, backend=backend, precision=precision),
+        label_encoder=joblib.load(os.path.join(student_weights, 'label_encoder.pkl')),
+    )
+
+
+registry.register("student", load_student)
+
+
+def get_student_logits(texts: list[str], bundle: StudentBundle | None = None) -> torch.Tensor:
+    bundle = bundle or registry.get("student")
+    max_length = settings.STUDENT_MAX_LENGTH
+    ids = encode_ids(bundle.tokenizer, texts, max_length, histogram="student")
+
+    def run(indices: list[int], length: int) -> torch.Tensor:
+        input_ids, attention_mask = pad([ids[i] for i in indices], bundle.tokenizer.pad_token_id, length)
+        return bundle.backend({"input_ids": input_ids, "attention_mask": attention_mask})
+
+    return run_bucketed(run, [len(x) for x in ids], max_length)
+
+
+def get_student_results(texts: list[str], bundle: StudentBundle | None = None) -> list[str]:
+    """
+    Классификация пачки текстов за один прямой проход малой модели.
+    """
+    bundle = bundle or registry.get("student")
+    logits = get_student_logits(texts, bundle)
+    predicted_classes = bundle.label_encoder.inverse_transform(torch.argmax(logits, dim=1).tolist())
+    return [get_true_label(label) for label in predicted_classes]
+
+
+def get_student_suggestions(texts: list[str], bundle: StudentBundle | None = None) -> list[list[Suggestion]]:
+    """
+    INFERENCE_TOP_K вероятных диагнозов для каждого текста за один прямой проход.
+    """
+    bundle = bundle or registry.get("student")
+    logits = get_student_logits(texts, bundle)
+    return top_k_suggestions(
+        logits,
+        bundle.label_encoder,
+        get_true_label,
+        settings.INFERENCE_TOP_K,
+        settings.STUDENT_TEMPERATURE,
+    )
@@ -0,0 +1,38 @@
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any, TypedDict
+
+if TYPE_CHECKING:
+    import torch
+
+
+class Suggestion(TypedDict):
+    label: str
+    title: str
+    probability: float
+
+
+def top_k_suggestions(
+    logits: "torch.Tensor",
+    label_encoder: Any,
+    title: Callable[[str], str],
+    k: int,
+    temperature: float = 1.0,
+) -> list[list[Suggestion]]:
+    """
+    k наиболее вероятных диагнозов для каждого текста пачки.
+
+    Вероятности — softmax логитов, делённых на температуру, подобранную
+    на отложенной выборке (python -m app.ai.calibration).
+    """
+    probabilities = (logits.float() / temperature).softmax(dim=1)
+    values, indices = probabilities.topk(min(k, probabilities.shape[1]), dim=1)
+    result = []
+    for row_values, row_indices in zip(values.tolist(), indices.tolist()):
+        labels = label_encoder.inverse_transform(row_indices)
+        result.append(
+            [
+                Suggestion(label=str(label), title=title(str(label)), probability=p)
+                for label, p in zip(labels, row_values)
+            ]
+        )
+    return result
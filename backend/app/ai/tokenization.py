@@ -0,0 +1,78 @@
+import bisect
+from collections.abc import Callable
+
+import torch
+from transformers import PreTrainedTokenizerBase
+
+from app.ai.histograms import get_histogram
+from app.core.config import settings
+
+
+def encode_ids(
+    tokenizer: PreTrainedTokenizerBase,
+    texts: list[str],
+    max_length: int,
+    *,
+    histogram: str | None = None,
+) -> list[list[int]]:
+    """
+    Токенизация без паддинга с обрезкой до `max_length` токенов.
+
+    Стратегия head оставляет начало текста; head_tail оставляет
+    TRUNCATION_HEAD_TOKENS токенов начала и конец, где в длинных
+    записях обычно находятся объективный статус и итог осмотра.
+    """
+    special = tokenizer.num_special_tokens_to_add()
+    budget = max_length - special
+    bodies = tokenizer(texts, add_special_tokens=False, verbose=False)["input_ids"]
+    if histogram:
+        get_histogram(histogram).record([len(ids) + special for ids in bodies], max_length)
+
+    result = []
+    for ids in bodies:
+        if len(ids) > budget:
+            if settings.TRUNCATION_STRATEGY == "head_tail":
+                head = min(settings.TRUNCATION_HEAD_TOKENS, budget)
+                ids = ids[:head] + (ids[len(ids) - (budget - head) :] if budget > head else [])
+            else:
+                ids = ids[:budget]
+        result.append(tokenizer.build_inputs_with_special_tokens(ids))
+    return result
+
+
+def bucket_length(length: int, max_length: int) -> int:
+    """
+    Корзина текста: ближайшая сверху граница из TOKEN_LENGTH_BUCKETS.
+    """
+    buckets = [b for b in sorted(settings.TOKEN_LENGTH_BUCKETS) if b < max_length]
+    index = bisect.bisect_left(buckets, length)
+    return buckets[index] if index < len(buckets) else max_length
+
+
+def pad(sequences: list[list[int]], pad_id: int, length: int) -> tuple[torch.Tensor, torch.Tensor]:
+    input_ids = torch.full((len(sequences), length), pad_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(sequences), length), dtype=torch.long)
+    for row, ids in enumerate(sequences):
+        input_ids[row, : len(ids)] = torch.tensor(ids, dtype=torch.long)
+        attention_mask[row, : len(ids)] = 1
+    return input_ids, attention_mask
+
+
+def run_bucketed(
+    run: Callable[[list[int], int], torch.Tensor], lengths: list[int], max_length: int
+) -> torch.Tensor:
+    """
+    Делит пачку на корзины по длине, чтобы один длинный текст не заставлял
+    дополнять до 512 токенов все короткие, и собирает логиты в исходном порядке.
+    Каждая корзина дополняется до самого длинного текста в ней.
+    """
+    groups: dict[int, list[int]] = {}
+    for index, length in enumerate(lengths):
+        groups.setdefault(bucket_length(length, max_length), []).append(index)
+
+    outputs: list[torch.Tensor | None] = [None] * len(lengths)
+    for _, indices in sorted(groups.items()):
+        logits = run(indices, max(lengths[i] for i in indices))
+        for index, row in zip(indices, logits):
+            outputs[index] = row
+    return torch.stack([row for row in outputs if row is not None])
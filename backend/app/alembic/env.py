@@ -23,6 +23,18 @@ from app.core.config import settings # noqa
 
 target_metadata = SQLModel.metadata
 
+# Generated by Postgres and deliberately not mapped (see app/models.py), so
+# autogenerate must not propose dropping them
+UNMAPPED_OBJECTS = {
+    ("column", "appointment", "search_vector"),
+    ("index", "appointment", "ix_appointment_search_vector"),
+}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    table = getattr(getattr(object, "table", None), "name", None)
+    return (type_, table, name) not in UNMAPPED_OBJECTS
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -47,7 +59,11 @@ def run_migrations_offline():
     """
     url = get_url()
     context.configure(
-        url=url, target_metadata=target_metadata, literal_binds=True, compare_type=True
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        compare_type=True,
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -71,7 +87,10 @@ def run_migrations_online():
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata, compare_type=True
+            connection=connection,
+            target_metadata=target_metadata,
+            compare_type=True,
+            include_object=include_object,
         )
 
         with context.begin_transaction():
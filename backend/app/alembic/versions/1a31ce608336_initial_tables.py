@@ -0,0 +1,99 @@
+"""Initial tables
+
+Revision ID: 1a31ce608336
+Revises:
+Create Date: 2026-10-18 15:02:11.418203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '1a31ce608336'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Databases created before migrations already have these tables
+    # (init_db used SQLModel.metadata.create_all), so only missing ones are created
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('user'):
+        op.create_table(
+            'user',
+            sa.Column('email', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=False),
+            sa.Column('is_superuser', sa.Boolean(), nullable=False),
+            sa.Column('full_name', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True),
+            sa.Column('id', sa.Uuid(), nullable=False),
+            sa.Column('hashed_password', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=True)
+
+    if not inspector.has_table('patient'):
+        op.create_table(
+            'patient',
+            sa.Column('full_name', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+            sa.Column('birth_date', sa.Date(), nullable=True),
+            sa.Column('gender', sa.Enum('male', 'female', name='gender'), nullable=False),
+            sa.Column('id', sa.Uuid(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if not inspector.has_table('disease'):
+        op.create_table(
+            'disease',
+            sa.Column('last_diagnosis', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('id', sa.Uuid(), nullable=False),
+            sa.Column('patient_id', sa.Uuid(), nullable=False),
+            sa.ForeignKeyConstraint(['patient_id'], ['patient.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if not inspector.has_table('appointment'):
+        op.create_table(
+            'appointment',
+            sa.Column('complaints', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.Column('anamnesis', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.Column('objective_status', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.Column('doctor_diagnosis', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.Column('doctor_recommendations', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.Column('nlp_recommendations', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.Column('nlp_diagnosis', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.Column('id', sa.Uuid(), nullable=False),
+            sa.Column('patient_id', sa.Uuid(), nullable=True),
+            sa.Column('disease_id', sa.Uuid(), nullable=True),
+            sa.Column('doctor_id', sa.Uuid(), nullable=True),
+            sa.ForeignKeyConstraint(['disease_id'], ['disease.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['doctor_id'], ['user.id'], ondelete='CASCADE'),
+            sa.ForeignKeyConstraint(['patient_id'], ['patient.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+    if not inspector.has_table('recommendations'):
+        op.create_table(
+            'recommendations',
+            sa.Column('label', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column('data', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+            sa.Column('id', sa.Uuid(), nullable=False),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+
+def downgrade():
+    op.drop_table('recommendations')
+    op.drop_table('appointment')
+    op.drop_table('disease')
+    op.drop_table('patient')
+    op.drop_index(op.f('ix_user_email'), table_name='user')
+    op.drop_table('user')
+    sa.Enum(name='gender').drop(op.get_bind(), checkfirst=True)
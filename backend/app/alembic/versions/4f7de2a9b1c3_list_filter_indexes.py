@@ -0,0 +1,36 @@
+"""Composite indexes for the appointment and disease list filters
+
+Revision ID: 4f7de2a9b1c3
+Revises: 9c0b5cd1e27a
+Create Date: 2026-10-18 15:31:26.117044
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '4f7de2a9b1c3'
+down_revision = '9c0b5cd1e27a'
+branch_labels = None
+depends_on = None
+
+# Each index ends with the keyset pagination key, so a filtered page is a
+# single index range scan in either sort order
+INDEXES = {
+    'ix_appointment_created_at_id': ('appointment', ['created_at', 'id']),
+    'ix_appointment_patient_id_created_at_id': ('appointment', ['patient_id', 'created_at', 'id']),
+    'ix_appointment_doctor_id_created_at_id': ('appointment', ['doctor_id', 'created_at', 'id']),
+    'ix_appointment_disease_id_created_at_id': ('appointment', ['disease_id', 'created_at', 'id']),
+    'ix_disease_updated_at_id': ('disease', ['updated_at', 'id']),
+    'ix_disease_patient_id_updated_at_id': ('disease', ['patient_id', 'updated_at', 'id']),
+}
+
+
+def upgrade():
+    for name, (table, columns) in INDEXES.items():
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, (table, _) in INDEXES.items():
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,49 @@
+"""Unique recommendation label and data import hashes
+
+Revision ID: 9c0b5cd1e27a
+Revises: 1a31ce608336
+Create Date: 2026-10-18 15:09:47.902316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '9c0b5cd1e27a'
+down_revision = '1a31ce608336'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('dataimport'):
+        op.create_table(
+            'dataimport',
+            sa.Column('name', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+            sa.Column('sha256', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+            sa.Column('rows', sa.Integer(), nullable=False),
+            sa.Column('loaded_at', sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint('name'),
+        )
+
+    # The old loader could insert the same label twice; keep the first copy
+    op.execute(
+        """
+        DELETE FROM recommendations a
+        USING recommendations b
+        WHERE a.label = b.label AND a.ctid > b.ctid
+        """
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_recommendations_label "
+        "ON recommendations (label)"
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_recommendations_label'), table_name='recommendations')
+    op.drop_table('dataimport')
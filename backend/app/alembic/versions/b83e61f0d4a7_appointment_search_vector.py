@@ -0,0 +1,40 @@
+"""Full-text search vector over appointment notes
+
+Revision ID: b83e61f0d4a7
+Revises: 4f7de2a9b1c3
+Create Date: 2026-10-18 15:52:03.640981
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83e61f0d4a7'
+down_revision = '4f7de2a9b1c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Adding a stored generated column rewrites the table once
+    op.execute(
+        """
+        ALTER TABLE appointment ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian', coalesce(doctor_diagnosis, '')), 'A')
+            || setweight(to_tsvector('russian', coalesce(nlp_diagnosis, '')), 'A')
+            || setweight(to_tsvector('russian', coalesce(complaints, '')), 'B')
+            || setweight(to_tsvector('russian', coalesce(anamnesis, '')), 'C')
+            || setweight(to_tsvector('russian', coalesce(objective_status, '')), 'C')
+        ) STORED
+        """
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_appointment_search_vector "
+        "ON appointment USING gin (search_vector)"
+    )
+
+
+def downgrade():
+    op.drop_index('ix_appointment_search_vector', table_name='appointment')
+    op.drop_column('appointment', 'search_vector')
@@ -0,0 +1,43 @@
+"""Appointment embeddings for similar-case search
+
+Revision ID: d52e8a1f6c09
+Revises: b83e61f0d4a7
+Create Date: 2026-10-18 16:24:11.385207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'd52e8a1f6c09'
+down_revision = 'b83e61f0d4a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('appointmentembedding'):
+        op.create_table(
+            'appointmentembedding',
+            sa.Column('appointment_id', sa.Uuid(), nullable=False),
+            sa.Column('model', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+            sa.Column('vector', sa.LargeBinary(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=False),
+            sa.ForeignKeyConstraint(['appointment_id'], ['appointment.id'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('appointment_id'),
+        )
+    op.create_index(
+        op.f('ix_appointmentembedding_updated_at'),
+        'appointmentembedding',
+        ['updated_at'],
+        if_not_exists=True,
+    )
+
+
+def downgrade():
+    op.drop_index(op.f('ix_appointmentembedding_updated_at'), table_name='appointmentembedding')
+    op.drop_table('appointmentembedding')
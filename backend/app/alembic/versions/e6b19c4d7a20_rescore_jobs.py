@@ -0,0 +1,40 @@
+"""Background rescore jobs
+
+Revision ID: e6b19c4d7a20
+Revises: d52e8a1f6c09
+Create Date: 2026-10-18 19:02:37.518244
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6b19c4d7a20'
+down_revision = 'd52e8a1f6c09'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('rescorejob'):
+        op.create_table(
+            'rescorejob',
+            sa.Column('id', sa.Uuid(), nullable=False),
+            sa.Column('model', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+            sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=16), nullable=False),
+            sa.Column('rows', sa.Integer(), nullable=False),
+            sa.Column('seconds', sa.Float(), nullable=False),
+            sa.Column('rows_per_second', sa.Float(), nullable=False),
+            sa.Column('error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), nullable=False),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.PrimaryKeyConstraint('id'),
+        )
+
+
+def downgrade():
+    op.drop_table('rescorejob')
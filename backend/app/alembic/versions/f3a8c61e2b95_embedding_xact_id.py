@@ -0,0 +1,54 @@
+"""Sync the similarity index by the writing transaction
+
+Revision ID: f3a8c61e2b95
+Revises: e6b19c4d7a20
+Create Date: 2026-10-18 20:41:09.127604
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c61e2b95'
+down_revision = 'e6b19c4d7a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    columns = {column['name'] for column in inspector.get_columns('appointmentembedding')}
+    if 'xact_id' not in columns:
+        op.add_column(
+            'appointmentembedding',
+            sa.Column(
+                'xact_id',
+                sa.BigInteger(),
+                server_default=sa.text('txid_current()'),
+                nullable=False,
+            ),
+        )
+    op.create_index(
+        op.f('ix_appointmentembedding_xact_id'),
+        'appointmentembedding',
+        ['xact_id'],
+        if_not_exists=True,
+    )
+    op.drop_index(
+        op.f('ix_appointmentembedding_updated_at'),
+        table_name='appointmentembedding',
+        if_exists=True,
+    )
+
+
+def downgrade():
+    op.create_index(
+        op.f('ix_appointmentembedding_updated_at'),
+        'appointmentembedding',
+        ['updated_at'],
+        if_not_exists=True,
+    )
+    op.drop_index(op.f('ix_appointmentembedding_xact_id'), table_name='appointmentembedding')
+    op.drop_column('appointmentembedding', 'xact_id')
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.routes import appointments, diseases, login, models, users, utils, patients
+from app.api.routes import appointments, diseases, login, mkb, models, users, utils, patients
 
 api_router = APIRouter()
 api_router.include_router(login.router, tags=["login"])
@@ -11,4 +11,5 @@ api_router.include_router(patients.router, prefix="/patients", tags=["patients"]
 api_router.include_router(diseases.router, prefix="/diseases", tags=["diseases"])
 api_router.include_router(appointments.router, prefix="/appointments", tags=["appointments"])
 
-api_router.include_router(models.router, prefix="/models", tags=["models"])
\ No newline at end of file
+api_router.include_router(models.router, prefix="/models", tags=["models"])
+api_router.include_router(mkb.router, prefix="/mkb", tags=["mkb"])
@@ -0,0 +1,150 @@
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Generic, Literal, TypeVar
+
+from fastapi import HTTPException
+from sqlalchemy import ColumnElement, literal, text, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlmodel import Session, func, select
+from sqlmodel.sql.expression import SelectOfScalar
+
+T = TypeVar("T")
+
+CountMode = Literal["exact", "estimated", "none"]
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+def _to_json(value: Any) -> str:
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def encode_cursor(values: list[Any], *, backward: bool = False) -> str:
+    """
+    Opaque cursor: the sort key of a boundary row and the paging direction.
+    """
+    payload = json.dumps({"v": values, "b": backward}, default=_to_json)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(
+    cursor: str, order_by: Sequence[InstrumentedAttribute[Any] | ColumnElement[Any]]
+) -> tuple[list[Any], bool]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        raw = payload["v"]
+        if len(raw) != len(order_by):
+            raise ValueError("cursor does not match the sort key")
+        values = []
+        for column, value in zip(order_by, raw):
+            python_type = column.type.python_type
+            values.append(
+                datetime.fromisoformat(value)
+                if python_type is datetime
+                else python_type(value)
+            )
+        return values, bool(payload["b"])
+    except (binascii.Error, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def paginate(
+    session: Session,
+    statement: SelectOfScalar[T],
+    order_by: list[InstrumentedAttribute[Any]],
+    *,
+    limit: int,
+    skip: int = 0,
+    cursor: str | None = None,
+    descending: bool = False,
+) -> Page[T]:
+    """
+    Keyset pagination over `order_by` (a unique key, e.g. created_at + id).
+
+    With a cursor the page starts right after (or before) the boundary row, so
+    deep pages cost the same as the first one. Without a cursor the legacy
+    `skip` offset is used; both modes return cursors for the adjacent pages.
+    """
+    backward = False
+    if cursor:
+        values, backward = decode_cursor(cursor, order_by)
+        key = tuple_(*order_by)
+        boundary = tuple_(*(literal(v, c.type) for c, v in zip(order_by, values)))
+        # Moving towards larger keys: forward in ascending order or backward in descending
+        statement = statement.where(key > boundary if descending == backward else key < boundary)
+    elif skip:
+        statement = statement.offset(skip)
+
+    reverse = descending != backward
+    statement = statement.order_by(*(c.desc() if reverse else c.asc() for c in order_by))
+    rows = list(session.exec(statement.limit(limit + 1)).all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if backward:
+        rows.reverse()
+
+    page = Page(items=rows)
+    if rows:
+        # Going backward we came from the next page, going forward from the previous one
+        has_next = True if backward else has_more
+        has_prev = has_more if backward else bool(cursor or skip)
+        if has_next:
+            page.next_cursor = encode_cursor([getattr(rows[-1], c.key) for c in order_by])
+        if has_prev:
+            page.prev_cursor = encode_cursor(
+                [getattr(rows[0], c.key) for c in order_by], backward=True
+            )
+    return page
+
+
+def estimate_rows(session: Session, statement: SelectOfScalar[Any]) -> int | None:
+    """
+    Row count from planner statistics: pg_class.reltuples for a whole table,
+    the EXPLAIN row estimate for a filtered query. None if Postgres has no
+    statistics yet: reltuples is -1 for a never-analyzed table on PG 14+ and
+    0 before that, so 0 also falls back to the exact count, which is cheap
+    for a table that really is empty.
+    """
+    bind = session.get_bind()
+    if statement.whereclause is None:
+        (table,) = statement.get_final_froms()
+        name = bind.dialect.identifier_preparer.format_table(table)  # type: ignore[arg-type]
+        reltuples = session.execute(
+            text("SELECT reltuples FROM pg_class WHERE oid = to_regclass(:name)"),
+            {"name": name},
+        ).scalar()
+        return int(reltuples) if reltuples is not None and reltuples > 0 else None
+
+    compiled = statement.compile(dialect=bind.dialect)
+    plan = (
+        session.connection()
+        .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+        .scalar()
+    )
+    return int(plan[0]["Plan"]["Plan Rows"]) if plan else None
+
+
+def count_rows(
+    session: Session, statement: SelectOfScalar[Any], mode: CountMode
+) -> int | None:
+    """
+    Total for a list response: exact COUNT(*), a planner estimate, or none
+    (infinite scroll that only follows next_cursor).
+    """
+    if mode == "none":
+        return None
+    if mode == "estimated":
+        estimate = estimate_rows(session, statement)
+        if estimate is not None:
+            return estimate
+    return session.exec(select(func.count()).select_from(statement.subquery())).one()
@@ -2,22 +2,29 @@ from datetime import datetime
 import uuid
 from typing import Any, Optional
 
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query
+from sqlalchemy import Double, cast, literal, tuple_
 from sqlmodel import func, select
 
 from app import crud
+from app.ai.similarity import find_similar, store_embedding
 from app.api.deps import (
     CurrentUser,
     SessionDep,
 )
+from app.api.pagination import CountMode, count_rows, decode_cursor, encode_cursor, paginate
 from app.models import (
+    APPOINTMENT_SEARCH_VECTOR,
     Appointment,
+    AppointmentSearchHit,
+    AppointmentSearchResults,
     AppointmentUpdate,
     AppointmentsPublic,
     Message,
     Disease,
     DiseaseCreate,
     Patient,
+    SimilarAppointment,
     AppointmentCreate,
     AppointmentPublic
 )
@@ -28,6 +35,72 @@ def format_disease_last_diagnosis(appointment: Appointment):
     diagnosis = appointment.doctor_diagnosis or appointment.nlp_diagnosis or ""
     return diagnosis
 
+@router.get("/search", response_model=AppointmentSearchResults)
+def search_appointments(
+    session: SessionDep,
+    current_user: CurrentUser,
+    q: str = Query(..., min_length=1, description="Search terms; supports \"phrases\", OR and -exclusion"),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    patient_id: Optional[uuid.UUID] = Query(None, description="Filter appointments by patient ID"),
+    doctor_id: Optional[uuid.UUID] = Query(None, description="Filter appointments by doctor ID"),
+) -> Any:
+    """
+    Full-text search over complaints, anamnesis, objective status and diagnoses
+    with Russian stemming. Results are ranked, matches are highlighted with <mark>,
+    and pages are keyed by (rank, id).
+    """
+    query = func.websearch_to_tsquery("russian", q)
+    # ts_rank returns real; as double precision it survives the JSON cursor exactly
+    rank = cast(func.ts_rank(APPOINTMENT_SEARCH_VECTOR, query), Double)
+    order_by = [rank, Appointment.id]
+
+    # The page of ids is found on the GIN index first; headlines are only
+    # built for the rows that are returned
+    page = select(Appointment.id, rank.label("rank")).where(
+        APPOINTMENT_SEARCH_VECTOR.bool_op("@@")(query)
+    )
+    if patient_id:
+        page = page.where(Appointment.patient_id == patient_id)
+    if doctor_id:
+        page = page.where(Appointment.doctor_id == doctor_id)
+    if cursor:
+        values, _ = decode_cursor(cursor, order_by)
+        boundary = tuple_(*(literal(v, c.type) for c, v in zip(order_by, values)))
+        page = page.where(tuple_(*order_by) < boundary)
+    page_query = page.order_by(rank.desc(), Appointment.id.desc()).limit(limit + 1).subquery()
+
+    notes = func.concat_ws(
+        " … ",
+        Appointment.doctor_diagnosis,
+        Appointment.complaints,
+        Appointment.anamnesis,
+        Appointment.objective_status,
+    )
+    headline = func.ts_headline(
+        "russian",
+        notes,
+        query,
+        "StartSel=<mark>, StopSel=</mark>, MaxFragments=3, MaxWords=20, MinWords=5",
+    )
+    statement = (
+        select(Appointment, page_query.c.rank, headline)
+        .join(page_query, Appointment.id == page_query.c.id)
+        .order_by(page_query.c.rank.desc(), Appointment.id.desc())
+    )
+    rows = session.exec(statement).all()
+
+    hits = [
+        AppointmentSearchHit.model_validate(appointment, update={"rank": rank_value, "headline": headline_value})
+        for appointment, rank_value, headline_value in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = hits[-1]
+        next_cursor = encode_cursor([last.rank, last.id])
+    return AppointmentSearchResults(data=hits, next_cursor=next_cursor)
+
+
 @router.get("/{id}", response_model=AppointmentPublic)
 def read_appointment(
     id: uuid.UUID,
@@ -42,12 +115,37 @@ def read_appointment(
         raise HTTPException(status_code=404, detail="Appointment not found")
     return appointment
 
+@router.get("/{id}/similar", response_model=list[SimilarAppointment])
+def read_similar_appointments(
+    id: uuid.UUID,
+    current_user: CurrentUser,
+    session: SessionDep,
+    limit: int = Query(10, ge=1, le=100),
+) -> Any:
+    """
+    Past appointments with the most similar complaints, anamnesis and objective status,
+    nearest first. Their diagnoses are what the doctor compares against.
+    """
+    appointment = session.get(Appointment, id)
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    try:
+        similar = find_similar(session, appointment, limit)
+    except ValueError as e:
+        # The embedding model is not available in this deployment (e.g. the ONNX backend)
+        raise HTTPException(status_code=503, detail=str(e))
+    return [
+        SimilarAppointment.model_validate(row, update={"similarity": score})
+        for row, score in similar
+    ]
+
 @router.post("/", response_model=AppointmentPublic)
 def create_appointment(
     *,
     session: SessionDep,
     current_user: CurrentUser,
     appointment_in: AppointmentCreate,
+    background_tasks: BackgroundTasks,
 ) -> Any:
     """
     Create new appointment record.
@@ -96,6 +194,7 @@ def create_appointment(
     session.add(appointment)
     session.commit()
     session.refresh(appointment)
+    background_tasks.add_task(store_embedding, appointment.id)
     return appointment
 
 
@@ -105,14 +204,17 @@ def read_appointments(
     current_user: CurrentUser,
     skip: int = 0,
     limit: int = 400,
+    cursor: Optional[str] = Query(None, description="Cursor from next_cursor/prev_cursor of a previous page; replaces skip"),
     patient_id: Optional[uuid.UUID] = Query(None, description="Filter appointments by patient ID"),
     disease_id: Optional[uuid.UUID] = Query(None, description="Filter appointments by disease ID"),
     doctor_id: Optional[uuid.UUID] = Query(None, description="Filter appointments by doctor ID"),
     sort_order: Optional[str] = Query("asc", enum=["asc", "desc"], description="Sort order by appointment date"),
+    include_count: CountMode = Query("exact", description="exact COUNT(*), a fast planner estimate, or none"),
 ) -> Any:
     """
     Retrieve appointments with optional filtering by patient ID, disease ID, doctor ID, sorting by date,
     and an option to extend with related models (patient, disease, doctor).
+    Pages are keyed by (created_at, id): pass next_cursor or prev_cursor back as `cursor`.
     """
     statement = select(Appointment)
 
@@ -125,26 +227,24 @@ def read_appointments(
     if doctor_id:
         statement = statement.where(Appointment.doctor_id == doctor_id)
 
-    if sort_order == "desc":
-        statement = statement.order_by(Appointment.created_at.desc())
-    else:
-        statement = statement.order_by(Appointment.created_at.asc())
-
-    statement = statement.offset(skip).limit(limit)
+    count = count_rows(session, statement, include_count)
 
-    count_query = select(func.count()).select_from(Appointment)
-    if patient_id:
-        count_query = count_query.where(Appointment.patient_id == patient_id)
-    if disease_id:
-        count_query = count_query.where(Appointment.disease_id == disease_id)
-    if doctor_id:
-        count_query = count_query.where(Appointment.doctor_id == doctor_id)
-
-    count = session.exec(count_query).one()
-
-    appointments = session.exec(statement).all()
+    page = paginate(
+        session,
+        statement,
+        [Appointment.created_at, Appointment.id],
+        limit=limit,
+        skip=skip,
+        cursor=cursor,
+        descending=sort_order == "desc",
+    )
 
-    return AppointmentsPublic(data=appointments, count=count)
+    return AppointmentsPublic(
+        data=page.items,
+        count=count,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+    )
 
 
 @router.put("/{id}", response_model=AppointmentPublic)
@@ -154,6 +254,7 @@ def update_appointment(
     session: SessionDep,
     current_user: CurrentUser,
     appointment_update: AppointmentUpdate,
+    background_tasks: BackgroundTasks,
 ) -> Any:
     """
     Update an existing appointment record by ID.
@@ -182,6 +283,7 @@ def update_appointment(
     session.add(appointment)
     session.commit()
     session.refresh(appointment)
+    background_tasks.add_task(store_embedding, appointment.id)
 
     return appointment
 
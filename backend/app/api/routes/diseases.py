@@ -2,13 +2,14 @@ import uuid
 from typing import Any, Optional
 
 from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlmodel import func, select
+from sqlmodel import select
 
 from app import crud
 from app.api.deps import (
     CurrentUser,
     SessionDep,
 )
+from app.api.pagination import CountMode, count_rows, paginate
 from app.models import (
     Message,
     Disease,
@@ -28,32 +29,38 @@ def read_diseases(
     current_user: CurrentUser,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor from next_cursor/prev_cursor of a previous page; replaces skip"),
     patient_id: Optional[uuid.UUID] = Query(None, description="Filter diseases by patient ID"),
-    sort_order: Optional[str] = Query("asc", enum=["asc", "desc"], description="Sort order by date")
+    sort_order: Optional[str] = Query("asc", enum=["asc", "desc"], description="Sort order by date"),
+    include_count: CountMode = Query("exact", description="exact COUNT(*), a fast planner estimate, or none"),
 ) -> Any:
     """
     Retrieve diseases with optional filtering by patient ID and sorting by date.
+    Pages are keyed by (updated_at, id): pass next_cursor or prev_cursor back as `cursor`.
     """
     statement = select(Disease)
 
     if patient_id:
         statement = statement.where(Disease.patient_id == patient_id)
 
-    if sort_order == "desc":
-        statement = statement.order_by(Disease.updated_at.desc())
-    else:
-        statement = statement.order_by(Disease.updated_at.asc())
-
-    statement = statement.offset(skip).limit(limit)
-
-    if patient_id:
-        count = session.exec(select(func.count()).select_from(Disease).where(Disease.patient_id == patient_id)).one()
-    else:
-        count = session.exec(select(func.count()).select_from(Disease)).one()
-
-    diseases = session.exec(statement).all()
-
-    return DiseasesPublic(data=diseases, count=count)
+    count = count_rows(session, statement, include_count)
+
+    page = paginate(
+        session,
+        statement,
+        [Disease.updated_at, Disease.id],
+        limit=limit,
+        skip=skip,
+        cursor=cursor,
+        descending=sort_order == "desc",
+    )
+
+    return DiseasesPublic(
+        data=page.items,
+        count=count,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+    )
 
 
 @router.get("/{id}", response_model=DiseasePublic)
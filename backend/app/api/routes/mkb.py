@@ -0,0 +1,57 @@
+from dataclasses import asdict
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Query
+
+from app.ai.mkb import MkbCode, get_index
+from app.api.deps import CurrentUser
+from app.models import MkbEntry, MkbNode
+
+router = APIRouter()
+
+
+def to_entries(codes: list[MkbCode]) -> list[MkbEntry]:
+    return [MkbEntry(**asdict(code)) for code in codes]
+
+
+@router.get("/", response_model=list[MkbEntry])
+def search_mkb(
+    current_user: CurrentUser,
+    q: str = Query("", description="Code prefix (e.g. 'J45') or words of the title"),
+    limit: int = Query(20, ge=1, le=200),
+) -> Any:
+    """
+    Search ICD-10 codes by code prefix or title words. Without a query, returns the chapters.
+    """
+    index = get_index()
+    if not q.strip():
+        return to_entries(index.children_of(None)[:limit])
+    return to_entries(index.search(q, limit))
+
+
+@router.get("/typeahead", response_model=list[MkbEntry])
+def typeahead_mkb(
+    current_user: CurrentUser,
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+) -> Any:
+    """
+    Suggestions for the diagnosis form as the user types.
+    """
+    return to_entries(get_index().search(q, limit))
+
+
+@router.get("/{code}", response_model=MkbNode)
+def read_mkb_code(current_user: CurrentUser, code: str) -> Any:
+    """
+    Get an ICD-10 code or range with its ancestors and direct children.
+    """
+    index = get_index()
+    entry = index.get(code)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="ICD-10 code not found")
+    return MkbNode(
+        **asdict(entry),
+        path=to_entries(index.path(code)),
+        children=to_entries(index.children_of(code)),
+    )
@@ -1,70 +1,211 @@
-from datetime import datetime
+import uuid
+from dataclasses import asdict
 
-from app.ai.bert import get_bert_result
-from app.ai.ensemble import get_ensemble_result
-from fastapi import APIRouter, HTTPException, Query
-from sqlmodel import func, select
+from app.ai import inference
+from app.ai.cache import get_cache
+from app.ai.executor import InferenceQueueFull, InferenceTimeout, get_executor
+from app.ai.prompts import build_prompt
+from app.ai.recommendations import recommendations
+from app.ai.rescoring import start_rescore
+from app.ai.suggestions import Suggestion
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 
 from app import crud
 from app.api.deps import (
     CurrentUser,
     SessionDep,
+    get_current_active_superuser,
 )
+from app.core.config import settings
 from app.models import (
     AppointmentInference,
+    CacheStatus,
+    DiagnosisSuggestion,
     InferenceResult,
+    ModelStatus,
     Patient,
-    Recommendations,
+    RescoreJob,
+    RescoreJobStatus,
+    RescoreResult,
+    SuggestionWithRecommendation,
+    TierStatus,
 )
 
 router = APIRouter()
 
 
-def calculate_age(birthdate: datetime) -> int:
+@router.get("/status", response_model=list[ModelStatus])
+def read_models_status(current_user: CurrentUser):
     """
-    Функция для вычисления возраста пациента по дате рождения.
+    Состояние моделей: загружена ли, время холодного старта и занимаемая память.
     """
-    today = datetime.today()
-    age = today.year - birthdate.year
-    if today.month < birthdate.month or (today.month == birthdate.month and today.day < birthdate.day):
-        age -= 1
-    return age
+    return [ModelStatus(**asdict(stats)) for stats in inference.model_stats()]
+
+
+@router.get("/cache", response_model=CacheStatus)
+def read_cache_status(current_user: CurrentUser):
+    """
+    Счётчики попаданий и промахов кэша результатов моделей.
+    """
+    cache = get_cache()
+    if cache is None:
+        return CacheStatus(hits=0, misses=0, entries=0, hit_rate=0.0)
+    stats = cache.stats()
+    return CacheStatus(
+        hits=stats.hits, misses=stats.misses, entries=stats.entries, hit_rate=stats.hit_rate
+    )
+
+
+@router.get("/tiers", response_model=list[TierStatus])
+def read_tiers_status(current_user: CurrentUser):
+    """
+    Доля запросов, на которые ответил быстрый ярус, и его согласие с трансформером.
+    """
+    return [
+        TierStatus(
+            **asdict(stats),
+            hit_rate=stats.hit_rate,
+            agreement=stats.agreement,
+            escalation_agreement=stats.escalation_agreement,
+        )
+        for stats in inference.tier_stats()
+    ]
+
+
+async def suggest_diagnoses(
+    model: str, session: SessionDep, request: AppointmentInference, top_k: int
+) -> list[Suggestion]:
+    if model not in inference.MODELS:
+        raise HTTPException(status_code=400, detail=f"Модель '{model}' не поддерживается")
+
+    gender, birth_date = request.patient_gender, request.patient_birth_date
+    if model == "bert" and gender is None and request.patient_id:
+        patient = await run_in_threadpool(session.get, Patient, request.patient_id)
+        if patient:
+            gender, birth_date = patient.gender, patient.birth_date
+
+    prompt = build_prompt(
+        model,
+        complaints=request.complaints,
+        anamnesis=request.anamnesis,
+        objective_status=request.objective_status,
+        gender=gender,
+        birth_date=birth_date,
+    )
+    try:
+        return await get_executor().run(inference.predict, model, prompt, top_k)
+    except InferenceQueueFull:
+        raise HTTPException(
+            status_code=503,
+            detail="Сервер перегружен, повторите запрос позже",
+            headers={"Retry-After": str(settings.INFERENCE_RETRY_AFTER_SECONDS)},
+        )
+    except InferenceTimeout:
+        raise HTTPException(status_code=504, detail="Превышено время ожидания модели")
 
 
 @router.post("/{model}/inference", response_model=InferenceResult)
-def model_inference(
+async def model_inference(
     *,
     model: str,
     session: SessionDep,
     current_user: CurrentUser,
-    request: AppointmentInference
+    request: AppointmentInference,
+    top_k: int = Query(1, ge=1, le=settings.INFERENCE_TOP_K, description="Number of suggested diagnoses"),
 ):
     """
     Инференс текста с использованием указанной модели.
+    Возвращает top_k диагнозов с вероятностями за один прямой проход.
+    """
+    suggestions = await suggest_diagnoses(model, session, request, top_k)
+    return InferenceResult(
+        result=inference.top_result(model, suggestions),
+        suggestions=[DiagnosisSuggestion(**suggestion) for suggestion in suggestions],
+    )
+
+
+@router.post("/{model}/suggest", response_model=SuggestionWithRecommendation)
+async def model_suggest(
+    *,
+    model: str,
+    session: SessionDep,
+    current_user: CurrentUser,
+    request: AppointmentInference,
+    top_k: int = Query(1, ge=1, le=settings.INFERENCE_TOP_K, description="Number of suggested diagnoses"),
+):
+    """
+    Диагноз, его название по МКБ и рекомендации за один запрос.
+    Рекомендации берутся из памяти, без обращений к БД.
     """
-    result = ""
-    if model == "bert":
-        patient = session.get(Patient, request.patient_id)
-    
-        if patient is None:
-            patient_age = 20
-            patient_gender = "male"
-        else:
-            patient_age = calculate_age(patient.birth_date) if patient.birth_date else 20
-            patient_gender = patient.gender
-
-        patient_gender = "Мужчина" if patient_gender == "male" else "Женщина"
-
-        prompt = f"{patient_gender}, {patient_age} лет, {request.complaints} {request.anamnesis} {request.objective_status}"
-        
-        result = get_bert_result(prompt.lower().strip())
-    elif model == "ensemble":
-        prompt = f"{request.complaints} {request.anamnesis} {request.objective_status}"
-        result = get_ensemble_result(prompt.lower().strip())
-    else:
+    suggestions = await suggest_diagnoses(model, session, request, top_k)
+    result = inference.top_result(model, suggestions)
+    if recommendations.stale:
+        await run_in_threadpool(recommendations.ensure_loaded, session)
+    return SuggestionWithRecommendation(
+        result=result,
+        suggestions=[DiagnosisSuggestion(**suggestion) for suggestion in suggestions],
+        recommendation=recommendations.get(result) or "",
+    )
+
+
+def rescore_job_status(job: RescoreJob) -> RescoreJobStatus:
+    return RescoreJobStatus.model_validate(
+        job,
+        update={
+            "stats": RescoreResult(
+                rows=job.rows, seconds=job.seconds, rows_per_second=job.rows_per_second
+            )
+        },
+    )
+
+
+@router.post(
+    "/{model}/inference/batch",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=RescoreJobStatus,
+    status_code=202,
+)
+def model_inference_batch(
+    *,
+    model: str,
+    session: SessionDep,
+    only_missing: bool = Query(False, description="Only appointments without nlp_diagnosis"),
+    limit: int | None = Query(None, ge=1, description="Maximum number of appointments"),
+    chunk_size: int = Query(1000, ge=1, le=10000, description="Rows fetched from the DB at once"),
+    batch_size: int = Query(32, ge=1, le=256, description="Texts per forward pass"),
+):
+    """
+    Запускает фоновый пересчёт nlp_diagnosis для сохранённых приёмов указанной моделью.
+    Ход пересчёта — по GET /{model}/inference/batch/{job_id}.
+    """
+    if model not in inference.MODELS:
         raise HTTPException(status_code=400, detail=f"Модель '{model}' не поддерживается")
 
-    return InferenceResult(result=result)
+    job = start_rescore(
+        session,
+        model,
+        only_missing=only_missing,
+        limit=limit,
+        chunk_size=chunk_size,
+        batch_size=batch_size,
+    )
+    return rescore_job_status(job)
+
+
+@router.get(
+    "/{model}/inference/batch/{job_id}",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=RescoreJobStatus,
+)
+def read_inference_batch(model: str, job_id: uuid.UUID, session: SessionDep):
+    """
+    Состояние фонового пересчёта.
+    """
+    job = session.get(RescoreJob, job_id)
+    if job is None or job.model != model:
+        raise HTTPException(status_code=404, detail="Задача пересчёта не найдена")
+    return rescore_job_status(job)
 
 
 @router.get("/gpt-static/inference", response_model=InferenceResult)
@@ -72,9 +213,5 @@ def read_recs(*,
     session: SessionDep,
     current_user: CurrentUser,
     label: str = Query(..., description="Filter recommendation by label")):
-    statement = select(Recommendations).where(Recommendations.label == label).limit(1)
-    result = session.exec(statement).first()
-    if result:
-        return InferenceResult(result=result.data)
-    else:
-        return InferenceResult(result="")
\ No newline at end of file
+    recommendations.ensure_loaded(session)
+    return InferenceResult(result=recommendations.get(label) or "")
@@ -1,21 +1,27 @@
 import uuid
-from typing import Any
+from typing import Any, Optional
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Query
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
 
 from app import crud
 from app.api.deps import (
     CurrentUser,
     SessionDep,
 )
+from app.api.pagination import CountMode, count_rows, paginate
 from app.models import (
+    Appointment,
+    AppointmentPublicWithDoctor,
+    DiseasePublic,
     Message,
     Patient,
     PatientCreate,
     PatientPublic,
     PatientUpdate,
     PatientsPublic,
+    PatientTimeline,
 )
 from app.utils import generate_new_account_email, send_email
 
@@ -29,15 +35,21 @@ def read_patients(
     session: SessionDep, current_user: CurrentUser,
     skip: int = 0,
     limit: int = 100,
+    cursor: str | None = None,
+    include_count: CountMode = "exact",
 ) -> Any:
     """
-    Retrieve patients.
+    Retrieve patients. Pass next_cursor or prev_cursor back as `cursor` to page by ID.
     """
-    statement = select(Patient).offset(skip).limit(limit)
-    count = session.exec(select(func.count()).select_from(Patient)).one()
-    patients = session.exec(statement).all()
+    count = count_rows(session, select(Patient), include_count)
+    page = paginate(session, select(Patient), [Patient.id], limit=limit, skip=skip, cursor=cursor)
 
-    return PatientsPublic(data=patients, count=count)
+    return PatientsPublic(
+        data=page.items,
+        count=count,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+    )
 
 
 @router.get("/{id}", response_model=PatientPublic)
@@ -55,6 +67,44 @@ def read_patient(
     return patient
 
 
+@router.get("/{id}/timeline", response_model=PatientTimeline)
+def read_patient_timeline(
+    id: uuid.UUID,
+    current_user: CurrentUser,
+    session: SessionDep,
+    sort_order: Optional[str] = Query("asc", enum=["asc", "desc"], description="Sort order by date"),
+) -> Any:
+    """
+    Get a patient's chart: the patient, their diseases and appointments with doctors.
+    Loaded eagerly in three queries regardless of the number of appointments.
+    """
+    statement = (
+        select(Patient)
+        .where(Patient.id == id)
+        .options(
+            selectinload(Patient.diseases),  # type: ignore[arg-type]
+            selectinload(Patient.appointments).joinedload(Appointment.doctor),  # type: ignore[arg-type]
+        )
+    )
+    patient = session.exec(statement).first()
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+
+    descending = sort_order == "desc"
+    diseases = sorted(patient.diseases, key=lambda d: (d.updated_at, d.id), reverse=descending)
+    appointments = sorted(
+        patient.appointments, key=lambda a: (a.created_at, a.id), reverse=descending
+    )
+    return PatientTimeline(
+        patient=PatientPublic.model_validate(patient),
+        diseases=[DiseasePublic.model_validate(disease) for disease in diseases],
+        appointments=[
+            AppointmentPublicWithDoctor.model_validate(appointment)
+            for appointment in appointments
+        ],
+    )
+
+
 @router.post("/", response_model=PatientPublic)
 def create_patient(
     *,
@@ -2,7 +2,7 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from sqlmodel import col, delete, select
 
 from app import crud
 from app.api.deps import (
@@ -10,6 +10,7 @@ from app.api.deps import (
     SessionDep,
     get_current_active_superuser,
 )
+from app.api.pagination import CountMode, count_rows, paginate
 from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
 from app.models import (
@@ -33,18 +34,27 @@ router = APIRouter()
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+def read_users(
+    session: SessionDep,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    include_count: CountMode = "exact",
+) -> Any:
     """
-    Retrieve users.
+    Retrieve users. Pass next_cursor or prev_cursor back as `cursor` to page by ID.
     """
 
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
+    count = count_rows(session, select(User), include_count)
 
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
+    page = paginate(session, select(User), [User.id], limit=limit, skip=skip, cursor=cursor)
 
-    return UsersPublic(data=users, count=count)
+    return UsersPublic(
+        data=page.items,
+        count=count,
+        next_cursor=page.next_cursor,
+        prev_cursor=page.prev_cursor,
+    )
 
 
 @router.post(
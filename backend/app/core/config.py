@@ -1,4 +1,6 @@
+import os
 import secrets
+import tempfile
 import warnings
 from typing import Annotated, Any, Literal
 
@@ -86,6 +88,76 @@ class Settings(BaseSettings):
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
 
+    # Inference: concurrent requests to one model are grouped into batches
+    INFERENCE_MAX_BATCH_SIZE: int = 16
+    INFERENCE_MAX_WAIT_MS: float = 10
+    # Unix socket of the shared inference server (python -m app.ai.server).
+    # When unset, every API worker loads the models in-process.
+    INFERENCE_SOCKET_PATH: str | None = None
+    # Models are loaded on first use; these are loaded in the background at startup
+    MODEL_PRELOAD: list[str] = []
+    # Unload models idle for longer than this many seconds (0 disables eviction)
+    MODEL_IDLE_TTL_SECONDS: int = 0
+    # Weights precision applied at load time; check the accuracy impact with
+    # python -m app.ai.precision before switching
+    MODEL_PRECISION: Literal["fp32", "int8", "bf16"] = "fp32"
+    # "onnx" runs the models exported by python -m app.ai.onnx_export on
+    # ONNX Runtime and falls back to torch when the files are missing
+    INFERENCE_BACKEND: Literal["torch", "onnx"] = "torch"
+    ONNX_INTRA_OP_THREADS: int = 0
+    # torch intra-op threads per forward pass, set once at startup for the whole
+    # process that runs the models (the inference server, or an API worker
+    # without one). 0 means one thread per core, or half of the cores with
+    # ENSEMBLE_PARALLEL, so the two encoders running at once fill the CPU
+    # instead of oversubscribing it 2x; bert and the student get the same budget
+    TORCH_NUM_THREADS: int = 0
+    # Run the two ensemble encoders (and their tokenizers) concurrently
+    ENSEMBLE_PARALLEL: bool = True
+    # Tokenization: max lengths per model, "head" keeps the beginning of long
+    # notes, "head_tail" keeps TRUNCATION_HEAD_TOKENS from the start plus the end.
+    # Batches are split into length buckets so short texts are not padded to 512.
+    BERT_MAX_LENGTH: int = 512
+    ENSEMBLE_MAX_LENGTH: int = 512
+    STUDENT_MAX_LENGTH: int = 512
+    TRUNCATION_STRATEGY: Literal["head", "head_tail"] = "head"
+    TRUNCATION_HEAD_TOKENS: int = 128
+    TOKEN_LENGTH_BUCKETS: list[int] = [64, 128, 256]
+    # Dedicated executor for the async inference route: when all workers are
+    # busy and the queue is full, requests get 503 with Retry-After
+    INFERENCE_WORKERS: int = 8
+    INFERENCE_QUEUE_SIZE: int = 32
+    INFERENCE_TIMEOUT_SECONDS: float = 30
+    INFERENCE_RETRY_AFTER_SECONDS: int = 1
+    # Upper bound of suggestions returned per request and softmax temperatures
+    # fitted with python -m app.ai.calibration
+    INFERENCE_TOP_K: int = 10
+    BERT_TEMPERATURE: float = 1.0
+    ENSEMBLE_TEMPERATURE: float = 1.0
+    STUDENT_TEMPERATURE: float = 1.0
+    # Model outputs cache shared by all workers of a container (0 entries disables it)
+    INFERENCE_CACHE_PATH: str = os.path.join(
+        tempfile.gettempdir(), "oez-inference-cache.sqlite3"
+    )
+    INFERENCE_CACHE_MAX_ENTRIES: int = 10000
+    INFERENCE_CACHE_TTL_SECONDS: int = 60 * 60 * 24
+    # Fast tier: a TF-IDF + logistic regression model trained with
+    # python -m app.ai.fast answers first; suggestions whose top probability is
+    # below the threshold go to the transformer. A share of the fast answers is
+    # re-checked by the transformer in the background to measure agreement.
+    FAST_TIER_ENABLED: bool = False
+    FAST_TIER_THRESHOLD: float = 0.9
+    FAST_TIER_SHADOW_RATE: float = 0.05
+    # How often a worker checks whether recommendations were reloaded elsewhere
+    RECOMMENDATIONS_REVALIDATE_SECONDS: int = 60
+    # Similar cases: the embedding index (HNSW when hnswlib is installed) is kept by
+    # the inference server when INFERENCE_SOCKET_PATH is set and saved here
+    SIMILARITY_INDEX_PATH: str = os.path.join(tempfile.gettempdir(), "oez-similarity")
+    # Embeddings reuse the encoder of the loaded classifier (in the inference server
+    # when INFERENCE_SOCKET_PATH is set), so they need INFERENCE_BACKEND=torch
+    SIMILARITY_MODEL: Literal["bert"] = "bert"
+    SIMILARITY_HNSW_M: int = 16
+    SIMILARITY_HNSW_EF: int = 64
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def emails_enabled(self) -> bool:
@@ -1,22 +1,46 @@
 from datetime import date
-import os
 from typing import List
+from sqlalchemy import text
 from sqlmodel import SQLModel, Session, create_engine, select
-import csv
 
 from app import crud
+from app.ai.recommendations import load_recommendations
 from app.core.config import settings
-from app.models import Gender, Patient, PatientBase, PatientCreate, Recommendations, User, UserCreate
+from app.models import Gender, Patient, PatientBase, PatientCreate, User, UserCreate
 
 engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
 
 
+def alembic_managed(session: Session) -> bool:
+    return session.execute(text("SELECT to_regclass('alembic_version')")).scalar() is not None
+
+
+def ensure_unique_recommendation_labels(session: Session) -> None:
+    """
+    For databases created with create_all rather than Alembic, which does not
+    add constraints to existing tables: drop duplicate labels left by the
+    per-line loader and add the unique label index that the bulk upsert relies
+    on. Migrated databases get it from the unique_recommendation_label migration.
+    """
+    session.execute(
+        text(
+            "DELETE FROM recommendations a USING recommendations b "
+            "WHERE a.label = b.label AND a.ctid > b.ctid"
+        )
+    )
+    session.execute(
+        text(
+            "CREATE UNIQUE INDEX IF NOT EXISTS ix_recommendations_label "
+            "ON recommendations (label)"
+        )
+    )
+    session.commit()
+
 
 def init_db(session: Session) -> None:
-    # Tables should be created with Alembic migrations
-    # But if you don't want to use migrations, create
-    # the tables un-commenting the next lines
-    # from sqlmodel import SQLModel
+    # Tables are created with Alembic migrations (alembic upgrade head in
+    # scripts/prestart.sh). create_all only fills in missing tables, e.g.
+    # for a test database that was never migrated
 
     # This works because the models are already imported and registered from app.models
     SQLModel.metadata.create_all(engine)
@@ -46,33 +70,7 @@ def init_db(session: Session) -> None:
         ).first()
         if not patient:
             crud.create_patient(session=session, patient_create=patient_in)
-    
-    base_dir = os.path.dirname(os.path.dirname(__file__))
-    csv_path = os.path.join(base_dir, 'ai', 'gpt.csv')
-    
-    with open(csv_path, 'r', encoding='utf-8') as file:
-        for line in file:
-            line = line.strip() 
-            if line:
-                try:
-                    label, data = line.split('$', 1)
-                    label = label.replace('"', '')
-                    data = data.replace("\\n", "\n")
-
-                    existing_recommendation = session.exec(
-                        select(Recommendations).where(Recommendations.label == label,)
-                    ).first()
-                    if existing_recommendation:
-                        continue
 
-                    recommendation = Recommendations(
-                        label=label,
-                        data=data
-                    )
-                    
-                    session.add(recommendation)
-                    session.commit()
-                    session.refresh(recommendation)
-                except ValueError:
-                    continue
-                    
\ No newline at end of file
+    if not alembic_managed(session):
+        ensure_unique_recommendation_labels(session)
+    load_recommendations(session)
@@ -1,10 +1,18 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
+from sqlmodel import Session
 from starlette.middleware.cors import CORSMiddleware
 
+from app.ai import inference
+from app.ai.mkb import get_index
+from app.ai.recommendations import recommendations
 from app.api.main import api_router
 from app.core.config import settings
+from app.core.db import engine
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,8 +22,22 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # With a shared inference server the models live there, not in API workers
+    if not settings.INFERENCE_SOCKET_PATH:
+        inference.set_thread_budget()
+        inference.preload(settings.MODEL_PRELOAD)
+    get_index()
+    with Session(engine) as session:
+        recommendations.load(session)
+    yield
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
@@ -1,8 +1,11 @@
 from datetime import date, datetime, timezone
 from enum import Enum
+from typing import Literal
 import uuid
 
 from pydantic import EmailStr
+from sqlalchemy import DDL, BigInteger, Column, Index, event, literal_column, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlmodel import Field, Relationship, SQLModel
 
 # Users section
@@ -42,7 +45,9 @@ class UserPublic(UserBase):
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
 
 # Tokens and Authentication
 class Token(SQLModel):
@@ -72,9 +77,87 @@ class AppointmentInference(SQLModel):
     objective_status: str | None = None
     patient_id: uuid.UUID | None = None
     disease_id: uuid.UUID | None = None
+    # When the client already knows the patient, the DB lookup is skipped
+    patient_gender: Literal["male", "female"] | None = None
+    patient_birth_date: date | None = None
+
+class DiagnosisSuggestion(SQLModel):
+    label: str
+    title: str
+    probability: float
 
 class InferenceResult(SQLModel):
     result: str
+    suggestions: list[DiagnosisSuggestion] = []
+
+class SuggestionWithRecommendation(InferenceResult):
+    recommendation: str = ""
+
+class RescoreResult(SQLModel):
+    rows: int
+    seconds: float
+    rows_per_second: float
+
+class RescoreJob(SQLModel, table=True):
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    model: str = Field(max_length=64)
+    # pending (waiting for the rescore lock), running, done or failed
+    status: str = Field(default="pending", max_length=16)
+    # Progress so far while the job is running
+    rows: int = 0
+    seconds: float = 0.0
+    rows_per_second: float = 0.0
+    error: str | None = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), nullable=False)
+    finished_at: datetime | None = None
+
+class RescoreJobStatus(SQLModel):
+    id: uuid.UUID
+    model: str
+    status: Literal["pending", "running", "done", "failed"]
+    stats: RescoreResult
+    error: str | None = None
+    created_at: datetime
+    finished_at: datetime | None = None
+
+class CacheStatus(SQLModel):
+    hits: int
+    misses: int
+    entries: int
+    hit_rate: float
+
+class TierStatus(SQLModel):
+    model: str
+    requests: int
+    fast_hits: int
+    escalations: int
+    escalation_agreements: int
+    shadow_checks: int
+    shadow_agreements: int
+    hit_rate: float
+    # Share of background-checked fast answers the transformer agrees with
+    agreement: float | None = None
+    # Share of escalated requests where the fast tier had the same top diagnosis
+    escalation_agreement: float | None = None
+    fast_seconds: float
+    escalation_seconds: float
+
+class ModelStatus(SQLModel):
+    name: str
+    loaded: bool
+    loads: int
+    load_seconds: float | None = None
+    memory_bytes: int | None = None
+    idle_seconds: float | None = None
+    token_lengths: dict[str, int] = {}
+
+class MkbEntry(SQLModel):
+    code: str
+    title: str
+
+class MkbNode(MkbEntry):
+    path: list[MkbEntry] = []
+    children: list[MkbEntry] = []
 
 class AppointmentCreate(AppointmentBase):
     patient_id: uuid.UUID | None = Field(foreign_key="patient.id", nullable=True)
@@ -84,6 +167,14 @@ class AppointmentUpdate(AppointmentBase):
     disease_id: uuid.UUID | None = None
 
 class Appointment(AppointmentBase, table=True):
+    # Filters of read_appointments with its (created_at, id) sort key
+    __table_args__ = (
+        Index("ix_appointment_created_at_id", "created_at", "id"),
+        Index("ix_appointment_patient_id_created_at_id", "patient_id", "created_at", "id"),
+        Index("ix_appointment_doctor_id_created_at_id", "doctor_id", "created_at", "id"),
+        Index("ix_appointment_disease_id_created_at_id", "disease_id", "created_at", "id"),
+    )
+
     created_at: datetime = Field(default=datetime.now(timezone.utc), nullable=False)
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), nullable=False)
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
@@ -95,6 +186,31 @@ class Appointment(AppointmentBase, table=True):
     disease: "Disease" = Relationship(back_populates="appointments")
     doctor: "User" = Relationship(back_populates="appointments")
 
+# Full-text search over the notes: a column generated by Postgres (see the
+# migration) that is deliberately not mapped, so regular queries never load it
+APPOINTMENT_SEARCH_VECTOR = literal_column("appointment.search_vector", TSVECTOR)
+APPOINTMENT_SEARCH_DDL = [
+    DDL(
+        """
+        ALTER TABLE appointment ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('russian', coalesce(doctor_diagnosis, '')), 'A')
+            || setweight(to_tsvector('russian', coalesce(nlp_diagnosis, '')), 'A')
+            || setweight(to_tsvector('russian', coalesce(complaints, '')), 'B')
+            || setweight(to_tsvector('russian', coalesce(anamnesis, '')), 'C')
+            || setweight(to_tsvector('russian', coalesce(objective_status, '')), 'C')
+        ) STORED
+        """
+    ),
+    DDL(
+        "CREATE INDEX IF NOT EXISTS ix_appointment_search_vector "
+        "ON appointment USING gin (search_vector)"
+    ),
+]
+# Tables created without migrations (create_all in init_db) get it too
+for ddl in APPOINTMENT_SEARCH_DDL:
+    event.listen(Appointment.__table__, "after_create", ddl)
+
 class AppointmentPublic(AppointmentBase):
     id: uuid.UUID
     patient_id: uuid.UUID | None = None
@@ -106,9 +222,42 @@ class AppointmentPublicWithPatientWithDoctor(AppointmentPublic):
     patient: "PatientPublic"
     doctor: "UserPublic"
 
+class DoctorSummary(SQLModel):
+    id: uuid.UUID
+    full_name: str | None = None
+    email: str
+
+class AppointmentPublicWithDoctor(AppointmentPublic):
+    doctor: DoctorSummary | None = None
+
+class SimilarAppointment(AppointmentPublic):
+    similarity: float
+
+class AppointmentSearchHit(AppointmentPublic):
+    rank: float
+    headline: str
+
+class AppointmentSearchResults(SQLModel):
+    data: list[AppointmentSearchHit]
+    next_cursor: str | None = None
+
 class AppointmentsPublic(SQLModel):
     data: list[AppointmentPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+class AppointmentEmbedding(SQLModel, table=True):
+    appointment_id: uuid.UUID = Field(foreign_key="appointment.id", primary_key=True, ondelete="CASCADE")
+    model: str = Field(max_length=64)
+    # float32 vector, normalized to unit length
+    vector: bytes
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), nullable=False)
+    # Transaction that last wrote the row; the similarity index syncs by it
+    xact_id: int | None = Field(
+        default=None,
+        sa_column=Column(BigInteger, nullable=False, index=True, server_default=text("txid_current()")),
+    )
 
 # Patients section
 class Gender(str, Enum):
@@ -137,7 +286,14 @@ class PatientPublic(PatientBase):
 
 class PatientsPublic(SQLModel):
     data: list[PatientPublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+class PatientTimeline(SQLModel):
+    patient: PatientPublic
+    diseases: list["DiseasePublic"]
+    appointments: list[AppointmentPublicWithDoctor]
 
 # Diseases section
 class DiseaseBase(SQLModel):
@@ -152,6 +308,12 @@ class DiseaseUpdate(SQLModel):
     last_diagnosis: str | None = None
 
 class Disease(DiseaseBase, table=True):
+    # Filters of read_diseases with its (updated_at, id) sort key
+    __table_args__ = (
+        Index("ix_disease_updated_at_id", "updated_at", "id"),
+        Index("ix_disease_patient_id_updated_at_id", "patient_id", "updated_at", "id"),
+    )
+
     created_at: datetime = Field(default=datetime.now(timezone.utc), nullable=False)
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), nullable=False)
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
@@ -167,7 +329,9 @@ class DiseasePublic(DiseaseBase):
 
 class DiseasesPublic(SQLModel):
     data: list[DiseasePublic]
-    count: int
+    count: int | None
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
 
 # Generic Messages and Results
 class Message(SQLModel):
@@ -180,8 +344,15 @@ class RecommendationsBase(SQLModel):
 
 class Recommendations(RecommendationsBase, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
-    label: str
+    label: str = Field(unique=True, index=True)
     data: str
 
 class RecommendationsPublic(RecommendationsBase):
     pass
+
+# Reference data imports
+class DataImport(SQLModel, table=True):
+    name: str = Field(primary_key=True, max_length=255)
+    sha256: str = Field(max_length=64)
+    rows: int
+    loaded_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), nullable=False)
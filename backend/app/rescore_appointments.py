@@ -0,0 +1,44 @@
+import argparse
+import logging
+
+from sqlmodel import Session
+
+from app.ai import inference
+from app.ai.rescoring import rescore_appointments
+from app.core.db import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Re-run diagnosis suggestions over stored appointments"
+    )
+    parser.add_argument("model", choices=list(inference.MODELS))
+    parser.add_argument("--only-missing", action="store_true")
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    logger.info("Rescoring appointments with %s", args.model)
+    with Session(engine) as session:
+        stats = rescore_appointments(
+            session,
+            args.model,
+            only_missing=args.only_missing,
+            limit=args.limit,
+            chunk_size=args.chunk_size,
+            batch_size=args.batch_size,
+        )
+    logger.info(
+        "Rescored %d appointments in %.1fs (%.1f rows/s)",
+        stats.rows,
+        stats.seconds,
+        stats.rows_per_second,
+    )
+
+
+if __name__ == "__main__":
+    main()
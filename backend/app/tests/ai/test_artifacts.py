@@ -0,0 +1,53 @@
+import os
+import tempfile
+
+import pytest
+
+from app.ai import artifacts
+from app.ai.artifacts import StringTable, file_sha256, open_table, write_table
+from app.ai.mkb import MkbIndex
+from app.tests.ai.test_mkb import ROWS
+
+
+def test_table_round_trip_is_sorted() -> None:
+    path = os.path.join(tempfile.mkdtemp(), "table.tbl")
+    rows = [("Грипп", "Покой"), ("Астма", "Ингалятор\nпо требованию"), ("Бронхит", "")]
+    assert write_table(path, rows, 2, b"\0" * 32) == 3
+
+    table = StringTable(path)
+    assert len(table) == 3
+    assert list(table.column(0)) == ["Астма", "Бронхит", "Грипп"]
+    assert table.row(0) == ("Астма", "Ингалятор\nпо требованию")
+    assert table.find("Бронхит") == 1
+    assert table.find("Ангина") is None
+
+
+def test_compiled_index_matches_csv_index(tmp_path: str) -> None:
+    index = MkbIndex.from_rows(ROWS)
+    tables = {}
+    for name, (rows, fields) in index.tables().items():
+        path = os.path.join(tmp_path, f"{name}.tbl")
+        write_table(path, rows, fields, b"\0" * 32)
+        tables[name] = StringTable(path)
+    compiled = MkbIndex.from_tables(tables["mkb"], tables["mkb_words"])
+
+    for code in ("J45.0", "J10.1", "J40-J47"):
+        assert compiled.get(code) == index.get(code)
+        assert compiled.path(code) == index.path(code)
+        assert compiled.children_of(code) == index.children_of(code)
+    assert compiled.children_of(None) == index.children_of(None)
+    assert compiled.search("астма") == index.search("астма")
+
+
+def test_stale_table_is_ignored(tmp_path: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(artifacts, "ARTIFACT_DIR", str(tmp_path))
+    source = os.path.join(tmp_path, "source.csv")
+    with open(source, "w", encoding="utf-8") as file:
+        file.write("Астма$Ингалятор\n")
+    write_table(artifacts.artifact_path("gpt"), [("Астма", "Ингалятор")], 2, file_sha256(source))
+    assert open_table("gpt", source) is not None
+
+    with open(source, "a", encoding="utf-8") as file:
+        file.write("Грипп$Покой\n")
+    assert open_table("gpt", source) is None
+    assert open_table("missing", source) is None
@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+from app.ai.batching import MicroBatcher
+
+
+def test_concurrent_requests_share_batch() -> None:
+    batches: list[list[int]] = []
+
+    def double(items: list[int]) -> list[int]:
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=8, max_wait_ms=200)
+    results: dict[int, int] = {}
+
+    def call(i: int) -> None:
+        results[i] = batcher(i)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == {i: i * 2 for i in range(4)}
+    assert sum(len(batch) for batch in batches) == 4
+    assert len(batches) < 4
+
+
+def test_batch_size_is_bounded() -> None:
+    batches: list[list[int]] = []
+
+    def identity(items: list[int]) -> list[int]:
+        batches.append(items)
+        return items
+
+    batcher = MicroBatcher(identity, max_batch_size=2, max_wait_ms=50)
+    futures = [batcher.submit(i) for i in range(5)]
+
+    assert [future.result() for future in futures] == list(range(5))
+    assert all(len(batch) <= 2 for batch in batches)
+
+
+def test_batch_error_is_propagated() -> None:
+    def fail(_items: list[int]) -> list[int]:
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(fail, max_batch_size=4, max_wait_ms=1)
+
+    with pytest.raises(RuntimeError, match="boom"):
+        batcher(1)
@@ -0,0 +1,89 @@
+import os
+import sqlite3
+import tempfile
+from typing import Any
+
+import pytest
+
+from app.ai import inference
+from app.ai.cache import InferenceCache
+
+
+def make_cache(max_entries: int = 10, ttl_seconds: float = 60) -> InferenceCache:
+    path = os.path.join(tempfile.mkdtemp(), "cache.sqlite3")
+    return InferenceCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+
+
+def test_key_ignores_case_and_whitespace() -> None:
+    key = InferenceCache.make_key("bert", "v1", "Кашель  и\nнасморк ")
+    assert key == InferenceCache.make_key("bert", "v1", "кашель и насморк")
+    assert key != InferenceCache.make_key("bert", "v2", "кашель и насморк")
+    assert key != InferenceCache.make_key("ensemble", "v1", "кашель и насморк")
+
+
+def test_hits_and_misses_are_counted() -> None:
+    cache = make_cache()
+    assert cache.get("a") is None
+    cache.set("a", "Грипп")
+    assert cache.get("a") == "Грипп"
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (1, 1, 1)
+
+
+def test_least_recently_used_entry_is_evicted() -> None:
+    cache = make_cache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_eviction_frees_a_batch() -> None:
+    cache = make_cache(max_entries=10)
+    for i in range(11):
+        cache.set(str(i), i)
+
+    assert cache.stats().entries == 9
+    assert cache.get("0") is None and cache.get("1") is None
+    assert cache.get("2") == 2
+
+
+def test_expired_entry_is_a_miss() -> None:
+    cache = make_cache(ttl_seconds=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert cache.stats().entries == 0
+
+
+def test_counters_are_written_in_batches() -> None:
+    cache = make_cache()
+    cache.set("a", 1)
+    for _ in range(3):
+        cache.get("a")
+
+    stored = sqlite3.connect(cache.path).execute(
+        "SELECT value FROM counters WHERE name = 'hits'"
+    ).fetchone()
+    assert stored == (0,)
+    assert cache.stats().hits == 3
+
+
+def test_locked_cache_is_a_miss(monkeypatch: pytest.MonkeyPatch) -> None:
+    class LockedCache(InferenceCache):
+        def get(self, key: str) -> Any | None:
+            raise sqlite3.OperationalError("database is locked")
+
+        def set(self, key: str, value: Any) -> None:
+            raise sqlite3.OperationalError("database is locked")
+
+    suggestions = [{"label": "J10", "title": "Грипп", "probability": 0.9}]
+    monkeypatch.setattr(inference, "get_cache", lambda: LockedCache("", 1, 1))
+    monkeypatch.setattr(inference, "model_version", lambda model: "v1")
+    monkeypatch.setattr(inference, "predict_local", lambda model, text: suggestions)
+    monkeypatch.setattr(inference.settings, "INFERENCE_SOCKET_PATH", None)
+    assert inference.predict("bert", "кашель") == suggestions
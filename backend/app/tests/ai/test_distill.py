@@ -0,0 +1,45 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+
+from app.ai.distill import distillation_loss, shrink_encoder  # noqa: E402
+
+
+def tiny_roberta(layers: int) -> "transformers.RobertaForSequenceClassification":
+    config = transformers.RobertaConfig(
+        vocab_size=100,
+        hidden_size=16,
+        num_hidden_layers=layers,
+        num_attention_heads=2,
+        intermediate_size=32,
+        num_labels=3,
+    )
+    return transformers.RobertaForSequenceClassification(config).eval()
+
+
+def test_loss_is_zero_only_for_matching_logits() -> None:
+    teacher = torch.tensor([[2.0, 0.5, -1.0], [0.0, 1.0, 0.0]])
+    assert distillation_loss(teacher, teacher, 2.0).item() == pytest.approx(0.0, abs=1e-6)
+    assert distillation_loss(teacher.flip(1), teacher, 2.0).item() > 0
+
+
+def test_shrink_keeps_first_and_last_layers() -> None:
+    teacher = tiny_roberta(layers=12)
+    student = shrink_encoder(teacher, 6)
+
+    assert len(student.roberta.encoder.layer) == student.config.num_hidden_layers == 6
+    assert len(teacher.roberta.encoder.layer) == 12
+    for student_index, teacher_index in ((0, 0), (5, 11)):
+        torch.testing.assert_close(
+            student.roberta.encoder.layer[student_index].state_dict(),
+            teacher.roberta.encoder.layer[teacher_index].state_dict(),
+        )
+    # The student is a copy: training it must not touch the teacher
+    assert student.classifier.dense.weight is not teacher.classifier.dense.weight
+
+    logits = student(input_ids=torch.tensor([[0, 5, 6, 2]])).logits
+    assert logits.shape == (1, 3)
+
+    with pytest.raises(ValueError):
+        shrink_encoder(teacher, 13)
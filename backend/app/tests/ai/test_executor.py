@@ -0,0 +1,35 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.ai.executor import InferenceExecutor, InferenceQueueFull, InferenceTimeout
+
+
+def test_saturated_executor_rejects_requests() -> None:
+    executor = InferenceExecutor(max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario() -> None:
+        running = asyncio.ensure_future(executor.run_with_timeout(5, release.wait))
+        queued = asyncio.ensure_future(executor.run_with_timeout(5, release.wait))
+        await asyncio.sleep(0.05)
+        with pytest.raises(InferenceQueueFull):
+            await executor.run_with_timeout(5, release.wait)
+        release.set()
+        assert await running and await queued
+        assert await executor.run_with_timeout(5, lambda: 42) == 42
+
+    asyncio.run(scenario())
+
+
+def test_slow_request_times_out() -> None:
+    executor = InferenceExecutor(max_workers=1, max_queue=0)
+    release = threading.Event()
+
+    async def scenario() -> None:
+        with pytest.raises(InferenceTimeout):
+            await executor.run_with_timeout(0.05, release.wait)
+        release.set()
+
+    asyncio.run(scenario())
@@ -0,0 +1,59 @@
+from concurrent.futures import Future
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline
+
+from app.ai.fast import FastTier, get_fast_suggestions
+from app.ai.suggestions import Suggestion
+
+TEXTS = {
+    "J06.9": ["насморк и боль в горле", "кашель, насморк, першение в горле"],
+    "I10": ["повышение давления до 160/100", "головная боль, давление 150/90"],
+}
+
+
+@pytest.fixture(scope="module")
+def pipeline() -> object:
+    texts = [text for samples in TEXTS.values() for text in samples]
+    labels = [label for label, samples in TEXTS.items() for _ in samples]
+    return make_pipeline(TfidfVectorizer(analyzer="char_wb"), LogisticRegression(C=100)).fit(
+        texts, labels
+    )
+
+
+def suggestion(label: str) -> list[Suggestion]:
+    return [Suggestion(label=label, title=label, probability=1.0)]
+
+
+def test_fast_suggestions_are_sorted(pipeline: object) -> None:
+    (result,) = get_fast_suggestions("bert", ["насморк, боль в горле"], pipeline)
+    assert result[0]["label"] == "J06.9"
+    assert result[0]["probability"] >= result[-1]["probability"]
+
+
+def test_confident_answers_skip_the_transformer(pipeline: object) -> None:
+    tier = FastTier("bert", threshold=0.0, shadow_rate=1.0, bundle=pipeline)
+    shadowed: Future[list[Suggestion]] = Future()
+
+    def escalate(text: str) -> list[Suggestion]:
+        raise AssertionError("the transformer must not be called")
+
+    result = tier.predict("насморк, боль в горле", escalate, shadow=lambda text: shadowed)
+    assert result[0]["label"] == "J06.9"
+
+    shadowed.set_result(suggestion("I10"))
+    stats = tier.stats()
+    assert (stats.requests, stats.fast_hits, stats.hit_rate) == (1, 1, 1.0)
+    assert (stats.shadow_checks, stats.agreement) == (1, 0.0)
+
+
+def test_unsure_answers_escalate(pipeline: object) -> None:
+    tier = FastTier("bert", threshold=1.01, bundle=pipeline)
+    result = tier.predict("давление 160/100", lambda text: suggestion("I10"))
+    assert result == suggestion("I10")
+
+    stats = tier.stats()
+    assert (stats.requests, stats.fast_hits, stats.escalations) == (1, 0, 1)
+    assert stats.escalation_agreement == 1.0
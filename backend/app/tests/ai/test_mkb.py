@@ -0,0 +1,52 @@
+from app.ai.mkb import MkbIndex, read_mkb_csv
+
+ROWS = [
+    ("J00-J99", "Болезни органов дыхания"),
+    ("J40-J47", "Хронические болезни нижних дыхательных путей"),
+    ("J45", "Астма"),
+    ("J45.0", "Астма с преобладанием аллергического компонента"),
+    ("J45.9", "Астма неуточненная"),
+    ("J44", "Другая хроническая обструктивная легочная болезнь"),
+    ("J10", "Грипп, вызванный идентифицированным вирусом гриппа"),
+    ("J10.1+", "Грипп с другими респираторными проявлениями"),
+]
+
+
+def make_index() -> MkbIndex:
+    return MkbIndex.from_rows(ROWS)
+
+
+def test_exact_lookup_ignores_dual_coding_marks() -> None:
+    index = make_index()
+    assert index.title("J45.0") == "Астма с преобладанием аллергического компонента"
+    assert index.title("j10.1") == "Грипп с другими респираторными проявлениями"
+    assert index.get("J10.1").code == "J10.1+"  # type: ignore[union-attr]
+    assert index.title("Z99", "Z99") == "Z99"
+
+
+def test_prefix_lookup_is_ordered() -> None:
+    codes = [entry.code for entry in make_index().prefix("J45")]
+    assert codes == ["J45", "J45.0", "J45.9"]
+
+
+def test_ranges_and_hierarchy() -> None:
+    index = make_index()
+    assert [e.code for e in index.containing("J45.0")] == ["J00-J99", "J40-J47"]
+    assert [e.code for e in index.path("J45.0")] == ["J00-J99", "J40-J47", "J45"]
+    assert index.parent("J40-J47").code == "J00-J99"  # type: ignore[union-attr]
+    assert [e.code for e in index.children_of("J40-J47")] == ["J44", "J45"]
+    assert [e.code for e in index.children_of("J00-J99")] == ["J10", "J40-J47"]
+    assert [e.code for e in index.children_of(None)] == ["J00-J99"]
+
+
+def test_search_combines_codes_and_title_words() -> None:
+    index = make_index()
+    assert [e.code for e in index.search("J10")] == ["J10", "J10.1+"]
+    assert [e.code for e in index.search("астма аллерг")] == ["J45.0"]
+    assert [e.code for e in index.search("гри", limit=1)] == ["J10"]
+
+
+def test_quoted_rows_are_parsed() -> None:
+    rows = dict(read_mkb_csv())
+    # В названии есть запятая, поэтому вся строка справочника в кавычках
+    assert rows["J10"] == "Грипп, вызванный идентифицированным вирусом гриппа"
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+pytest.importorskip("onnxruntime")
+torch = pytest.importorskip("torch")
+
+from app.ai import bert, ensemble  # noqa: E402
+
+TEXTS = [
+    "мужчина, 45 лет, давящая боль за грудиной при физической нагрузке",
+    "женщина, 30 лет, кашель, температура 38.5, слабость в течение трёх дней",
+    "боль в пояснице, иррадиирующая в ногу",
+]
+
+
+@pytest.mark.skipif(not os.path.exists(bert.bert_onnx), reason="bert is not exported")
+def test_bert_onnx_matches_torch() -> None:
+    expected = bert.get_bert_logits(TEXTS, bert.load_bert(backend="torch"))
+    actual = bert.get_bert_logits(TEXTS, bert.load_bert(backend="onnx"))
+    torch.testing.assert_close(actual, expected, atol=1e-3, rtol=1e-3)
+
+
+@pytest.mark.skipif(
+    not os.path.exists(ensemble.ensemble_onnx), reason="ensemble is not exported"
+)
+def test_ensemble_onnx_matches_torch() -> None:
+    expected = ensemble.get_ensemble_logits(TEXTS, ensemble.load_ensemble(backend="torch"))
+    actual = ensemble.get_ensemble_logits(TEXTS, ensemble.load_ensemble(backend="onnx"))
+    torch.testing.assert_close(actual, expected, atol=1e-3, rtol=1e-3)
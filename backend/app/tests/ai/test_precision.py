@@ -0,0 +1,9 @@
+from app.ai.precision import diagnosis_class, diagnosis_classes
+
+
+def test_doctor_diagnosis_matches_class_by_code_or_title() -> None:
+    classes = diagnosis_classes(["A00-A09", "Неизвестный диагноз"])
+    assert diagnosis_class(classes, " a00-a09 ") == 0
+    assert diagnosis_class(classes, "Кишечные инфекции") == 0
+    assert diagnosis_class(classes, "неизвестный диагноз") == 1
+    assert diagnosis_class(classes, "Грипп") is None
@@ -0,0 +1,49 @@
+from sqlmodel import Session, func, select
+
+from app.ai.recommendations import (
+    RecommendationStore,
+    load_recommendations,
+    read_gpt_csv,
+)
+from app.models import DataImport, Recommendations
+
+
+def test_load_is_skipped_when_csv_is_unchanged(db: Session) -> None:
+    # init_db in the session fixture has already loaded gpt.csv
+    assert load_recommendations(db) is None
+    record = db.get(DataImport, "gpt")
+    assert record is not None
+    assert record.rows == len({label for label, _ in read_gpt_csv()})
+
+
+def test_forced_load_upserts_without_duplicates(db: Session) -> None:
+    label, data = read_gpt_csv()[0]
+    row = db.exec(select(Recommendations).where(Recommendations.label == label)).one()
+    row.data = "outdated"
+    db.add(row)
+    db.commit()
+
+    count = db.exec(select(func.count()).select_from(Recommendations)).one()
+    assert load_recommendations(db, force=True)
+    db.refresh(row)
+    assert row.data == data
+    assert db.exec(select(func.count()).select_from(Recommendations)).one() == count
+
+
+def test_store_reloads_after_import_elsewhere(db: Session) -> None:
+    store = RecommendationStore(revalidate_seconds=0)
+    store.load(db)
+    label, data = read_gpt_csv()[0]
+    assert store.get(label) == data
+
+    row = db.exec(select(Recommendations).where(Recommendations.label == label)).one()
+    row.data = "changed"
+    record = db.get(DataImport, "gpt")
+    assert record is not None
+    record.sha256 = "0" * 64
+    db.add_all([row, record])
+    db.commit()
+
+    store.ensure_loaded(db)
+    assert store.get(label) == "changed"
+    load_recommendations(db, force=True)
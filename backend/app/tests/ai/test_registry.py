@@ -0,0 +1,34 @@
+from app.ai.registry import ModelRegistry
+
+
+def test_model_is_loaded_once_on_first_use() -> None:
+    loads: list[int] = []
+
+    def loader() -> dict[str, int]:
+        loads.append(1)
+        return {"weights": len(loads)}
+
+    registry = ModelRegistry()
+    registry.register("fake", loader)
+    assert not loads
+
+    assert registry.get("fake") == {"weights": 1}
+    assert registry.get("fake") == {"weights": 1}
+    assert len(loads) == 1
+
+    [stats] = registry.stats()
+    assert stats.loaded
+    assert stats.load_seconds is not None
+
+
+def test_idle_model_is_evicted() -> None:
+    registry = ModelRegistry(idle_ttl=0.01)
+    registry.register("fake", lambda: object())
+    registry.preload("fake").join()
+
+    registry._entries["fake"].last_used = 0.001
+    assert registry.evict_idle() == ["fake"]
+    assert not registry.stats()[0].loaded
+
+    registry.get("fake")
+    assert registry.stats()[0].loads == 2
@@ -0,0 +1,61 @@
+import threading
+from typing import Any
+
+import pytest
+from sqlmodel import Session
+
+from app.ai import rescoring
+from app.models import RescoreJob
+
+
+def wait_finished(db: Session, job: RescoreJob) -> RescoreJob:
+    rescoring._get_pool().submit(lambda: None).result(timeout=5)
+    db.refresh(job)
+    return job
+
+
+def test_rescore_runs_in_background(db: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+    release = threading.Event()
+
+    def fake_rescore(
+        session: Session, model: str, *, on_progress: Any, **kwargs: Any
+    ) -> rescoring.RescoreStats:
+        release.wait(5)
+        stats = rescoring.RescoreStats(rows=kwargs["limit"], seconds=1.0, rows_per_second=7.0)
+        on_progress(stats)
+        return stats
+
+    monkeypatch.setattr(rescoring, "rescore_appointments", fake_rescore)
+    job = rescoring.start_rescore(db, "bert", limit=7)
+    assert job.status == "pending"
+
+    release.set()
+    job = wait_finished(db, job)
+    assert job.status == "done"
+    assert job.rows == 7
+    assert job.finished_at is not None
+
+
+def test_failed_rescore_keeps_error(db: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+    def fake_rescore(*args: Any, **kwargs: Any) -> rescoring.RescoreStats:
+        raise RuntimeError("model is gone")
+
+    monkeypatch.setattr(rescoring, "rescore_appointments", fake_rescore)
+    job = wait_finished(db, rescoring.start_rescore(db, "bert"))
+    assert job.status == "failed"
+    assert job.error == "model is gone"
+
+
+def test_interrupted_job_is_marked_failed(db: Session, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(
+        rescoring, "rescore_appointments", lambda *args, **kwargs: rescoring.RescoreStats()
+    )
+    # Left "running" by a process that died without releasing the lock
+    stale = RescoreJob(model="bert", status="running")
+    db.add(stale)
+    db.commit()
+
+    job = wait_finished(db, rescoring.start_rescore(db, "bert"))
+    db.refresh(stale)
+    assert job.status == "done"
+    assert stale.status == "failed"
@@ -0,0 +1,56 @@
+import os
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from app.ai import server
+from app.ai.client import InferenceClient, InferenceError
+from app.core.config import settings
+
+
+def fake_predict(model: str, text: str) -> str:
+    if model != "bert":
+        raise ValueError(f"Модель '{model}' не поддерживается")
+    if not text:
+        raise RuntimeError("empty text")
+    return text.upper()
+
+
+def start_server() -> str:
+    address = os.path.join(tempfile.mkdtemp(), "inference.sock")
+    threading.Thread(target=server.serve, args=(address,), daemon=True).start()
+    for _ in range(100):
+        if os.path.exists(address):
+            break
+        time.sleep(0.01)
+    return address
+
+
+def test_client_server_roundtrip() -> None:
+    with patch.dict(server.OPERATIONS, {"predict": fake_predict}):
+        address = start_server()
+        client = InferenceClient(address, settings.SECRET_KEY.encode())
+        assert client.call("predict", "bert", "грипп") == "ГРИПП"
+        with pytest.raises(ValueError):
+            client.call("predict", "gpt", "грипп")
+        with pytest.raises(InferenceError):
+            client.call("predict", "bert", "")
+
+
+def test_hung_server_times_out_and_reconnects() -> None:
+    def slow_predict(model: str, text: str) -> str:
+        if text == "hang":
+            time.sleep(0.5)
+        return text
+
+    with patch.dict(server.OPERATIONS, {"predict": slow_predict}):
+        address = start_server()
+        client = InferenceClient(address, settings.SECRET_KEY.encode(), timeout=0.05)
+        with pytest.raises(InferenceError):
+            client.call("predict", "bert", "hang")
+        # The late answer to the first call must not reach the next one
+        assert client.call("predict", "bert", "грипп") == "грипп"
+        assert client.call("predict", "bert", "hang", timeout=None) == "hang"
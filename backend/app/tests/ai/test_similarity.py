@@ -0,0 +1,78 @@
+import os
+import uuid
+
+import numpy as np
+import pytest
+
+from app.ai.similarity import SimilarityIndex, hnswlib_available
+
+
+def unit(*values: float) -> np.ndarray:
+    vector = np.array(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+@pytest.fixture(params=[False, True], ids=["exact", "hnsw"])
+def use_hnsw(request: pytest.FixtureRequest) -> bool:
+    if request.param and not hnswlib_available():
+        pytest.skip("hnswlib is not installed")
+    return request.param
+
+
+def test_query_orders_by_similarity_and_excludes(use_hnsw: bool) -> None:
+    a, b, c = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    index = SimilarityIndex(use_hnsw=use_hnsw)
+    index.add([a, b, c], np.stack([unit(1, 0, 0), unit(1, 1, 0), unit(0, 0, 1)]))
+
+    hits = index.query(unit(1, 0, 0), 2)
+    assert [id_ for id_, _ in hits] == [a, b]
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+
+    assert [id_ for id_, _ in index.query(unit(1, 0, 0), 2, exclude=a)] == [b, c]
+
+
+def test_add_replaces_known_vector(use_hnsw: bool) -> None:
+    a, b = uuid.uuid4(), uuid.uuid4()
+    index = SimilarityIndex(use_hnsw=use_hnsw)
+    index.add([a, b], np.stack([unit(1, 0), unit(0, 1)]))
+    index.add([a], np.stack([unit(0, 1)]))
+
+    assert len(index) == 2
+    np.testing.assert_allclose(index.vector(a), unit(0, 1))
+    assert index.vector(uuid.uuid4()) is None
+
+
+def test_save_and_load_round_trip(tmp_path: str, use_hnsw: bool) -> None:
+    path = os.path.join(tmp_path, "similarity")
+    ids = [uuid.uuid4() for _ in range(50)]
+    vectors = np.random.default_rng(0).normal(size=(50, 8)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    index = SimilarityIndex(path, use_hnsw=use_hnsw)
+    index.add(ids, vectors)
+    index.save()
+
+    loaded = SimilarityIndex.load(path, use_hnsw=use_hnsw)
+    assert loaded.ids == ids
+    assert loaded.synced_xid is None
+    assert loaded.query(vectors[7], 1) == index.query(vectors[7], 1)
+    assert loaded.query(vectors[7], 1)[0][0] == ids[7]
+
+    # Vectors added after loading keep their own rows
+    extra = uuid.uuid4()
+    loaded.add([extra], vectors[:1])
+    assert loaded.rows[extra] == 50
+    np.testing.assert_allclose(loaded.vector(ids[3]), vectors[3], atol=1e-6)
+
+
+def test_stale_files_are_rebuilt(tmp_path: str, use_hnsw: bool) -> None:
+    path = os.path.join(tmp_path, "similarity")
+    index = SimilarityIndex(path, use_hnsw=use_hnsw)
+    index.add([uuid.uuid4()], np.stack([unit(1, 0)]))
+    index.synced_xid = 42
+    index.save()
+    assert SimilarityIndex.load(path, use_hnsw=use_hnsw).synced_xid == 42
+
+    # Saved in the other mode: the vectors are not there, so sync starts over
+    other = SimilarityIndex.load(path, use_hnsw=not use_hnsw)
+    assert len(other) == 0
+    assert other.synced_xid is None
@@ -0,0 +1,35 @@
+import pytest
+
+from app.ai.histograms import TokenLengthHistogram
+
+torch = pytest.importorskip("torch")
+
+from app.ai.tokenization import pad, run_bucketed  # noqa: E402
+
+
+def test_histogram_counts_lengths_and_truncations() -> None:
+    histogram = TokenLengthHistogram(edges=(64, 512))
+    histogram.record([10, 64, 100, 600], max_length=512)
+
+    assert histogram.snapshot() == {"<=64": 2, "<=512": 1, ">512": 1, "truncated": 1}
+
+
+def test_pad_builds_attention_mask() -> None:
+    input_ids, attention_mask = pad([[5, 6, 7], [8]], pad_id=1, length=4)
+
+    assert input_ids.tolist() == [[5, 6, 7, 1], [8, 1, 1, 1]]
+    assert attention_mask.tolist() == [[1, 1, 1, 0], [1, 0, 0, 0]]
+
+
+def test_run_bucketed_keeps_order_and_pads_per_bucket() -> None:
+    lengths = [500, 10, 300, 20]
+    padded_to: list[int] = []
+
+    def run(indices: list[int], length: int) -> torch.Tensor:
+        padded_to.append(length)
+        return torch.tensor([[float(i)] for i in indices])
+
+    logits = run_bucketed(run, lengths, max_length=512)
+
+    assert logits.squeeze(1).tolist() == [0.0, 1.0, 2.0, 3.0]
+    assert sorted(padded_to) == [20, 500]
@@ -0,0 +1,44 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.models import Appointment, Gender, PatientCreate
+from app.tests.utils.utils import random_lower_string
+
+
+def test_search_appointments_ranks_highlights_and_pages(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    patient = crud.create_patient(
+        session=db,
+        patient_create=PatientCreate(full_name=random_lower_string(), gender=Gender.male),
+    )
+    db.add_all(
+        [
+            Appointment(patient_id=patient.id, complaints="Сильная головная боль по утрам"),
+            Appointment(patient_id=patient.id, doctor_diagnosis="Головная боль напряжения"),
+            Appointment(patient_id=patient.id, anamnesis="Боли в голове после травмы"),
+            Appointment(patient_id=patient.id, complaints="Кашель, насморк"),
+        ]
+    )
+    db.commit()
+
+    url = f"{settings.API_V1_STR}/appointments/search"
+    params: dict[str, str | int] = {"q": "головные боли", "patient_id": str(patient.id), "limit": 1}
+    first = client.get(url, headers=superuser_token_headers, params=params).json()
+    # A match in the diagnosis weighs more than one in the complaints
+    assert first["data"][0]["doctor_diagnosis"] == "Головная боль напряжения"
+    assert "<mark>" in first["data"][0]["headline"]
+
+    hits = first["data"]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = client.get(
+            url, headers=superuser_token_headers, params={**params, "cursor": cursor}
+        ).json()
+        hits += page["data"]
+        cursor = page["next_cursor"]
+    assert len(hits) == 2
+    assert len({hit["id"] for hit in hits}) == 2
+    assert [hit["rank"] for hit in hits] == sorted((hit["rank"] for hit in hits), reverse=True)
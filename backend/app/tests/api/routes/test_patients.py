@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app import crud
+from app.core.config import settings
+from app.core.db import engine
+from app.models import Appointment, Disease, Gender, PatientCreate
+from app.tests.utils.utils import random_lower_string
+
+
+def test_read_patients_cursor_pages(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(5):
+        crud.create_patient(
+            session=db,
+            patient_create=PatientCreate(full_name=random_lower_string(), gender=Gender.male),
+        )
+    url = f"{settings.API_V1_STR}/patients/"
+    everything = client.get(url, headers=superuser_token_headers, params={"limit": 1000}).json()
+    expected = [patient["id"] for patient in everything["data"]]
+    assert everything["next_cursor"] is None
+
+    pages = []
+    params: dict[str, str | int] = {"limit": 2}
+    while True:
+        r = client.get(url, headers=superuser_token_headers, params=params)
+        assert r.status_code == 200
+        page = r.json()
+        pages.append(page)
+        if not page["next_cursor"]:
+            break
+        params = {"limit": 2, "cursor": page["next_cursor"]}
+    assert [p["id"] for page in pages for p in page["data"]] == expected
+    assert pages[0]["prev_cursor"] is None
+
+    # Going back from the last page returns the page before it
+    r = client.get(
+        url,
+        headers=superuser_token_headers,
+        params={"limit": 2, "cursor": pages[-1]["prev_cursor"]},
+    )
+    assert r.json()["data"] == pages[-2]["data"]
+
+
+def test_read_patients_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.get(
+        f"{settings.API_V1_STR}/patients/",
+        headers=superuser_token_headers,
+        params={"cursor": "not-a-cursor"},
+    )
+    assert r.status_code == 400
+
+
+def test_read_patients_count_modes(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/patients/"
+    exact = client.get(url, headers=superuser_token_headers).json()
+    assert exact["count"] == len(
+        client.get(url, headers=superuser_token_headers, params={"limit": 1000}).json()["data"]
+    )
+
+    r = client.get(url, headers=superuser_token_headers, params={"include_count": "none"})
+    assert r.json()["count"] is None
+
+    r = client.get(url, headers=superuser_token_headers, params={"include_count": "estimated"})
+    assert isinstance(r.json()["count"], int)
+
+
+def test_read_patient_timeline_in_fixed_queries(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    patient = crud.create_patient(
+        session=db,
+        patient_create=PatientCreate(full_name=random_lower_string(), gender=Gender.female),
+    )
+    doctor = crud.get_user_by_email(session=db, email=settings.FIRST_SUPERUSER)
+    assert doctor
+    disease = Disease(patient_id=patient.id, last_diagnosis="Грипп")
+    db.add(disease)
+    started = datetime(2024, 1, 1)
+    db.add_all(
+        Appointment(
+            patient_id=patient.id,
+            disease_id=disease.id,
+            doctor_id=doctor.id,
+            created_at=started + timedelta(days=day),
+            complaints=f"day {day}",
+        )
+        for day in range(10)
+    )
+    db.commit()
+
+    statements: list[str] = []
+
+    def record(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        r = client.get(
+            f"{settings.API_V1_STR}/patients/{patient.id}/timeline",
+            headers=superuser_token_headers,
+            params={"sort_order": "desc"},
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert r.status_code == 200
+    timeline = r.json()
+    assert timeline["patient"]["id"] == str(patient.id)
+    assert [d["id"] for d in timeline["diseases"]] == [str(disease.id)]
+    assert [a["complaints"] for a in timeline["appointments"]] == [
+        f"day {day}" for day in reversed(range(10))
+    ]
+    assert timeline["appointments"][0]["doctor"]["email"] == settings.FIRST_SUPERUSER
+    # One query for the current user, three for the chart
+    assert len(statements) <= 4
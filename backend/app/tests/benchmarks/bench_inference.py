@@ -0,0 +1,242 @@
+"""
+Inference benchmarks: the model functions directly and the full
+/models/{model}/inference route.
+
+    python -m app.tests.benchmarks.bench_inference run --output before.json
+    python -m app.tests.benchmarks.bench_inference run --models ensemble --ensemble-encoders
+    python -m app.tests.benchmarks.bench_inference compare before.json after.json
+"""
+import argparse
+import importlib
+import json
+import logging
+import sys
+from collections.abc import Callable
+from dataclasses import asdict
+from typing import Any
+
+from app.tests.benchmarks.harness import (
+    Case,
+    Result,
+    compare,
+    environment,
+    measure,
+    synthetic_cases,
+    write_report,
+)
+
+logger = logging.getLogger(__name__)
+
+# Direct entry points: one text per call, and a whole batch per forward pass
+FUNCTIONS: dict[str, tuple[str, str]] = {
+    "bert": ("app.ai.bert:get_bert_result", "app.ai.bert:get_bert_results"),
+    "ensemble": ("app.ai.ensemble:get_ensemble_result", "app.ai.ensemble:get_ensemble_results"),
+}
+
+
+def _import(path: str) -> Callable[..., Any]:
+    module_name, fn_name = path.split(":")
+    fn: Callable[..., Any] = getattr(importlib.import_module(module_name), fn_name)
+    return fn
+
+
+def bench_functions(
+    model: str, cases: list[Case], concurrency: list[int], batch_sizes: list[int]
+) -> list[Result]:
+    from app.ai.prompts import build_prompt
+
+    single, batched = (_import(path) for path in FUNCTIONS[model])
+    texts = [
+        build_prompt(
+            model,
+            complaints=case.complaints,
+            anamnesis=case.anamnesis,
+            objective_status=case.objective_status,
+            gender="female" if i % 2 else "male",
+        )
+        for i, case in enumerate(cases)
+    ]
+    results = []
+    for workers in concurrency:
+        results.append(
+            measure(
+                f"{model}.{single.__name__}",
+                lambda batch: single(batch[0]),
+                texts,
+                concurrency=workers,
+            )
+        )
+        logger.info("%s: p95 %.1f ms", results[-1].key, results[-1].p95_ms)
+    for batch_size in batch_sizes:
+        results.append(
+            measure(f"{model}.{batched.__name__}", batched, texts, batch_size=batch_size)
+        )
+        logger.info("%s: p95 %.1f ms", results[-1].key, results[-1].p95_ms)
+    return results
+
+
+def bench_ensemble_branches(cases: list[Case]) -> list[Result]:
+    """
+    Each ensemble encoder alone and the whole ensemble, one text per call.
+    With ENSEMBLE_PARALLEL the ensemble should take about as long as the
+    slower encoder, not the sum of both.
+    """
+    import torch
+
+    from app.ai import ensemble
+    from app.ai.backends import TorchBackend
+    from app.ai.prompts import build_prompt
+    from app.ai.registry import registry
+    from app.core.config import settings
+
+    bundle = registry.get("ensemble")
+    if not isinstance(bundle.backend, TorchBackend):
+        logger.warning("Ensemble encoders can only be timed on the torch backend")
+        return []
+    module = bundle.backend.module
+    inputs = [
+        ensemble.encode_ensemble_inputs(
+            [
+                build_prompt(
+                    "ensemble",
+                    complaints=case.complaints,
+                    anamnesis=case.anamnesis,
+                    objective_status=case.objective_status,
+                )
+            ],
+            bundle,
+        )
+        for case in cases
+    ]
+
+    def encoder(index: int) -> Callable[[list[dict[str, torch.Tensor]]], Any]:
+        model = getattr(module, f"bert_model_{index}")
+
+        def run(batch: list[dict[str, torch.Tensor]]) -> Any:
+            with torch.no_grad():
+                return model(
+                    input_ids=batch[0][f"input_ids_{index}"],
+                    attention_mask=batch[0][f"attention_mask_{index}"],
+                )
+
+        return run
+
+    results = [
+        measure("ensemble.encoder_1", encoder(1), inputs),
+        measure("ensemble.encoder_2", encoder(2), inputs),
+        measure("ensemble.forward", lambda batch: bundle.backend(batch[0]), inputs),
+    ]
+    slower = max(results[0].p50_ms, results[1].p50_ms)
+    logger.info(
+        "ensemble p50 %.1f ms, slower encoder %.1f ms (%.2fx), parallel=%s",
+        results[2].p50_ms,
+        slower,
+        results[2].p50_ms / slower,
+        settings.ENSEMBLE_PARALLEL,
+    )
+    return results
+
+
+def bench_route(
+    model: str, cases: list[Case], concurrency: list[int], url: str | None
+) -> list[Result]:
+    """
+    The route through auth, validation, the executor, the micro-batcher and
+    the model; in-process via TestClient or against a running server.
+    """
+    import httpx
+    from fastapi.testclient import TestClient
+
+    from app.core.config import settings
+    from app.main import app
+    from app.tests.utils.utils import get_superuser_token_headers
+
+    client: Any = httpx.Client(base_url=url, timeout=60) if url else TestClient(app)
+    results = []
+    with client:
+        headers = get_superuser_token_headers(client)
+        path = f"{settings.API_V1_STR}/models/{model}/inference"
+
+        def post(batch: list[Case]) -> None:
+            body = dict(asdict(batch[0]), patient_gender="male")
+            response = client.post(path, headers=headers, json=body)
+            response.raise_for_status()
+
+        for workers in concurrency:
+            results.append(measure(f"route.{model}", post, cases, concurrency=workers))
+            logger.info("%s: p95 %.1f ms", results[-1].key, results[-1].p95_ms)
+    return results
+
+
+def run(args: argparse.Namespace) -> None:
+    # Repeated runs must hit the models, not the results cache; a server
+    # passed with --url should be started with INFERENCE_CACHE_MAX_ENTRIES=0
+    from app.core.config import settings
+
+    settings.INFERENCE_CACHE_MAX_ENTRIES = 0
+
+    cases = synthetic_cases(args.texts, args.seed)
+    results: list[Result] = []
+    for model in args.models:
+        results.extend(bench_functions(model, cases, args.concurrency, args.batch_sizes))
+        if model == "ensemble" and args.ensemble_encoders:
+            results.extend(bench_ensemble_branches(cases))
+        if args.route:
+            results.extend(bench_route(model, cases, args.concurrency, args.url))
+
+    write_report(args.output, results, environment())
+    for result in results:
+        print(
+            f"{result.key:<50} p50 {result.p50_ms:8.1f}  p95 {result.p95_ms:8.1f}  "
+            f"p99 {result.p99_ms:8.1f} ms  {result.throughput:7.1f} texts/s  "
+            f"rss {result.peak_rss_bytes / 2**20:.0f} MB"
+        )
+    print(f"Saved {args.output}")
+
+
+def run_compare(args: argparse.Namespace) -> None:
+    with open(args.baseline, encoding="utf-8") as file:
+        baseline = json.load(file)
+    with open(args.current, encoding="utf-8") as file:
+        current = json.load(file)
+    regressions = compare(baseline, current, args.max_regression)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark model inference")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Measure and write a JSON report")
+    run_parser.add_argument("--models", nargs="+", choices=list(FUNCTIONS), default=list(FUNCTIONS))
+    run_parser.add_argument("--texts", type=int, default=200, help="Synthetic texts per measurement")
+    run_parser.add_argument("--seed", type=int, default=0)
+    run_parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8])
+    run_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32])
+    run_parser.add_argument("--route", action="store_true", help="Also benchmark the HTTP route")
+    run_parser.add_argument(
+        "--ensemble-encoders",
+        action="store_true",
+        help="Also time each ensemble encoder alone against the whole ensemble",
+    )
+    run_parser.add_argument("--url", help="Running API server for --route instead of TestClient")
+    run_parser.add_argument("--output", default="benchmark.json")
+    run_parser.set_defaults(handler=run)
+
+    compare_parser = commands.add_parser("compare", help="Compare two JSON reports")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--max-regression", type=float, default=0.1)
+    compare_parser.set_defaults(handler=run_compare)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
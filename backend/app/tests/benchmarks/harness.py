@@ -0,0 +1,228 @@
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+COMPLAINTS = [
+    "головная боль в затылочной области",
+    "кашель с мокротой",
+    "повышение температуры до 38,5",
+    "боль в горле при глотании",
+    "давящая боль за грудиной при нагрузке",
+    "одышка при подъёме на второй этаж",
+    "боль в пояснице с иррадиацией в ногу",
+    "тошнота и изжога после еды",
+    "слабость, быстрая утомляемость",
+    "заложенность носа, насморк",
+    "сердцебиение и перебои в работе сердца",
+    "боль в коленных суставах к вечеру",
+]
+ANAMNESIS = [
+    "болеет в течение трёх дней",
+    "симптомы беспокоят около месяца",
+    "в анамнезе гипертоническая болезнь",
+    "контакт с больным ОРВИ",
+    "ранее подобных жалоб не было",
+    "принимает эналаприл 10 мг утром",
+    "ухудшение после переохлаждения",
+    "аллергоанамнез не отягощён",
+]
+OBJECTIVE = [
+    "состояние удовлетворительное",
+    "кожные покровы обычной окраски",
+    "зев гиперемирован, миндалины не увеличены",
+    "дыхание везикулярное, хрипов нет",
+    "АД 150/95 мм рт. ст., ЧСС 88 в минуту",
+    "живот мягкий, безболезненный",
+    "симптом Ласега положительный справа",
+    "тоны сердца ритмичные, приглушены",
+]
+
+# Share of short, medium and long notes and the number of phrases per field
+LENGTHS = [(0.5, 1, 2), (0.35, 3, 5), (0.15, 8, 16)]
+
+
+@dataclass
+class Case:
+    complaints: str
+    anamnesis: str
+    objective_status: str
+
+
+def synthetic_cases(count: int, seed: int = 0) -> list[Case]:
+    """
+    Reproducible appointment notes of varied length, from a couple of phrases
+    to long examinations that hit the model's max length.
+    """
+    rng = random.Random(seed)
+    weights = [share for share, _, _ in LENGTHS]
+    cases = []
+    for i in range(count):
+        _, low, high = rng.choices(LENGTHS, weights)[0]
+
+        def field(phrases: list[str]) -> str:
+            return ", ".join(rng.choice(phrases) for _ in range(rng.randint(low, high)))
+
+        # The number keeps texts distinct so a results cache cannot skew timings
+        cases.append(Case(f"{field(COMPLAINTS)} (№{i})", field(ANAMNESIS), field(OBJECTIVE)))
+    return cases
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Percentile with linear interpolation between the closest ranks.
+    """
+    if not values:
+        raise ValueError("No values")
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_bytes() -> int:
+    # High-water mark of the whole process, so it only grows between measurements;
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class Result:
+    name: str
+    concurrency: int
+    batch_size: int
+    calls: int
+    texts: int
+    seconds: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    throughput: float
+    peak_rss_bytes: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}[c={self.concurrency},b={self.batch_size}]"
+
+
+def measure(
+    name: str,
+    fn: Callable[[list[T]], Any],
+    items: Sequence[T],
+    *,
+    concurrency: int = 1,
+    batch_size: int = 1,
+    warmup: int = 1,
+) -> Result:
+    """
+    Calls `fn` with batches of `batch_size` items from `concurrency` threads.
+
+    Latency is the duration of one call, throughput is items per second over
+    the whole run. The first `warmup` batches are not measured.
+    """
+    batches = [list(items[i : i + batch_size]) for i in range(0, len(items), batch_size)]
+    for batch in batches[:warmup]:
+        fn(batch)
+    batches = batches[warmup:] or batches
+
+    def timed(batch: list[T]) -> float:
+        started = time.perf_counter()
+        fn(batch)
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(timed, batches))
+    seconds = time.perf_counter() - started
+    texts = sum(len(batch) for batch in batches)
+    return Result(
+        name=name,
+        concurrency=concurrency,
+        batch_size=batch_size,
+        calls=len(batches),
+        texts=texts,
+        seconds=seconds,
+        p50_ms=percentile(latencies, 50),
+        p95_ms=percentile(latencies, 95),
+        p99_ms=percentile(latencies, 99),
+        throughput=texts / seconds if seconds else 0.0,
+        peak_rss_bytes=peak_rss_bytes(),
+    )
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict[str, Any]:
+    from app.core.config import settings
+
+    info: dict[str, Any] = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "precision": settings.MODEL_PRECISION,
+        "backend": settings.INFERENCE_BACKEND,
+        "max_batch_size": settings.INFERENCE_MAX_BATCH_SIZE,
+        "max_wait_ms": settings.INFERENCE_MAX_WAIT_MS,
+    }
+    try:
+        import torch
+
+        info["torch"] = torch.__version__
+        info["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return info
+
+
+def write_report(path: str, results: list[Result], env: dict[str, Any]) -> None:
+    report = {
+        "environment": env,
+        "results": [dict(asdict(result), key=result.key) for result in results],
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], max_regression: float
+) -> list[str]:
+    """
+    Measurements whose p95 grew or throughput fell by more than
+    `max_regression` (a fraction) against the baseline report.
+    """
+    before = {result["key"]: result for result in baseline["results"]}
+    regressions = []
+    for result in current["results"]:
+        old = before.get(result["key"])
+        if old is None:
+            continue
+        if result["p95_ms"] > old["p95_ms"] * (1 + max_regression):
+            regressions.append(
+                f"{result['key']}: p95 {old['p95_ms']:.1f} -> {result['p95_ms']:.1f} ms"
+            )
+        if result["throughput"] < old["throughput"] * (1 - max_regression):
+            regressions.append(
+                f"{result['key']}: throughput {old['throughput']:.1f} -> "
+                f"{result['throughput']:.1f} texts/s"
+            )
+    return regressions
@@ -0,0 +1,55 @@
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from app.tests.benchmarks.harness import compare, measure, percentile, synthetic_cases
+
+
+def test_synthetic_cases_are_reproducible_and_varied() -> None:
+    cases = synthetic_cases(200, seed=1)
+    assert cases == synthetic_cases(200, seed=1)
+    assert len({case.complaints for case in cases}) == 200
+
+    lengths = [len(case.objective_status.split(", ")) for case in cases]
+    assert min(lengths) <= 2 and max(lengths) >= 8
+
+
+def test_percentile_interpolates() -> None:
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == pytest.approx(50.5)
+    assert percentile(values, 99) == pytest.approx(99.01)
+    assert percentile([3.0], 95) == 3.0
+
+
+def test_measure_counts_batches_and_threads() -> None:
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def work(batch: list[int]) -> None:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.01)
+        with lock:
+            active -= 1
+
+    result = measure("sleep", work, list(range(41)), concurrency=4, batch_size=4, warmup=1)
+    assert (result.calls, result.texts) == (10, 37)
+    assert peak > 1
+    assert 10 <= result.p50_ms <= result.p95_ms <= result.p99_ms
+    assert result.throughput > 0
+    assert result.peak_rss_bytes > 0
+    assert result.key == "sleep[c=4,b=4]"
+
+
+def test_compare_flags_regressions_only() -> None:
+    def report(p95_ms: float, throughput: float) -> dict[str, Any]:
+        return {"results": [{"key": "bert[c=1,b=1]", "p95_ms": p95_ms, "throughput": throughput}]}
+
+    assert compare(report(100, 10), report(105, 9.5), max_regression=0.1) == []
+    regressions = compare(report(100, 10), report(150, 5), max_regression=0.1)
+    assert len(regressions) == 2
@@ -7,7 +7,7 @@ set -x
 python app/backend_pre_start.py
 
 # Run migrations
-# alembic upgrade head
+alembic upgrade head
 
 # Create initial data in DB
 python app/initial_data.py